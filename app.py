@@ -1,20 +1,89 @@
 import argparse
+import asyncio
+import json
 import os
+import pathlib
+import re
+import uuid
 from typing import Any, Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
-from services.orchestrator import AnalyzeOrchestrator
+from loguru import logger
+from clients.gemini_client import DEFAULT_BASE_URL, DEFAULT_MODEL, LLMResponseError, LLMUnavailableError
+from services.orchestrator import AnalyzeOrchestrator, OrchestratorBusyError
+from services.jobs import JobManager, JobQueueFullError, JobStore, SQLiteJobStore
+from services.batch import BatchRunner, batch_output_path, collect_pdfs, format_summary, run_batch_cli
+from services.extraction_cache import ExtractionCache
+from services.peer_index import PeerIndex
+from services.rescore import DerivedStore, Rescorer, format_rescore_summary
+from utils.decision_engine import DecisionEngine
+from utils.pdf import shutdown_pdf_pool
+from utils.uploads import UploadLimitMiddleware, UploadTooLargeError, save_upload
+from utils.telemetry import METRICS_CONTENT_TYPE, StageTimer, render_metrics
 
 load_dotenv()
 
 APP_HOST = "0.0.0.0"
 APP_PORT = 8000
-APP_RELOAD = True
+APP_RELOAD = os.getenv("APP_RELOAD", "0") in ("1", "true", "True")
+# "lazy" serves immediately and warms clients in the background; "eager" warms before serving
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy")
 LIBSQL_URL = "file:./memory/ed.db"
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", DEFAULT_MODEL)
+# Point at any OpenAI-compatible endpoint, e.g. the load-test mock in benchmarks/mock_llm.py
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", DEFAULT_BASE_URL)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+# Client-side quota; 0 leaves it to the provider's 429s
+LLM_RPM = float(os.getenv("LLM_RPM", "0")) or None
+LLM_TPM = float(os.getenv("LLM_TPM", "0")) or None
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+PDF_CONCURRENCY = int(os.getenv("PDF_CONCURRENCY", "2"))
+MAX_PENDING_ANALYSES = int(os.getenv("MAX_PENDING_ANALYSES", "16"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or None
+PDF_PARALLEL_THRESHOLD = int(os.getenv("PDF_PARALLEL_THRESHOLD", "64"))
+# Rule-based summary-table parsing; confident results skip or shrink the LLM call
+TABLE_FAST_PATH = os.getenv("TABLE_FAST_PATH", "1") not in ("0", "false", "False")
+TABLE_SKIP_CONFIDENCE = float(os.getenv("TABLE_SKIP_CONFIDENCE", "0.9"))
+TABLE_SHRINK_CONFIDENCE = float(os.getenv("TABLE_SHRINK_CONFIDENCE", "0.75"))
+TEXT_NORMALIZE = os.getenv("TEXT_NORMALIZE", "1") not in ("0", "false", "False")
+# Page text decoded at once across concurrent analyses; 0 disables the ceiling
+TEXT_MEMORY_MB = int(os.getenv("TEXT_MEMORY_MB", "256"))
+BUSY_RETRY_AFTER_SECONDS = 10
+UPLOAD_DIR = "uploads"
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Room for the multipart boundaries and the other form fields around a single PDF
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(10 * MAX_UPLOAD_BYTES)))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "100"))
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+# In-memory store only: how long, and how many, finished jobs stay queryable
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+MAX_FINISHED_JOBS = int(os.getenv("MAX_FINISHED_JOBS", "1000"))
+JOB_DB_PATH = "memory/jobs.db"
+DERIVED_DB_PATH = "memory/derived.db"
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_INPUT_ROOT = os.getenv("BATCH_INPUT_ROOT", ".")
+# How long a finished batch's status stays available; its output file is kept regardless
+BATCH_RETENTION_SECONDS = float(os.getenv("BATCH_RETENTION_SECONDS", "3600"))
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+BATCH_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
 app = FastAPI(title="IPO Scorecard v1", version="0.1.0")
+# Added first so CORS wraps it and browsers can read the 413
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/analyze": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/analyze/stream": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/jobs": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/analyze/batch": MAX_BATCH_UPLOAD_BYTES,
+    },
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,9 +93,60 @@ app.add_middleware(
 )
 
 
+def build_orchestrator() -> AnalyzeOrchestrator:
+    return AnalyzeOrchestrator(
+        libsql_url=LIBSQL_URL,
+        llm_concurrency=LLM_CONCURRENCY,
+        pdf_concurrency=PDF_CONCURRENCY,
+        max_pending=MAX_PENDING_ANALYSES,
+        pdf_workers=PDF_WORKERS,
+        pdf_parallel_threshold=PDF_PARALLEL_THRESHOLD,
+        gemini_model=GEMINI_MODEL,
+        gemini_base_url=GEMINI_BASE_URL,
+        llm_requests_per_minute=LLM_RPM,
+        llm_tokens_per_minute=LLM_TPM,
+        llm_max_retries=LLM_MAX_RETRIES,
+        llm_timeout_s=LLM_TIMEOUT_SECONDS,
+        table_fast_path=TABLE_FAST_PATH,
+        table_skip_confidence=TABLE_SKIP_CONFIDENCE,
+        table_shrink_confidence=TABLE_SHRINK_CONFIDENCE,
+        normalize_text=TEXT_NORMALIZE,
+        text_memory_bytes=TEXT_MEMORY_MB * 1024 * 1024,
+    )
+
+
 @app.on_event("startup")
 async def startup() -> None:
-    app.state.orchestrator = AnalyzeOrchestrator(libsql_url=LIBSQL_URL)
+    app.state.orchestrator = build_orchestrator()
+    app.state.batches = {}
+    app.state.jobs = JobManager(
+        app.state.orchestrator,
+        workers=JOB_WORKERS,
+        max_queued=MAX_QUEUED_JOBS,
+        store=SQLiteJobStore(JOB_DB_PATH) if JOB_STORE == "sqlite" else JobStore(JOB_RETENTION_SECONDS, MAX_FINISHED_JOBS),
+    )
+    await app.state.jobs.start()
+    app.state.rescorer = Rescorer(
+        app.state.orchestrator.cache,
+        DerivedStore(DERIVED_DB_PATH),
+        app.state.orchestrator.decision_engine,
+        peers=app.state.orchestrator.peer_index,
+    )
+    app.state.warmup = asyncio.create_task(app.state.orchestrator.warm_up())
+    if STARTUP_MODE == "eager":
+        await app.state.warmup
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    if not app.state.warmup.done():
+        app.state.warmup.cancel()
+    await app.state.jobs.stop()
+    await app.state.orchestrator.mcp_tools.close()
+    app.state.orchestrator.cache.close()
+    app.state.rescorer.store.close()
+    app.state.orchestrator.peer_index.close()
+    shutdown_pdf_pool()
 
 
 @app.get("/health")
@@ -34,21 +154,369 @@ def health() -> dict[str, bool]:
     return {"ok": True}
 
 
-@app.post("/analyze")
-async def analyze(file: UploadFile = File(...), slug: Optional[str] = Form(default=None)) -> dict[str, Any]:
+@app.get("/ready")
+def ready() -> JSONResponse:
+    # Liveness (/health) only says the process serves HTTP; readiness waits for warm-up
+    task = getattr(app.state, "warmup", None)
+    if task is None or not task.done():
+        return JSONResponse({"ready": False, "status": "warming_up"}, status_code=503)
+    if task.cancelled() or task.exception() is not None:
+        error = "cancelled" if task.cancelled() else str(task.exception())
+        return JSONResponse({"ready": False, "status": "warm_up_failed", "error": error}, status_code=503)
+    return JSONResponse({"ready": True, "warm_up_ms": task.result()})
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/llm/stats")
+def llm_stats() -> dict[str, Any]:
+    return app.state.orchestrator.gemini.scheduler.summary()
+
+
+@app.get("/cache/stats")
+def cache_stats() -> dict[str, Any]:
+    orchestrator = app.state.orchestrator
+    return {
+        **orchestrator.cache.summary(),
+        "page_store": orchestrator.page_store.summary(),
+        "report_store": orchestrator.report_store.summary(),
+        "text_memory": orchestrator.text_budget.summary(),
+    }
+
+
+async def _save_pdf_upload(file: UploadFile) -> tuple[str, pathlib.Path]:
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
-    content = await file.read()
     try:
-        result = await app.state.orchestrator.run(
-            file_bytes=content,
+        file_id, pdf_path, _ = await save_upload(
+            file,
+            pathlib.Path(UPLOAD_DIR),
+            max_bytes=MAX_UPLOAD_BYTES,
+            chunk_size=UPLOAD_CHUNK_BYTES,
+        )
+    except UploadTooLargeError as te:
+        raise HTTPException(status_code=413, detail=str(te))
+    return file_id, pdf_path
+
+
+def _analysis_error(e: Exception) -> Optional[HTTPException]:
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, OrchestratorBusyError):
+        return HTTPException(
+            status_code=429,
+            detail={"message": str(e), "pending": e.pending, "limit": e.limit},
+            headers={"Retry-After": str(BUSY_RETRY_AFTER_SECONDS)},
+        )
+    if isinstance(e, LLMUnavailableError):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, round(e.retry_after or BUSY_RETRY_AFTER_SECONDS)))},
+        )
+    if isinstance(e, LLMResponseError):
+        return HTTPException(status_code=502, detail=str(e))
+    return None
+
+
+@app.post("/analyze")
+async def analyze(
+    file: UploadFile = File(...),
+    slug: Optional[str] = Form(default=None),
+    timings: bool = False,
+) -> dict[str, Any]:
+    timer = StageTimer()
+    with timer.stage("upload"):
+        file_id, pdf_path = await _save_pdf_upload(file)
+    try:
+        result = await app.state.orchestrator.run_file(
+            file_id=file_id,
+            pdf_path=pdf_path,
             original_filename=file.filename,
             slug=slug,
+            timer=timer,
+            include_timings=timings,
         )
         return result
-    except ValueError as ve:
-        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        http_error = _analysis_error(e)
+        if http_error is None:
+            raise
+        raise http_error from e
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    file: UploadFile = File(...),
+    slug: Optional[str] = Form(default=None),
+    timings: bool = False,
+) -> StreamingResponse:
+    # NDJSON: progress events, then each component block as it is built, then the full result
+    timer = StageTimer()
+    with timer.stage("upload"):
+        file_id, pdf_path = await _save_pdf_upload(file)
+    orchestrator = app.state.orchestrator
+    if orchestrator.pending >= orchestrator.max_pending:
+        raise _analysis_error(OrchestratorBusyError(orchestrator.pending, orchestrator.max_pending))
+
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(
+        orchestrator.run_file(
+            file_id=file_id,
+            pdf_path=pdf_path,
+            original_filename=file.filename,
+            slug=slug,
+            progress=lambda event: queue.put_nowait({"type": "progress", **event}),
+            timer=timer,
+            include_timings=timings,
+            on_component=lambda block: queue.put_nowait({"type": "component", "block": block}),
+        )
+    )
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+
+    async def stream():
+        try:
+            yield json.dumps({"type": "accepted", "file_id": file_id}) + "\n"
+            while (event := await queue.get()) is not None:
+                yield json.dumps(event, default=str) + "\n"
+            if task.exception() is None:
+                yield json.dumps({"type": "result", "result": task.result()}, default=str) + "\n"
+                return
+            e = task.exception()
+            http_error = _analysis_error(e)
+            if http_error is None:
+                logger.opt(exception=e).error("Streaming analysis failed for {}", file_id)
+                http_error = HTTPException(status_code=500, detail="Analysis failed")
+            yield json.dumps({"type": "error", "status": http_error.status_code, "detail": http_error.detail}) + "\n"
+        finally:
+            # The client went away: stop our part; a shared extraction keeps running for others
+            task.cancel()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@app.api_route("/reports/{sha256}", methods=["GET", "HEAD"])
+async def get_report(sha256: str, request: Request) -> Response:
+    # Clients hash the PDF locally and only upload it when this misses
+    sha256 = sha256.lower()
+    if not SHA256_HEX.match(sha256):
+        raise HTTPException(status_code=400, detail="Expected a hex sha256 of the PDF")
+    if_none_match = request.headers.get("if-none-match")
+    if request.method == "HEAD" or if_none_match:
+        # Revalidation and existence checks come from the stored header and never start a rebuild
+        meta = await asyncio.to_thread(app.state.orchestrator.report_store.meta, sha256)
+        if meta is not None:
+            headers = {"ETag": meta["etag"], "Cache-Control": "no-cache"}
+            if _etag_matches(if_none_match, meta["etag"]):
+                return Response(status_code=304, headers=headers)
+            if request.method == "HEAD":
+                return Response(media_type="application/json", headers={**headers, "Content-Length": str(meta["length"])})
+        elif request.method == "HEAD":
+            raise HTTPException(status_code=404, detail="No report for this document")
+    try:
+        report = await app.state.orchestrator.cached_report(sha256)
+    except Exception as e:
+        http_error = _analysis_error(e)
+        if http_error is None:
+            raise
+        raise http_error from e
+    if report is None:
+        raise HTTPException(status_code=404, detail="No report for this document")
+    body, etag = report
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...), slug: Optional[str] = Form(default=None)) -> dict[str, Any]:
+    file_id, pdf_path = await _save_pdf_upload(file)
+    try:
+        job = await app.state.jobs.submit(file_id, pdf_path, file.filename, slug)
+    except JobQueueFullError as qe:
+        raise HTTPException(
+            status_code=429,
+            detail=str(qe),
+            headers={"Retry-After": str(BUSY_RETRY_AFTER_SECONDS)},
+        )
+    return {
+        **job.to_dict(include_result=False),
+        "queue_position": app.state.jobs.queued,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str) -> dict[str, Any]:
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        async for event in app.state.jobs.events(job):
+            yield f"id: {event.get('seq', '')}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+        yield f"event: end\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/rescore")
+async def rescore(force: bool = False) -> dict[str, Any]:
+    return await asyncio.to_thread(app.state.rescorer.rescore, force)
+
+
+@app.get("/peers")
+def peers() -> dict[str, Any]:
+    return app.state.orchestrator.peer_index.summary()
+
+
+@app.get("/verdicts")
+def list_verdicts(label: Optional[str] = None, limit: int = 100, offset: int = 0) -> dict[str, Any]:
+    return {
+        "verdicts": app.state.rescorer.store.verdicts(label=label, limit=min(limit, 1000), offset=offset),
+        "last_rescore": app.state.rescorer.last_summary,
+    }
+
+
+@app.get("/verdicts/{file_id}")
+def get_verdict(file_id: str) -> dict[str, Any]:
+    verdict = app.state.rescorer.store.verdict(file_id)
+    if verdict is None:
+        raise HTTPException(status_code=404, detail="No scored extraction for this document")
+    return verdict
+
+
+@app.post("/analyze/batch", status_code=202)
+async def analyze_batch(
+    files: Optional[list[UploadFile]] = File(default=None),
+    directory: Optional[str] = Form(default=None),
+    output_format: str = Form(default="jsonl"),
+    batch_id: Optional[str] = Form(default=None),
+) -> dict[str, Any]:
+    if output_format not in ("jsonl", "parquet"):
+        raise HTTPException(status_code=400, detail="output_format must be jsonl or parquet")
+    # Reusing a batch id resumes it: documents already in its output file are skipped
+    if batch_id is not None and not BATCH_ID.match(batch_id):
+        raise HTTPException(status_code=400, detail="batch_id must be 1-64 letters, digits, '-' or '_'")
+    if batch_id in app.state.batches and not app.state.batches[batch_id]["task"].done():
+        raise HTTPException(status_code=409, detail="Batch is already running")
+    sources: list[pathlib.Path] = []
+    names: dict[str, str] = {}
+    for f in files or []:
+        _, pdf_path = await _save_pdf_upload(f)
+        sources.append(pdf_path)
+        names[str(pdf_path)] = f.filename
+    if directory:
+        root = pathlib.Path(BATCH_INPUT_ROOT).resolve()
+        target = (root / directory).resolve()
+        if root != target and root not in target.parents:
+            raise HTTPException(status_code=400, detail="Directory must be inside the batch input root")
+        if not target.is_dir():
+            raise HTTPException(status_code=400, detail="Directory not found")
+        sources.extend(collect_pdfs([str(target)]))
+    if not sources:
+        raise HTTPException(status_code=400, detail="No PDF files supplied")
+
+    batch_id = batch_id or uuid.uuid4().hex
+    runner = BatchRunner(
+        app.state.orchestrator,
+        output_path=batch_output_path(batch_id, output_format),
+        concurrency=BATCH_CONCURRENCY,
+        output_format=output_format,
+    )
+    task = asyncio.create_task(runner.run(sources, names))
+    batch = app.state.batches[batch_id] = {"runner": runner, "task": task}
+
+    def expire() -> None:
+        # A resumed run under the same id keeps its own entry
+        if app.state.batches.get(batch_id) is batch:
+            del app.state.batches[batch_id]
+
+    task.add_done_callback(lambda _: asyncio.get_running_loop().call_later(BATCH_RETENTION_SECONDS, expire))
+    return {"batch_id": batch_id, "documents": len(sources), "status_url": f"/analyze/batch/{batch_id}"}
+
+
+@app.get("/analyze/batch/{batch_id}")
+def get_batch(batch_id: str) -> dict[str, Any]:
+    batch = app.state.batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    task = batch["task"]
+    if not task.done():
+        return {"batch_id": batch_id, "status": "running", "progress": batch["runner"].progress}
+    if task.exception() is not None:
+        return {"batch_id": batch_id, "status": "failed", "error": str(task.exception())}
+    return {"batch_id": batch_id, "status": "done", "summary": task.result()}
 
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host=APP_HOST, port=APP_PORT, reload=APP_RELOAD)
+    parser = argparse.ArgumentParser(description="IPO Scorecard API server and tools")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="Run the API server (default)")
+    batch_parser = commands.add_parser("batch", help="Analyze many PDFs or directories of PDFs")
+    batch_parser.add_argument("inputs", nargs="+", help="PDF files and/or directories")
+    batch_parser.add_argument("--out", default="batch_results.jsonl", help="Output file; reruns resume from it")
+    batch_parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    batch_parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    rescore_parser = commands.add_parser("rescore", help="Recompute metrics and verdicts for cached extractions")
+    rescore_parser.add_argument("--force", action="store_true", help="Recompute everything regardless of versions")
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        orchestrator = build_orchestrator()
+        try:
+            summary = run_batch_cli(
+                orchestrator,
+                args.inputs,
+                args.out,
+                concurrency=args.concurrency,
+                output_format=args.format,
+            )
+        finally:
+            orchestrator.cache.close()
+            orchestrator.peer_index.close()
+            shutdown_pdf_pool()
+        print(format_summary(summary))
+    elif args.command == "rescore":
+        # Reads cached extractions only; no Gemini client or MCP session is created
+        cache = ExtractionCache()
+        cache.import_legacy()
+        store = DerivedStore(DERIVED_DB_PATH)
+        peer_index = PeerIndex()
+        try:
+            rescorer = Rescorer(cache, store, DecisionEngine(), peers=peer_index)
+            print(format_rescore_summary(rescorer.rescore(force=args.force)))
+        finally:
+            peer_index.close()
+            store.close()
+            cache.close()
+    else:
+        import uvicorn
+
+        uvicorn.run("app:app", host=APP_HOST, port=APP_PORT, reload=APP_RELOAD)
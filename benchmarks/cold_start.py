@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import pathlib
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+import httpx
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# Modules that must load on first use (or during background warm-up), never on `import app`
+DEFERRED_MODULES = ("fitz", "openai", "agents", "numpy", "pyarrow", "uvicorn")
+
+DEFAULT_IMPORT_BUDGET_S = 1.0
+DEFAULT_LIVE_BUDGET_S = 3.0
+DEFAULT_READY_BUDGET_S = 15.0
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+
+def measure_import(module: str = "app", repeat: int = 5) -> dict[str, Any]:
+    # Each sample is a fresh interpreter, so nothing is served from sys.modules
+    samples: list[float] = []
+    loaded: list[str] = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        probe = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(probe["seconds"])
+        loaded = probe["loaded"]
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "repeat": repeat, "deferred_loaded": loaded}
+
+
+def import_profile(module: str = "app", top: int = 10) -> list[tuple[str, float]]:
+    # Direct children of the module by cumulative import time, from `python -X importtime`
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        m = _IMPORTTIME_LINE.match(line)
+        if m and len(m.group(3)) == 3:
+            rows.append((m.group(4), int(m.group(2)) / 1e6))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _poll(url: str, proc: subprocess.Popen, started: float, timeout_s: float) -> Optional[float]:
+    while time.perf_counter() - started < timeout_s:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode} before answering {url}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_server(timeout_s: float = 60.0, extra_env: Optional[dict[str, str]] = None) -> dict[str, Any]:
+    # Time from process spawn until liveness (/health) and readiness (/ready) answer 200
+    port = _free_port()
+    env = {**os.environ, "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "cold-start"), **(extra_env or {})}
+    with tempfile.TemporaryDirectory(prefix="ipo-cold-") as tmp:
+        cmd = [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", str(REPO_ROOT), "--port", str(port), "--log-level", "warning"]
+        started = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base = f"http://127.0.0.1:{port}"
+            live = _poll(f"{base}/health", proc, started, timeout_s)
+            ready = _poll(f"{base}/ready", proc, started, timeout_s)
+            warm_up = httpx.get(f"{base}/ready", timeout=1.0).json().get("warm_up_ms") if ready is not None else None
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return {"live_s": live, "ready_s": ready, "warm_up_ms": warm_up}
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    return "timeout" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def check_budgets(result: dict[str, Any], args: argparse.Namespace) -> list[str]:
+    failures = []
+    imported = result["import"]
+    if imported["median_s"] > args.import_budget:
+        failures.append(f"import app took {imported['median_s']:.3f}s (budget {args.import_budget}s)")
+    if imported["deferred_loaded"]:
+        failures.append(f"import app loaded deferred modules: {', '.join(imported['deferred_loaded'])}")
+    server = result.get("server")
+    if server is not None:
+        if server["live_s"] is None or server["live_s"] > args.live_budget:
+            failures.append(f"/health answered after {_fmt(server['live_s'])} (budget {args.live_budget}s)")
+        if server["ready_s"] is None or server["ready_s"] > args.ready_budget:
+            failures.append(f"/ready answered after {_fmt(server['ready_s'])} (budget {args.ready_budget}s)")
+    return failures
+
+
+def format_report(result: dict[str, Any], failures: list[str]) -> str:
+    imported = result["import"]
+    lines = [f"import app     median {imported['median_s'] * 1000:.0f}ms  min {imported['min_s'] * 1000:.0f}ms  (n={imported['repeat']})"]
+    lines.append("  slowest imports: " + ", ".join(f"{name} {s * 1000:.0f}ms" for name, s in result["profile"]))
+    server = result.get("server")
+    if server is not None:
+        lines.append(f"server         live {_fmt(server['live_s'])}  ready {_fmt(server['ready_s'])}  warm-up {server['warm_up_ms']}")
+    lines.extend(f"FAIL {f}" for f in failures)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API cold start and fail past a budget")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=DEFAULT_IMPORT_BUDGET_S, help="Seconds for `import app`")
+    parser.add_argument("--live-budget", type=float, default=DEFAULT_LIVE_BUDGET_S, help="Seconds from spawn to /health")
+    parser.add_argument("--ready-budget", type=float, default=DEFAULT_READY_BUDGET_S, help="Seconds from spawn to /ready")
+    parser.add_argument("--no-server", action="store_true", help="Only measure the import")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result: dict[str, Any] = {"import": measure_import(repeat=args.repeat), "profile": import_profile()}
+    if not args.no_server:
+        result["server"] = measure_server()
+    failures = check_budgets(result, args)
+    print(json.dumps({**result, "failures": failures}, indent=2) if args.json else format_report(result, failures))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,351 @@
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+import httpx
+
+from benchmarks.synthetic_drhp import generate_drhp
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def percentile(samples: list[float], pct: float) -> Optional[float]:
+    # Nearest-rank, so p99 of a small run is an observed latency rather than an interpolation
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(samples: list[float]) -> dict[str, Any]:
+    return {
+        "count": len(samples),
+        "p50_s": percentile(samples, 50),
+        "p95_s": percentile(samples, 95),
+        "p99_s": percentile(samples, 99),
+        "max_s": max(samples) if samples else None,
+    }
+
+
+def _process_tree(root: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in pathlib.Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after the closing paren
+        ppid = int(stat[stat.rfind(")") + 2 :].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class RSSSampler:
+    def __init__(self, pid: int, interval_s: float = 0.25) -> None:
+        # Sums the server and its children (uvicorn plus the PDF process pool)
+        self.pid = pid
+        self.interval_s = interval_s
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, sum(_rss_bytes(p) for p in _process_tree(self.pid)))
+            self._stop.wait(self.interval_s)
+
+    def start(self) -> None:
+        if pathlib.Path("/proc/self/statm").exists():
+            self._thread.start()
+
+    def stop(self) -> Optional[int]:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+            return self.peak_bytes
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: Optional[subprocess.Popen], timeout_s: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout_s}s")
+
+
+def start_mock(args: argparse.Namespace, workdir: pathlib.Path) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "benchmarks.mock_llm",
+        "--port", str(port),
+        "--latency", args.latency,
+        "--latency-mean", str(args.latency_mean),
+        "--latency-spread", str(args.latency_spread),
+        "--error-rate", str(args.error_rate),
+    ]
+    if args.rpm:
+        cmd += ["--rpm", str(args.rpm)]
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, stdout=open(workdir / "mock.log", "w"), stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    _wait_ready(f"{base}/stats", proc)
+    return proc, base
+
+
+def start_server(llm_base_url: str, workdir: pathlib.Path, extra_env: dict[str, str]) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "load-test"),
+        "GEMINI_BASE_URL": f"{llm_base_url}/v1/",
+        **extra_env,
+    }
+    # Run from a scratch directory so uploads/ and memory/ start empty
+    cmd = [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", str(REPO_ROOT), "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=open(workdir / "server.log", "w"), stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    # /ready, not /health: background warm-up would otherwise land in the first requests' latency
+    _wait_ready(f"{base}/ready", proc)
+    return proc, base
+
+
+def build_corpus(workdir: pathlib.Path, documents: int, pages: int) -> list[pathlib.Path]:
+    paths = []
+    for i in range(documents):
+        path = workdir / "corpus" / f"drhp_{i:04d}.pdf"
+        generate_drhp(path, pages=pages, seed=i, company=f"Load Test {i:04d} Limited")
+        paths.append(path)
+    return paths
+
+
+def build_schedule(corpus: list[pathlib.Path], requests: int, hit_ratio: float, seed: int = 0) -> list[tuple[pathlib.Path, str]]:
+    # Each request is a repeat of an already-scheduled document (cache hit) or the next unseen one (miss)
+    rng = random.Random(seed)
+    schedule: list[tuple[pathlib.Path, str]] = []
+    seen: list[pathlib.Path] = []
+    unseen = list(corpus)
+    for _ in range(requests):
+        if seen and (not unseen or rng.random() < hit_ratio):
+            schedule.append((rng.choice(seen), "hit"))
+        else:
+            path = unseen.pop(0)
+            seen.append(path)
+            schedule.append((path, "miss"))
+    return schedule
+
+
+async def drive(base_url: str, schedule: list[tuple[pathlib.Path, str]], concurrency: int, timeout_s: float) -> list[dict[str, Any]]:
+    queue: asyncio.Queue[tuple[int, pathlib.Path, str]] = asyncio.Queue()
+    for i, (path, kind) in enumerate(schedule):
+        queue.put_nowait((i, path, kind))
+    results: list[dict[str, Any]] = []
+    payloads = {p: p.read_bytes() for p, _ in schedule}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s) as client:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    i, path, kind = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                record: dict[str, Any] = {"request": i, "document": path.name, "planned": kind}
+                try:
+                    resp = await client.post(
+                        "/analyze",
+                        params={"timings": "true"},
+                        files={"file": (path.name, payloads[path], "application/pdf")},
+                    )
+                    record["status"] = resp.status_code
+                    if resp.status_code == 200:
+                        timings = resp.json().get("timings_ms") or {}
+                        # No extract stage means the extraction came from the cache
+                        record["observed"] = "miss" if "extract" in timings else "hit"
+                        record["timings_ms"] = timings
+                except httpx.HTTPError as e:
+                    record["status"] = None
+                    record["error"] = type(e).__name__
+                record["latency_s"] = time.perf_counter() - started
+                results.append(record)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return sorted(results, key=lambda r: r["request"])
+
+
+def summarize(results: list[dict[str, Any]], elapsed_s: float, peak_rss: Optional[int]) -> dict[str, Any]:
+    ok = [r for r in results if r.get("status") == 200]
+    statuses: dict[str, int] = {}
+    for r in results:
+        key = str(r.get("status") or r.get("error"))
+        statuses[key] = statuses.get(key, 0) + 1
+    stages: dict[str, list[float]] = {}
+    for r in ok:
+        for stage, ms in (r.get("timings_ms") or {}).items():
+            stages.setdefault(stage, []).append(ms / 1000)
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_rps": round(len(ok) / elapsed_s, 3) if elapsed_s > 0 else None,
+        "latency": latency_summary([r["latency_s"] for r in ok]),
+        "latency_hit": latency_summary([r["latency_s"] for r in ok if r.get("observed") == "hit"]),
+        "latency_miss": latency_summary([r["latency_s"] for r in ok if r.get("observed") == "miss"]),
+        "stage_p95_s": {stage: percentile(samples, 95) for stage, samples in stages.items()},
+        "peak_rss_mb": round(peak_rss / 2**20, 1) if peak_rss else None,
+    }
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def format_report(summary: dict[str, Any]) -> str:
+    lines = [
+        f"{summary['succeeded']}/{summary['requests']} ok in {summary['elapsed_s']}s "
+        f"({summary['throughput_rps']} req/s), statuses {summary['statuses']}",
+    ]
+    for name in ("latency", "latency_hit", "latency_miss"):
+        s = summary[name]
+        lines.append(
+            f"{name:13s} n={s['count']:<5d} p50 {_fmt(s['p50_s']):>8s}  p95 {_fmt(s['p95_s']):>8s}  "
+            f"p99 {_fmt(s['p99_s']):>8s}  max {_fmt(s['max_s']):>8s}"
+        )
+    lines.append("stage p95     " + ", ".join(f"{k} {_fmt(v)}" for k, v in summary["stage_p95_s"].items()))
+    lines.append(f"peak RSS      {summary['peak_rss_mb']} MB" if summary["peak_rss_mb"] else "peak RSS      unavailable")
+    return "\n".join(lines)
+
+
+def run_load_test(args: argparse.Namespace) -> dict[str, Any]:
+    procs: list[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory(prefix="ipo-load-") as tmp:
+        workdir = pathlib.Path(tmp)
+        try:
+            if args.url:
+                base_url, server_pid, mock_url = args.url.rstrip("/"), args.server_pid, None
+            else:
+                mock_url = args.mock_url
+                if mock_url is None:
+                    mock, mock_url = start_mock(args, workdir)
+                    procs.append(mock)
+                server_env = {
+                    k: str(v)
+                    for k, v in (
+                        ("LLM_CONCURRENCY", args.llm_concurrency),
+                        ("MAX_PENDING_ANALYSES", args.max_pending),
+                        ("LLM_RPM", args.llm_rpm),
+                        ("LLM_TPM", args.llm_tpm),
+                    )
+                    if v
+                }
+                if args.no_table_fast_path:
+                    # Synthetic DRHPs parse cleanly, so without this every miss would skip the LLM
+                    server_env["TABLE_FAST_PATH"] = "0"
+                server, base_url = start_server(mock_url, workdir, server_env)
+                procs.append(server)
+                server_pid = server.pid
+
+            documents = args.documents or max(1, round(args.requests * (1 - args.hit_ratio)))
+            corpus = build_corpus(workdir, documents, args.pages)
+            schedule = build_schedule(corpus, args.requests, args.hit_ratio, args.seed)
+
+            sampler = RSSSampler(server_pid) if server_pid else None
+            if sampler:
+                sampler.start()
+            started = time.perf_counter()
+            results = asyncio.run(drive(base_url, schedule, args.concurrency, args.timeout))
+            elapsed = time.perf_counter() - started
+            peak_rss = sampler.stop() if sampler else None
+
+            summary = summarize(results, elapsed, peak_rss)
+            summary["config"] = {
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "documents": documents,
+                "pages": args.pages,
+                "hit_ratio": args.hit_ratio,
+            }
+            if mock_url:
+                try:
+                    summary["mock_llm"] = httpx.get(f"{mock_url}/stats", timeout=2.0).json()
+                except httpx.HTTPError:
+                    pass
+            if args.save:
+                pathlib.Path(args.save).write_text(json.dumps({"summary": summary, "requests": results}, indent=2))
+            return summary
+        finally:
+            for proc in reversed(procs):
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive /analyze at a target concurrency against a mock LLM")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="Fraction of requests that repeat an earlier document")
+    parser.add_argument("--documents", type=int, help="Distinct documents to generate (default: enough for the miss share)")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="With --url: PID whose process tree is sampled for RSS")
+    parser.add_argument("--mock-url", help="Use an already running mock LLM instead of starting one")
+    parser.add_argument("--llm-concurrency", type=int, help="LLM_CONCURRENCY for the spawned server")
+    parser.add_argument("--max-pending", type=int, help="MAX_PENDING_ANALYSES for the spawned server")
+    parser.add_argument("--llm-rpm", type=float, help="Client-side LLM_RPM quota for the spawned server")
+    parser.add_argument("--llm-tpm", type=float, help="Client-side LLM_TPM quota for the spawned server")
+    parser.add_argument("--no-table-fast-path", action="store_true", help="Always call the LLM on cache misses")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=2.0)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, help="Mock LLM requests-per-minute limit")
+    parser.add_argument("--save", help="Write the summary and per-request records to this JSON file")
+    args = parser.parse_args()
+
+    if not 0 <= args.hit_ratio < 1:
+        parser.error("--hit-ratio must be in [0, 1)")
+    print(format_report(run_load_test(args)))
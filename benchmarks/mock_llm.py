@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic_drhp import synthetic_financials
+
+INDUSTRIES = ("Manufacturing", "Financial Services", "Consumer", "Healthcare", "Technology", "Infrastructure")
+
+
+class LatencyModel:
+    def __init__(self, kind: str = "lognormal", mean_s: float = 2.0, spread: float = 0.5, per_1k_tokens_s: float = 0.0) -> None:
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.mean_s = mean_s
+        self.spread = spread
+        self.per_1k_tokens_s = per_1k_tokens_s
+
+    def sample(self, rng: random.Random, prompt_tokens: int) -> float:
+        if self.kind == "fixed":
+            base = self.mean_s
+        elif self.kind == "uniform":
+            base = rng.uniform(self.mean_s * (1 - self.spread), self.mean_s * (1 + self.spread))
+        else:
+            # lognormal with the requested mean; spread is sigma of the underlying normal
+            mu = math.log(max(self.mean_s, 1e-6)) - self.spread * self.spread / 2
+            base = rng.lognormvariate(mu, self.spread)
+        return max(0.0, base) + self.per_1k_tokens_s * prompt_tokens / 1000
+
+
+class RateLimiter:
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+        # Token buckets refilled continuously; None disables a limit
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int) -> Optional[float]:
+        # Returns None when admitted, otherwise the seconds until a retry could succeed
+        self._refill()
+        waits = []
+        if self.rpm and self._requests < 1:
+            waits.append((1 - self._requests) * 60 / self.rpm)
+        if self.tpm and self._tokens < tokens:
+            waits.append((min(tokens, self.tpm) - self._tokens) * 60 / self.tpm)
+        if waits:
+            return max(waits)
+        if self.rpm:
+            self._requests -= 1
+        if self.tpm:
+            self._tokens -= tokens
+        return None
+
+
+def canned_extraction(document: str) -> dict[str, Any]:
+    # Deterministic per document so repeated texts get the same answer
+    seed = int.from_bytes(hashlib.sha256(document.encode("utf-8", "ignore")).digest()[:8], "big")
+    rng = random.Random(seed)
+    years = rng.randint(3, 5)
+    return {
+        "extracted": {
+            "meta": {"company": f"Mock Industries {seed % 10000:04d} Limited", "industry": rng.choice(INDUSTRIES)},
+            "terms": {
+                "price_band": [rng.randint(90, 110), rng.randint(111, 130)],
+                "lot_size": rng.randint(50, 200),
+                "open_date": "2025-08-12",
+                "close_date": "2025-08-14",
+            },
+            "financials": synthetic_financials(rng, years=years, first_year=2025 - years),
+        }
+    }
+
+
+def _error(status: int, message: str, kind: str, headers: Optional[dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": kind, "code": status}}, status_code=status, headers=headers)
+
+
+def create_app(
+    latency: LatencyModel,
+    error_rate: float = 0.0,
+    malformed_rate: float = 0.0,
+    rate_limiter: Optional[RateLimiter] = None,
+    seed: int = 0,
+) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI-compatible LLM")
+    rng = random.Random(seed)
+    limiter = rate_limiter or RateLimiter()
+    stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "malformed": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    @app.get("/stats")
+    def get_stats() -> dict[str, Any]:
+        return stats
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request) -> JSONResponse:
+        body = await request.json()
+        stats["requests"] += 1
+        messages = body.get("messages") or []
+        document = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+
+        retry_after = limiter.acquire(prompt_tokens)
+        if retry_after is not None:
+            stats["rate_limited"] += 1
+            return _error(429, "Rate limit exceeded", "rate_limit_exceeded", {"Retry-After": f"{retry_after:.2f}"})
+
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(latency.sample(rng, prompt_tokens))
+        finally:
+            stats["in_flight"] -= 1
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return _error(500, "Injected upstream failure", "server_error")
+
+        if rng.random() < malformed_rate:
+            stats["malformed"] += 1
+            content = '{"extracted": {"meta": '
+        else:
+            content = json.dumps(canned_extraction(document))
+        stats["ok"] += 1
+        completion_tokens = len(content) // 4
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=2.0, help="Mean response time in seconds")
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.0, help="Extra seconds per 1k prompt tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of responses with truncated JSON")
+    parser.add_argument("--rpm", type=float, help="Requests per minute before HTTP 429")
+    parser.add_argument("--tpm", type=float, help="Prompt tokens per minute before HTTP 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(
+        LatencyModel(args.latency, args.latency_mean, args.latency_spread, args.latency_per_1k_tokens),
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        rate_limiter=RateLimiter(args.rpm, args.tpm),
+        seed=args.seed,
+    )
+    print(f"Mock LLM on http://{args.host}:{args.port}/v1/ (set GEMINI_BASE_URL to this)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import re
+import sys
+import tempfile
+from typing import Any, Optional
+
+from benchmarks.synthetic_drhp import generate_drhp
+from utils.pdf import read_pdf_pages
+from utils.table_extract import extract_offer_terms
+from utils.text_normalize import compact_numbers, normalize_pages
+
+# Prospectus-like pages (form feed between pages) with the figures and unit/header lines that must survive
+FIXTURES = pathlib.Path(__file__).parent / "fixtures" / "normalize"
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_BARE_NUMBER = re.compile(r"^(?:page\s*)?\d{1,4}(?:\s*of\s*\d{1,4})?$", re.IGNORECASE)
+
+
+def _numbers(text: str) -> set[str]:
+    return {m.group(0) for line in text.splitlines() for m in _NUMBER.finditer(compact_numbers(line))}
+
+
+def _content_numbers(pages: list[str]) -> set[str]:
+    # Numbers outside bare first/last lines, which may be page numbers and are allowed to go
+    found: set[str] = set()
+    for text in pages:
+        lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+        for n, line in enumerate(lines):
+            if n in (0, len(lines) - 1) and _BARE_NUMBER.match(line):
+                continue
+            found |= _numbers(line)
+    return found
+
+
+def _expected_values(expected: dict[str, Any]) -> set[str]:
+    extracted = expected["extracted"]
+    terms = extracted["terms"]
+    values = {str(v) for v in terms["price_band"]} | {str(terms["lot_size"])}
+    for row in extracted["financials"]:
+        for key, value in row.items():
+            if key.endswith("_cr") and value is not None:
+                # The synthetic tables quote Rs. lakhs
+                values.add(compact_numbers(f"{abs(value) * 100:.2f}"))
+    return values
+
+
+def load_fixtures() -> list[tuple[str, list[str], dict[str, Any]]]:
+    specs = json.loads((FIXTURES / "expected.json").read_text())
+    return [(name, (FIXTURES / f"{name}.txt").read_text().split("\f"), spec) for name, spec in specs.items()]
+
+
+def check_document(
+    pages: list[str], expected: Optional[dict[str, Any]] = None, fixture: Optional[dict[str, Any]] = None
+) -> dict[str, Any]:
+    normalized, stats = normalize_pages(list(enumerate(pages)))
+    texts = [t for _, t in normalized]
+    joined = "\n".join(texts)
+    numbers = _numbers(joined)
+    failures: list[str] = []
+
+    lost = sorted(_content_numbers(pages) - numbers)
+    if lost:
+        failures.append(f"numbers lost: {lost[:10]}{' ...' if len(lost) > 10 else ''}")
+
+    raw_terms = extract_offer_terms("\n".join(pages[:3]))
+    normalized_terms = extract_offer_terms("\n".join(texts[:3]))
+    if raw_terms != normalized_terms:
+        failures.append(f"cover terms changed: {raw_terms} -> {normalized_terms}")
+
+    if expected is not None:
+        company = expected["extracted"]["meta"]["company"]
+        if company.lower() not in joined.lower():
+            failures.append(f"company name missing: {company}")
+        missing = sorted(_expected_values(expected) - numbers)
+        if missing:
+            failures.append(f"expected values missing: {missing}")
+
+    if fixture is not None:
+        missing = [f for f in fixture["figures"] if f not in joined]
+        if missing:
+            failures.append(f"fixture figures missing: {missing}")
+        for line in fixture["repeated"]:
+            before, after = sum(p.count(line) for p in pages), joined.count(line)
+            if after != before:
+                failures.append(f"repeated line kept {after} of {before} times: {line}")
+
+    return {**stats, "pages": len(pages), "failures": failures}
+
+
+async def compare_llm(pages: list[str]) -> list[str]:
+    # Optional end-to-end check against the configured model (GEMINI_API_KEY/GEMINI_BASE_URL)
+    from clients.gemini_client import GeminiClient
+    from schemas.extract_schema import EXTRACT_SCHEMA
+    from utils.extract_merge import normalize_fy_label
+
+    client = GeminiClient()
+    normalized, _ = normalize_pages(list(enumerate(pages)))
+    raw, compact = await asyncio.gather(
+        client.extract_structured("\n\n".join(pages), EXTRACT_SCHEMA),
+        client.extract_structured("\n\n".join(t for _, t in normalized), EXTRACT_SCHEMA),
+    )
+
+    def comparable(structured: dict[str, Any]) -> dict[str, Any]:
+        extracted = structured.get("extracted") or {}
+        rows = {
+            normalize_fy_label(r.get("fy")): {k: round(v, 2) for k, v in r.items() if k.endswith("_cr") and v is not None}
+            for r in extracted.get("financials") or []
+        }
+        return {"terms": extracted.get("terms") or {}, "financials": rows}
+
+    a, b = comparable(raw), comparable(compact)
+    return [] if a == b else [f"LLM output differs: raw={json.dumps(a)} normalized={json.dumps(b)}"]
+
+
+def run_checks(seeds: list[int], pages: int, pdfs: list[str], llm: bool) -> list[tuple[str, dict[str, Any]]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="ipo-normalize-") as tmp:
+        fixtures: list[tuple[str, pathlib.Path, Optional[dict[str, Any]]]] = []
+        for seed in seeds:
+            path = pathlib.Path(tmp) / f"drhp_{seed}.pdf"
+            fixtures.append((f"synthetic seed={seed}", path, generate_drhp(path, pages=pages, seed=seed)))
+        fixtures += [(pathlib.Path(p).name, pathlib.Path(p), None) for p in pdfs]
+        documents = [(name, read_pdf_pages(path), expected, None) for name, path, expected in fixtures]
+        documents += [(f"fixture {name}", texts, None, spec) for name, texts, spec in load_fixtures()]
+        for name, texts, expected, spec in documents:
+            result = check_document(texts, expected, spec)
+            if llm:
+                result["failures"] += asyncio.run(compare_llm(texts))
+            results.append((name, result))
+    return results
+
+
+def format_report(results: list[tuple[str, dict[str, Any]]]) -> str:
+    lines = [f"{'document':<28} {'pages':>6} {'tokens':>9} {'after':>9} {'saved':>7}  result"]
+    for name, r in results:
+        status = "ok" if not r["failures"] else "FAIL"
+        lines.append(
+            f"{name[:28]:<28} {r['pages']:>6} {r['tokens_before']:>9} {r['tokens_after']:>9} {r['reduction']:>7.1%}  {status}"
+        )
+        lines.extend(f"    {f}" for f in r["failures"])
+    # Synthetic filler repeats far more than real filings, so the fixtures get a total of their own
+    groups = [("total", results), ("total (fixtures)", [(n, r) for n, r in results if n.startswith("fixture ")])]
+    for label, group in groups:
+        before = sum(r["tokens_before"] for _, r in group)
+        after = sum(r["tokens_after"] for _, r in group)
+        if before:
+            lines.append(f"{label:<28} {'':>6} {before:>9} {after:>9} {(before - after) / before:>7.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that text normalization keeps every extractable value")
+    parser.add_argument("pdfs", nargs="*", help="Real prospectus PDFs to include")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2, 3, 4])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--llm", action="store_true", help="Also compare model output on raw and normalized text")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = run_checks(args.seeds, args.pages, args.pdfs, args.llm)
+    print(json.dumps(dict(results), indent=2) if args.json else format_report(results))
+    sys.exit(1 if any(r["failures"] for _, r in results) else 0)
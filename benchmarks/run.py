@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import pathlib
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from benchmarks.synthetic_drhp import generate_drhp, synthetic_financials
+
+DEFAULT_PAGE_COUNTS = (50, 200, 1000)
+DEFAULT_THRESHOLD = 0.20
+
+
+class StubGemini:
+    def __init__(self, response: dict[str, Any], latency_s: float = 0.0) -> None:
+        self.model = "stub-model"
+        self.default_system_prompt = "stub prompt"
+        self.response = response
+        self.latency_s = latency_s
+        self.calls = 0
+
+    async def extract_structured(self, text: str, schema: dict[str, Any], system_prompt: Optional[str] = None, usage: Optional[dict[str, int]] = None) -> dict[str, Any]:
+        self.calls += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        if usage is not None:
+            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + len(text) // 4
+        return self.response
+
+
+def _time(fn: Callable[[], Any], repeat: int, number: int = 1) -> dict[str, Any]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def bench_read_pdf(workdir: pathlib.Path, page_counts: tuple[int, ...], repeat: int) -> dict[str, Any]:
+    from utils.pdf import read_pdf_text
+
+    results = {}
+    for pages in page_counts:
+        path = workdir / f"drhp_{pages}.pdf"
+        if not path.exists():
+            generate_drhp(path, pages=pages)
+        results[f"read_pdf_text[{pages}p]"] = _time(lambda: read_pdf_text(path), repeat)
+    return results
+
+
+def _financials_corpus(size: int) -> list[list[dict[str, Any]]]:
+    rng = random.Random(42)
+    return [synthetic_financials(rng, years=rng.randint(2, 6), first_year=2018) for _ in range(size)]
+
+
+def bench_metrics(repeat: int, corpus_size: int = 2000) -> dict[str, Any]:
+    from utils.metrics import compute_metrics
+    from utils.metrics_batch import compute_metrics_batch
+
+    corpus = _financials_corpus(corpus_size)
+    scalar = [compute_metrics(f) for f in corpus]
+    if compute_metrics_batch(corpus) != scalar:
+        raise AssertionError("compute_metrics_batch diverged from compute_metrics")
+    return {
+        f"compute_metrics[x{corpus_size}]": _time(lambda: [compute_metrics(f) for f in corpus], repeat),
+        f"compute_metrics_batch[x{corpus_size}]": _time(lambda: compute_metrics_batch(corpus), repeat),
+    }
+
+
+def bench_decision(repeat: int, corpus_size: int = 2000) -> dict[str, Any]:
+    from utils.decision_batch import decide_batch
+    from utils.decision_engine import DecisionEngine
+    from utils.metrics import compute_metrics
+
+    engine = DecisionEngine()
+    metrics = [compute_metrics(f) for f in _financials_corpus(corpus_size)]
+    scalar = [engine.decide(m) for m in metrics]
+    if decide_batch(metrics, engine, reasons=True) != scalar:
+        raise AssertionError("decide_batch diverged from DecisionEngine.decide")
+    return {
+        f"DecisionEngine.decide[x{corpus_size}]": _time(lambda: [engine.decide(m) for m in metrics], repeat),
+        f"decide_batch[x{corpus_size}]": _time(lambda: decide_batch(metrics, engine), repeat),
+        f"decide_batch+reasons[x{corpus_size}]": _time(lambda: decide_batch(metrics, engine, reasons=True), repeat),
+    }
+
+
+def bench_cache(workdir: pathlib.Path, repeat: int, entries: int = 200) -> dict[str, Any]:
+    from services.extraction_cache import ExtractionCache
+
+    root = workdir / "cache"
+    root.mkdir(exist_ok=True)
+    payload = {"extracted": {"meta": {}, "terms": {}, "financials": synthetic_financials(random.Random(1), years=6)}}
+    cache = ExtractionCache(root=str(root), index_path=str(root / "index.db"), memory_entries=entries)
+    keys = [cache.make_key(f"doc{i}", "m", "p", "s") for i in range(entries)]
+
+    def write() -> None:
+        for i, k in enumerate(keys):
+            cache.put(k, payload, f"doc{i}", "m", "p", "s")
+
+    def read_disk() -> None:
+        cache._memory.clear()
+        for k in keys:
+            cache.get(k)
+
+    def read_memory() -> None:
+        for k in keys:
+            cache.get_memory(k)
+
+    results = {
+        f"cache.put[x{entries}]": _time(write, repeat),
+        f"cache.get_disk[x{entries}]": _time(read_disk, repeat),
+    }
+    write()
+    results[f"cache.get_memory[x{entries}]"] = _time(read_memory, repeat)
+    cache.close()
+    return results
+
+
+def bench_peers(workdir: pathlib.Path, repeat: int, filings: int = 50_000) -> dict[str, Any]:
+    from services.peer_index import PeerIndex
+    from utils.metrics import compute_metrics
+
+    rng = random.Random(7)
+    industries = ["Manufacturing", "Financial Services", "Retail", "IT Services", "Healthcare", "Chemicals"]
+    metrics = [compute_metrics(f) for f in _financials_corpus(500)]
+    path = workdir / "peers.db"
+    index = PeerIndex(str(path))
+    index.add_many([(f"doc{i}", rng.choice(industries), metrics[i % len(metrics)]) for i in range(filings)])
+    index.close()
+    probes = itertools.cycle([(metrics[rng.randrange(len(metrics))], rng.choice(industries)) for _ in range(1000)])
+
+    def load() -> None:
+        loaded = PeerIndex(str(path))
+        loaded.load()
+        loaded.close()
+
+    results: dict[str, Any] = {f"PeerIndex.load[{filings}]": _time(load, repeat)}
+    index = PeerIndex(str(path))
+    # Per lookup: all peer metrics, ranked overall and within the industry
+    results[f"PeerIndex.percentiles[{filings}]"] = _time(lambda: index.percentiles(*next(probes)), repeat, number=10_000)
+    index.close()
+    return results
+
+
+def bench_orchestrator(workdir: pathlib.Path, repeat: int, pages: int = 200) -> dict[str, Any]:
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+    from services.orchestrator import AnalyzeOrchestrator
+    from utils.pdf import shutdown_pdf_pool
+
+    run_dir = workdir / "orchestrator"
+    run_dir.mkdir(exist_ok=True)
+    pdf = workdir / f"drhp_{pages}.pdf"
+    if not pdf.exists():
+        generate_drhp(pdf, pages=pages)
+    pdf_bytes = pdf.read_bytes()
+    file_id = hashlib.sha256(pdf_bytes).hexdigest()
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        expected = generate_drhp(run_dir / "expected.pdf", pages=1)
+        # The synthetic summary table is clean enough to skip the LLM, so the full pipeline is measured
+        # with the table fast path off and the table path as a case of its own
+        llm = AnalyzeOrchestrator(libsql_url="file:./memory/bench.db", table_fast_path=False)
+        llm.gemini = StubGemini(expected)
+        tables = AnalyzeOrchestrator(libsql_url="file:./memory/bench.db")
+        tables.gemini = StubGemini(expected)
+
+        def run_cold(orchestrator: AnalyzeOrchestrator) -> None:
+            # A real miss: new prompt hash, and no stored pages, parsed tables or page index
+            orchestrator.prompt_hash = f"bench-{time.perf_counter_ns()}"
+            for path in orchestrator.page_store.root.glob(f"{file_id}.*"):
+                path.unlink()
+            (pathlib.Path("memory/page_index") / f"{file_id}.json").unlink(missing_ok=True)
+            asyncio.run(orchestrator.run(pdf_bytes, "bench.pdf"))
+
+        def run_warm() -> None:
+            asyncio.run(llm.run(pdf_bytes, "bench.pdf"))
+
+        results = {
+            f"orchestrator.run_miss[{pages}p]": _time(lambda: run_cold(llm), repeat),
+            f"orchestrator.run_miss_tables[{pages}p]": _time(lambda: run_cold(tables), repeat),
+            f"orchestrator.run_hit[{pages}p]": _time(run_warm, repeat),
+        }
+        if llm.gemini.calls != repeat + 1 or tables.gemini.calls:
+            raise RuntimeError(f"Unexpected LLM calls: full pipeline {llm.gemini.calls}, table path {tables.gemini.calls}")
+        llm.cache.close()
+        tables.cache.close()
+        return results
+    finally:
+        os.chdir(cwd)
+        shutdown_pdf_pool()
+
+
+def run_suite(page_counts: tuple[int, ...], repeat: int, only: Optional[list[str]] = None) -> dict[str, Any]:
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="ipo-bench-") as tmp:
+        workdir = pathlib.Path(tmp)
+        suites: dict[str, Callable[[], dict[str, Any]]] = {
+            "pdf": lambda: bench_read_pdf(workdir, page_counts, repeat),
+            "metrics": lambda: bench_metrics(repeat),
+            "decision": lambda: bench_decision(repeat),
+            "cache": lambda: bench_cache(workdir, repeat),
+            "peers": lambda: bench_peers(workdir, repeat),
+            "orchestrator": lambda: bench_orchestrator(workdir, repeat),
+        }
+        for name, suite in suites.items():
+            if only and name not in only:
+                continue
+            for case, stats in suite().items():
+                results[case] = stats
+                print(f"{case:45s} median {stats['median_s'] * 1000:10.3f} ms   min {stats['min_s'] * 1000:10.3f} ms")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+    for case, stats in current["results"].items():
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            continue
+        ratio = stats["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "ok")
+        print(f"{case:45s} {ratio:6.2f}x baseline  {flag}")
+        if flag == "REGRESSION":
+            regressions.append(case)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IPO Scorecard microbenchmarks")
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGE_COUNTS), help="PDF sizes for read_pdf_text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=["pdf", "metrics", "decision", "cache", "peers", "orchestrator"])
+    parser.add_argument("--save", help="Write results to this baseline file")
+    parser.add_argument("--compare", help="Compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    current = run_suite(tuple(args.pages), args.repeat, args.only)
+    if args.save:
+        pathlib.Path(args.save).write_text(json.dumps(current, indent=2))
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        regressions = compare(current, json.loads(pathlib.Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,111 @@
+import argparse
+import pathlib
+import random
+from typing import Any
+
+import fitz
+
+FILLER = (
+    "The Company operates in a competitive industry and its business is subject to risks described in "
+    "this section. Investors should read the following together with the Restated Financial Information "
+    "and the section titled Management's Discussion and Analysis. Certain statements are forward looking "
+    "and actual results may differ materially from those expressed or implied herein."
+)
+
+
+def synthetic_financials(rng: random.Random, years: int = 3, first_year: int = 2022) -> list[dict[str, Any]]:
+    revenue = rng.uniform(200, 2000)
+    rows = []
+    for i in range(years):
+        revenue *= rng.uniform(1.05, 1.35)
+        ebitda = revenue * rng.uniform(0.08, 0.25)
+        pat = ebitda * rng.uniform(0.3, 0.6)
+        rows.append(
+            {
+                "fy": f"FY{first_year + i}",
+                "revenue_cr": round(revenue, 2),
+                "ebitda_cr": round(ebitda, 2),
+                "pat_cr": round(pat, 2),
+                "networth_cr": round(revenue * rng.uniform(0.3, 0.8), 2),
+                "debt_cr": round(revenue * rng.uniform(0.0, 0.5), 2),
+                "cfo_cr": round(pat * rng.uniform(0.5, 1.3), 2),
+            }
+        )
+    return rows
+
+
+def _lakhs(value_cr: float) -> str:
+    # Summary tables quote Rs. lakhs with Indian grouping; negatives in parentheses
+    lakhs = value_cr * 100
+    text = f"{abs(lakhs):,.2f}"
+    return f"({text})" if lakhs < 0 else text
+
+
+def _summary_table_lines(rows: list[dict[str, Any]]) -> list[str]:
+    labels = [
+        ("Revenue from operations", "revenue_cr"),
+        ("EBITDA", "ebitda_cr"),
+        ("Restated profit for the year", "pat_cr"),
+        ("Net worth", "networth_cr"),
+        ("Total borrowings", "debt_cr"),
+        ("Net cash from operating activities", "cfo_cr"),
+    ]
+    lines = ["(Rs. in lakhs)", "Particulars    " + "    ".join(r["fy"] for r in rows)]
+    for label, key in labels:
+        lines.append(label + "    " + "    ".join(_lakhs(r[key]) for r in rows))
+    return lines
+
+
+def generate_drhp(
+    path: pathlib.Path,
+    pages: int = 200,
+    seed: int = 0,
+    company: str = "Synthetic Industries Limited",
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    financials = synthetic_financials(rng)
+    terms = {"price_band": [rng.randint(90, 110), rng.randint(111, 130)], "lot_size": rng.randint(50, 200)}
+    summary_page = max(1, pages // 3)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        lines = [f"{company.upper()} - RED HERRING PROSPECTUS"]
+        if i == 0:
+            lines += [
+                company.upper(),
+                "RED HERRING PROSPECTUS",
+                f"PRICE BAND: Rs. {terms['price_band'][0]} TO Rs. {terms['price_band'][1]} PER EQUITY SHARE",
+                f"BID LOT: {terms['lot_size']} EQUITY SHARES AND IN MULTIPLES THEREOF",
+                "BID/OFFER OPENS ON: 12-08-2025    BID/OFFER CLOSES ON: 14-08-2025",
+            ]
+        elif i == 2 and summary_page != 2:
+            lines += ["INDUSTRY OVERVIEW", "Overview of the Indian Manufacturing Industry"]
+            lines += [FILLER[: rng.randint(80, len(FILLER))] for _ in range(4)]
+        elif i == summary_page:
+            lines += ["SUMMARY OF FINANCIAL INFORMATION", "Restated Summary Statements"]
+            lines += _summary_table_lines(financials)
+        else:
+            for _ in range(6):
+                lines.append(FILLER[: rng.randint(80, len(FILLER))])
+        lines.append(str(i + 1))
+        page.insert_text((48, 60), "\n".join(lines), fontsize=8)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc.save(path)
+    doc.close()
+    return {
+        "extracted": {
+            "meta": {"company": company, "industry": "Manufacturing"},
+            "terms": {**terms, "open_date": "2025-08-12", "close_date": "2025-08-14"},
+            "financials": financials,
+        }
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic DRHP-like PDF")
+    parser.add_argument("out")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_drhp(pathlib.Path(args.out), pages=args.pages, seed=args.seed)
+    print(f"Wrote {args.pages} pages to {args.out}")
@@ -1,24 +1,90 @@
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
+import asyncio
 import os
 import json
-from openai import OpenAI
+import random
+import time
 from loguru import logger
 
+from utils.llm_scheduler import LLMScheduler
+from utils.telemetry import LLM_QUOTA_WAIT_SECONDS, LLM_RETRIES
+
+if TYPE_CHECKING:
+    from openai import APIStatusError, AsyncOpenAI
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+# Reserved per call for the reply until the API reports actual usage
+COMPLETION_TOKEN_ESTIMATE = 1500
+
+REASK_PROMPT = (
+    "Your previous reply was not a valid JSON object matching the schema ({error}). "
+    "Return ONLY the corrected JSON object."
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMResponseError(RuntimeError):
+    pass
+
+
+def _retry_after(error: "APIStatusError") -> Optional[float]:
+    headers = getattr(error.response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            # HTTP-date form; fall back to backoff
+            return None
+    return None
+
+
+def _parse_extraction(content: str) -> dict[str, Any]:
+    data = json.loads(content)
+    if not isinstance(data, dict) or not isinstance(data.get("extracted"), dict):
+        raise ValueError("top-level 'extracted' object missing")
+    return data
+
+
 class GeminiClient:
     def __init__(
         self,
         api_key: Optional[str] = None,
-        model: str = "gemini-2.5-flash",
-        base_url: str = "https://generativelanguage.googleapis.com/v1beta/openai/",
+        model: str = DEFAULT_MODEL,
+        base_url: str = DEFAULT_BASE_URL,
         temperature: float = 0.0,
         default_system_prompt: Optional[str] = None,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        timeout_s: float = 120.0,
+        max_retries: int = 5,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 60.0,
+        json_retries: int = 1,
+        scheduler: Optional[LLMScheduler] = None,
     ) -> None:
         # Constants declared in constructor per project conventions
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self.model = model
         self.base_url = base_url
         self.temperature = temperature
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.timeout_s = timeout_s
+        # Built on first use (or by warm()); importing openai costs noticeable start-up time
+        self._client: Optional["AsyncOpenAI"] = None
+        self.scheduler = scheduler or LLMScheduler(max_concurrency, requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.json_retries = json_retries
         self.default_system_prompt = default_system_prompt or (
             """
 You are an expert data extraction engine for Indian IPO DRHP/RHP documents.
@@ -56,26 +122,111 @@ Return ONLY the JSON object.
             """
         )
 
-    def extract_structured(self, text: str, schema: dict[str, Any], system_prompt: Optional[str] = None) -> dict[str, Any]:
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            # Retries are ours so they go through the scheduler and honour Retry-After
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout_s, max_retries=0)
+        return self._client
+
+    def warm(self) -> None:
+        # Import openai and build the client ahead of the first request
+        _ = self.client
+
+    async def extract_structured(
+        self,
+        text: str,
+        schema: dict[str, Any],
+        system_prompt: Optional[str] = None,
+        usage: Optional[dict[str, int]] = None,
+    ) -> dict[str, Any]:
         prompt = system_prompt or self.default_system_prompt
         messages = [
             {"role": "system", "content": prompt},
-            {"role": "user", "content": f"JSON_SCHEMA:\n{json.dumps(schema)}\n\nDOCUMENT_TEXT:\n{text}"},
+            {"role": "user", "content": f"JSON_SCHEMA:\n{json.dumps(schema, separators=(',', ':'))}\n\nDOCUMENT_TEXT:\n{text}"},
         ]
-        # calculate approx tokens
-        tokens = len(text.split())
-        logger.info("Approx tokens ~ {}", tokens)
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            response_format={"type": "json_object"},
-            temperature=self.temperature,
-        )
-        content = resp.choices[0].message.content or "{}"
-        try:
-            data = json.loads(content)
-            logger.info("LLM RESPONSE: {}", json.dumps(data, indent=2))
-            return data
-        except Exception as e:
-            logger.warning("Invalid JSON from LLM: {}", e)
-            return {"extracted": {"meta": {}, "terms": {}, "financials": []}}
\ No newline at end of file
+        error: Optional[ValueError] = None
+        for reask in range(self.json_retries + 1):
+            if error is not None:
+                LLM_RETRIES.labels("invalid_json").inc()
+                # The model sees its own broken reply and the parse error, not a fresh prompt
+                messages = messages[:2] + [
+                    {"role": "assistant", "content": content[:2000]},
+                    {"role": "user", "content": REASK_PROMPT.format(error=error)},
+                ]
+            content = await self._complete(messages, usage)
+            try:
+                data = _parse_extraction(content)
+                logger.opt(lazy=True).debug("LLM RESPONSE: {}", lambda: content)
+                return data
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError too
+                logger.warning("Invalid JSON from LLM (attempt {}): {}", reask + 1, e)
+                error = e
+        raise LLMResponseError(f"LLM returned invalid JSON after {self.json_retries + 1} attempt(s): {error}") from error
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # Full jitter keeps a burst of throttled callers from retrying in lockstep
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2**attempt))
+        return max(delay, retry_after or 0.0)
+
+    async def _complete(self, messages: list[dict[str, str]], usage: Optional[dict[str, int]]) -> str:
+        from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+        # Rough estimate (~4 chars per token); the API's usage block replaces it when present
+        prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        estimate = prompt_tokens + COMPLETION_TOKEN_ESTIMATE
+        logger.debug("Approx tokens ~ {}", prompt_tokens)
+        error: Optional[Exception] = None
+        retry_after: Optional[float] = None
+        for attempt in range(self.max_retries + 1):
+            if error is not None:
+                await asyncio.sleep(delay)
+            retry_after = None
+            async with self.scheduler.admit(estimate) as waited:
+                if waited:
+                    LLM_QUOTA_WAIT_SECONDS.inc(waited)
+                started = time.perf_counter()
+                try:
+                    resp = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        response_format={"type": "json_object"},
+                        temperature=self.temperature,
+                    )
+                except APIStatusError as e:
+                    if e.status_code != 429 and e.status_code < 500:
+                        raise
+                    reason = "rate_limited" if e.status_code == 429 else "server_error"
+                    retry_after = _retry_after(e)
+                    error = e
+                except (APITimeoutError, APIConnectionError) as e:
+                    reason = "timeout" if isinstance(e, APITimeoutError) else "connection"
+                    error = e
+                else:
+                    resp_usage = getattr(resp, "usage", None)
+                    actual_prompt = getattr(resp_usage, "prompt_tokens", None) or prompt_tokens
+                    actual_completion = getattr(resp_usage, "completion_tokens", None) or 0
+                    self.scheduler.tokens.adjust(actual_prompt + actual_completion - estimate)
+                    self.scheduler.concurrency.on_success(time.perf_counter() - started, actual_prompt)
+                    if usage is not None:
+                        usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + actual_prompt
+                        usage["completion_tokens"] = usage.get("completion_tokens", 0) + actual_completion
+                    return resp.choices[0].message.content or "{}"
+
+            delay = self._backoff(attempt, retry_after)
+            if reason == "rate_limited":
+                # Every caller sharing this client holds off, not just the one that was throttled
+                self.scheduler.back_off(delay)
+            else:
+                # Timeouts and 502-504 mean the provider is struggling; a plain 500 is usually one bad request
+                overloaded = reason != "server_error" or getattr(error, "status_code", 500) in (502, 503, 504)
+                self.scheduler.concurrency.on_overload(0.5 if overloaded else 0.9)
+            if attempt < self.max_retries:
+                LLM_RETRIES.labels(reason).inc()
+                logger.warning("LLM {} (attempt {}/{}), retrying in {:.1f}s: {}", reason, attempt + 1, self.max_retries + 1, delay, error)
+        raise LLMUnavailableError(
+            f"LLM request failed after {self.max_retries + 1} attempt(s): {error}", retry_after=retry_after
+        ) from error
\ No newline at end of file
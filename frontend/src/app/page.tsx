@@ -4,20 +4,28 @@ import { useState } from "react";
 import UploadBox from "@/components/UploadBox";
 import TermsCard from "@/components/TermsCard";
 import FinancialsTable from "@/components/FinancialsTable";
-import MetricsCard from "@/components/MetricsCard";
+import MetricsCard, { type PeerPercentiles } from "@/components/MetricsCard";
 import VerdictCard from "@/components/VerdictCard";
 import TrendsCard from "@/components/TrendsCard";
+import type { AnalyzeBlock } from "@/lib/stream";
 import type { AnalyzeResponse, FinancialQualityBlock, TermsAndFinancialsBlock, VerdictBlock } from "@/lib/types";
 
 export default function Home() {
   const [data, setData] = useState<AnalyzeResponse | null>(null);
+  // Blocks streamed in before the full response; each card renders as soon as its block arrives
+  const [blocks, setBlocks] = useState<AnalyzeBlock[]>([]);
   const [fileName, setFileName] = useState<string | null>(null);
-  const taf = data?.components.find((b) => b.component === "terms_and_financials") as TermsAndFinancialsBlock | undefined;
-  const fq = data?.components.find((b) => b.component === "financial_quality") as FinancialQualityBlock | undefined;
-  const vd = data?.components.find((b) => b.component === "verdict") as VerdictBlock | undefined;
+  const components = data?.components ?? blocks;
+  const taf = components.find((b) => b.component === "terms_and_financials") as TermsAndFinancialsBlock | undefined;
+  const fq = components.find((b) => b.component === "financial_quality") as FinancialQualityBlock | undefined;
+  const vd = components.find((b) => b.component === "verdict") as VerdictBlock | undefined;
+
+  const addBlock = (block: AnalyzeBlock) =>
+    setBlocks((prev) => [...prev.filter((b) => b.component !== block.component), block]);
 
   const resetUpload = () => {
     setData(null);
+    setBlocks([]);
     setFileName(null);
     window.scrollTo({ top: 0, behavior: "smooth" });
   };
@@ -45,9 +53,9 @@ export default function Home() {
       </header>
 
       <main className="max-w-5xl mx-auto px-6 py-8 flex flex-col gap-6">
-        {!data && <UploadBox onResult={setData} onSelectedFileName={setFileName} />}
+        {!data && <UploadBox onResult={setData} onSelectedFileName={setFileName} onComponent={addBlock} />}
 
-        {!data && (
+        {!data && blocks.length === 0 && (
           <section className="flex items-center justify-center h-[50vh] text-sm text-gray-500">
             Upload a DRHP/RHP PDF to get started.
           </section>
@@ -65,7 +73,7 @@ export default function Home() {
         )}
 
         {fq && (
-          <MetricsCard metrics={fq.metrics} />
+          <MetricsCard metrics={fq.metrics} peers={(fq as FinancialQualityBlock & { peers?: PeerPercentiles | null }).peers} />
         )}
 
         {vd && (
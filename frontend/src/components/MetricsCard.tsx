@@ -2,7 +2,26 @@ import type { Metrics } from "@/lib/types";
 import { fmtCr, fmtPct } from "@/lib/format";
 import InfoTip from "@/components/InfoTip";
 
-export default function MetricsCard({ metrics }: { metrics: Metrics }) {
+type PeerRank = { percentile: number | null; peers: number };
+
+export type PeerPercentiles = {
+  industry: string | null;
+  metrics: Record<string, { value: number; all: PeerRank; industry: PeerRank | null }>;
+};
+
+function PeerRankLine({ peers, metric }: { peers?: PeerPercentiles | null; metric: string }) {
+  const rank = peers?.metrics[metric];
+  if (!rank || rank.all.percentile === null) return null;
+  const industry = rank.industry?.percentile ?? null;
+  return (
+    <div className="text-xs text-gray-500">
+      P{Math.round(rank.all.percentile)} of {rank.all.peers} IPOs
+      {industry !== null && peers?.industry ? ` · P${Math.round(industry)} in ${peers.industry}` : ""}
+    </div>
+  );
+}
+
+export default function MetricsCard({ metrics, peers }: { metrics: Metrics; peers?: PeerPercentiles | null }) {
   return (
     <section className="w-full max-w-4xl mx-auto p-6 rounded-lg border border-gray-300 bg-white text-gray-900">
       <h2 className="text-lg font-semibold mb-4 text-gray-900">Financial Quality</h2>
@@ -14,6 +33,7 @@ export default function MetricsCard({ metrics }: { metrics: Metrics }) {
         <div>
           <div className="text-gray-500 flex items-center gap-1">Revenue CAGR <InfoTip label="Revenue CAGR">Average annual growth in revenue across the reported years.</InfoTip></div>
           <div className="font-medium">{fmtPct(metrics.revenue_cagr)}</div>
+          <PeerRankLine peers={peers} metric="revenue_cagr" />
         </div>
         <div>
           <div className="text-gray-500 flex items-center gap-1">PAT CAGR <InfoTip label="PAT CAGR">Average annual growth in profit after tax.</InfoTip></div>
@@ -30,6 +50,7 @@ export default function MetricsCard({ metrics }: { metrics: Metrics }) {
         <div>
           <div className="text-gray-500 flex items-center gap-1">EBITDA Margin (latest) <InfoTip label="EBITDA Margin">Operating profit as a share of revenue in the latest year.</InfoTip></div>
           <div className="font-medium">{fmtPct(metrics.ebitda_margin)}</div>
+          <PeerRankLine peers={peers} metric="ebitda_margin" />
         </div>
         <div>
           <div className="text-gray-500 flex items-center gap-1">EBITDA Margin Trend <InfoTip label="Margin Trend">Change in EBITDA margin from first to last reported year.</InfoTip></div>
@@ -42,6 +63,7 @@ export default function MetricsCard({ metrics }: { metrics: Metrics }) {
         <div>
           <div className="text-gray-500 flex items-center gap-1">Debt / Net Worth <InfoTip label="Leverage">Higher values mean more borrowing compared to equity.</InfoTip></div>
           <div className="font-medium">{typeof metrics.debt_to_networth === 'number' ? metrics.debt_to_networth.toFixed(2) : "—"}</div>
+          <PeerRankLine peers={peers} metric="debt_to_networth" />
         </div>
         <div>
           <div className="text-gray-500 flex items-center gap-1">Net Debt / EBITDA <InfoTip label="Debt to Profit">How many years of operating profit to repay net debt (lower is better).</InfoTip></div>
@@ -54,13 +76,14 @@ export default function MetricsCard({ metrics }: { metrics: Metrics }) {
         <div>
           <div className="text-gray-500 flex items-center gap-1">CFO / PAT <InfoTip label="Cash Conversion">How much profit converts to cash (closer to 100% is better).</InfoTip></div>
           <div className="font-medium">{fmtPct(metrics.cfo_to_pat)}</div>
+          <PeerRankLine peers={peers} metric="cfo_to_pat" />
         </div>
         <div>
           <div className="text-gray-500 flex items-center gap-1">Years with +CFO <InfoTip label="Consistency">Share of reported years with positive cash flow from operations.</InfoTip></div>
           <div className="font-medium">{typeof metrics.cfo_positive_years_ratio === 'number' ? `${Math.round(metrics.cfo_positive_years_ratio * 100)}%` : "—"}</div>
         </div>
       </div>
-      <p className="mt-3 text-xs text-gray-500">Higher growth and margins are better. Positive and consistent cash flows strengthen conviction; lower leverage is safer.</p>
+      <p className="mt-3 text-xs text-gray-500">Higher growth and margins are better. Positive and consistent cash flows strengthen conviction; lower leverage is safer. Peer ranks (P0–P100) compare against every IPO analyzed here; a high rank on Debt / Net Worth means more leverage than most.</p>
     </section>
   );
 } 
\ No newline at end of file
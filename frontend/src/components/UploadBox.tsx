@@ -1,12 +1,30 @@
 "use client";
 
 import { useState } from "react";
-import { analyzePdf } from "@/lib/api";
+import { analyzePdfStream, type AnalyzeBlock } from "@/lib/stream";
+import { fetchReport, sha256Hex } from "@/lib/reports";
 import type { AnalyzeResponse } from "@/lib/types";
 
-export default function UploadBox({ onResult, onSelectedFileName }: { onResult: (r: AnalyzeResponse) => void; onSelectedFileName?: (name: string) => void }) {
+const STAGE_LABELS: Record<string, string> = {
+  hash: "Checking for a previous analysis…",
+  parse: "Reading PDF…",
+  extract: "Extracting financials…",
+  metrics: "Computing metrics…",
+  verdict: "Scoring…",
+};
+
+export default function UploadBox({
+  onResult,
+  onSelectedFileName,
+  onComponent,
+}: {
+  onResult: (r: AnalyzeResponse) => void;
+  onSelectedFileName?: (name: string) => void;
+  onComponent?: (block: AnalyzeBlock) => void;
+}) {
   const [file, setFile] = useState<File | null>(null);
   const [loading, setLoading] = useState(false);
+  const [stage, setStage] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
 
   const onSubmit = async (e: React.FormEvent) => {
@@ -18,12 +36,24 @@ export default function UploadBox({ onResult, onSelectedFileName }: { onResult:
     }
     try {
       setLoading(true);
-      const res = await analyzePdf(file);
+      // Hash locally first: a document analyzed before is fetched without uploading it
+      setStage("hash");
+      const hash = await sha256Hex(file).catch(() => null);
+      const cached = hash ? await fetchReport(hash).catch(() => null) : null;
+      if (cached) {
+        onResult(cached);
+        return;
+      }
+      const res = await analyzePdfStream(file, {
+        onProgress: (p) => setStage(p.stage),
+        onComponent,
+      });
       onResult(res);
     } catch (err: any) {
       setError(err?.message || "Upload failed");
     } finally {
       setLoading(false);
+      setStage(null);
     }
   };
 
@@ -50,7 +80,7 @@ export default function UploadBox({ onResult, onSelectedFileName }: { onResult:
           disabled={loading}
           className="inline-flex items-center justify-center rounded-md border border-gray-400 bg-gray-900 text-white px-4 py-2 text-sm disabled:opacity-60"
         >
-          {loading ? "Analyzing…" : "Analyze PDF"}
+          {loading ? (stage && STAGE_LABELS[stage]) || "Analyzing…" : "Analyze PDF"}
         </button>
         {error && <p className="text-sm text-red-600">{error}</p>}
       </div>
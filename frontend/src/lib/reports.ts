@@ -0,0 +1,17 @@
+import type { AnalyzeResponse } from "@/lib/types";
+import { API_BASE } from "@/lib/stream";
+
+// Same id the server derives from the upload; null where WebCrypto is unavailable (non-HTTPS origins)
+export async function sha256Hex(file: File): Promise<string | null> {
+  if (typeof crypto === "undefined" || !crypto.subtle) return null;
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+}
+
+// GET /reports/{sha256}: the stored analysis, or null when the PDF has to be uploaded
+export async function fetchReport(hash: string, signal?: AbortSignal): Promise<AnalyzeResponse | null> {
+  const res = await fetch(`${API_BASE}/reports/${hash}`, { signal });
+  if (res.status === 404) return null;
+  if (!res.ok) throw new Error(`Report lookup failed (${res.status})`);
+  return (await res.json()) as AnalyzeResponse;
+}
@@ -0,0 +1,69 @@
+import type { AnalyzeResponse } from "@/lib/types";
+
+export const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL || "http://localhost:8000";
+
+export type AnalyzeBlock = AnalyzeResponse["components"][number];
+
+export type ProgressEvent = {
+  stage: string;
+  status: string;
+  [key: string]: unknown;
+};
+
+type StreamEvent =
+  | { type: "accepted"; file_id: string }
+  | ({ type: "progress" } & ProgressEvent)
+  | { type: "component"; block: AnalyzeBlock }
+  | { type: "result"; result: AnalyzeResponse }
+  | { type: "error"; status: number; detail: unknown };
+
+export type StreamHandlers = {
+  onProgress?: (e: ProgressEvent) => void;
+  onComponent?: (block: AnalyzeBlock) => void;
+  signal?: AbortSignal;
+};
+
+function errorMessage(detail: unknown, fallback: string): string {
+  if (typeof detail === "string") return detail;
+  if (detail && typeof detail === "object" && "message" in detail) return String((detail as { message: unknown }).message);
+  return fallback;
+}
+
+// POST /analyze/stream and dispatch NDJSON events as they arrive; resolves with the full response
+export async function analyzePdfStream(file: File, handlers: StreamHandlers = {}): Promise<AnalyzeResponse> {
+  const form = new FormData();
+  form.append("file", file);
+  const res = await fetch(`${API_BASE}/analyze/stream`, { method: "POST", body: form, signal: handlers.signal });
+  if (!res.ok || !res.body) {
+    const body = await res.json().catch(() => null);
+    throw new Error(errorMessage(body?.detail, `Upload failed (${res.status})`));
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+  let result: AnalyzeResponse | undefined;
+
+  const handle = (line: string): AnalyzeResponse | undefined => {
+    if (!line.trim()) return undefined;
+    const event = JSON.parse(line) as StreamEvent;
+    if (event.type === "progress") handlers.onProgress?.(event);
+    else if (event.type === "component") handlers.onComponent?.(event.block);
+    else if (event.type === "result") return event.result;
+    else if (event.type === "error") throw new Error(errorMessage(event.detail, `Analysis failed (${event.status})`));
+    return undefined;
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split("\n");
+    buffered = lines.pop() ?? "";
+    for (const line of lines) result = handle(line) ?? result;
+  }
+  result = handle(buffered + decoder.decode()) ?? result;
+
+  if (!result) throw new Error("Analysis stream ended early");
+  return result;
+}
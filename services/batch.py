@@ -0,0 +1,218 @@
+import asyncio
+import json
+import pathlib
+import time
+from typing import Any, Iterable, Optional
+
+from loguru import logger
+
+from services.orchestrator import AnalyzeOrchestrator, OrchestratorBusyError
+from utils.uploads import store_local_pdf
+
+
+def collect_pdfs(inputs: Iterable[str]) -> list[pathlib.Path]:
+    paths: list[pathlib.Path] = []
+    for item in inputs:
+        p = pathlib.Path(item)
+        if p.is_dir():
+            paths.extend(sorted(x for x in p.rglob("*") if x.is_file() and x.suffix.lower() == ".pdf"))
+        elif p.is_file() and p.suffix.lower() == ".pdf":
+            paths.append(p)
+        else:
+            logger.warning("Skipping {}: not a PDF file or directory", p)
+    return paths
+
+
+def load_completed(output_path: pathlib.Path) -> set[str]:
+    done: set[str] = set()
+    if not output_path.exists():
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except Exception:
+                # A half-written last line from an interrupted run is simply redone
+                continue
+            if record.get("status") == "ok":
+                done.add(record["source"])
+    return done
+
+
+def write_parquet(jsonl_path: pathlib.Path, parquet_path: pathlib.Path) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from e
+    rows = []
+    with open(jsonl_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except Exception:
+                continue
+            result = record.pop("result", None) or {}
+            verdict = next((b for b in result.get("components", []) if b.get("component") == "verdict"), {})
+            company = next(
+                (b.get("company") for b in result.get("components", []) if b.get("component") == "terms_and_financials"),
+                None,
+            )
+            rows.append(
+                {
+                    **record,
+                    "company": company,
+                    "verdict": verdict.get("verdict"),
+                    "confidence": verdict.get("confidence"),
+                    "result_json": json.dumps(result) if result else None,
+                }
+            )
+    pq.write_table(pa.Table.from_pylist(rows), parquet_path)
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        orchestrator: AnalyzeOrchestrator,
+        output_path: pathlib.Path,
+        concurrency: int = 4,
+        output_format: str = "jsonl",
+        upload_dir: pathlib.Path = pathlib.Path("uploads"),
+        busy_retry_seconds: float = 2.0,
+    ) -> None:
+        if output_format not in ("jsonl", "parquet"):
+            raise ValueError(f"Unsupported batch output format: {output_format}")
+        self.orchestrator = orchestrator
+        self.output_format = output_format
+        # JSONL doubles as the resume journal; Parquet is written from it at the end
+        self.output_path = output_path if output_format == "jsonl" else output_path.with_suffix(".jsonl")
+        self.parquet_path = output_path.with_suffix(".parquet") if output_format == "parquet" else None
+        self.concurrency = concurrency
+        self.upload_dir = upload_dir
+        self.busy_retry_seconds = busy_retry_seconds
+        self.progress: dict[str, Any] = {}
+
+    async def _analyze(self, source: pathlib.Path, name: Optional[str] = None) -> dict[str, Any]:
+        started = time.perf_counter()
+        usage: dict[str, int] = {}
+        cached = False
+
+        def on_progress(event: dict[str, Any]) -> None:
+            nonlocal cached
+            if event.get("stage") == "extract" and event.get("status") == "llm_done":
+                for k, v in (event.get("usage") or {}).items():
+                    usage[k] = usage.get(k, 0) + v
+            if event.get("stage") == "extract" and event.get("status") == "done":
+                cached = bool(event.get("cached"))
+
+        record: dict[str, Any] = {"source": str(source)}
+        try:
+            file_id, pdf_path, size = await asyncio.to_thread(store_local_pdf, source, self.upload_dir)
+            record.update({"file_id": file_id, "bytes": size})
+            while True:
+                try:
+                    result = await self.orchestrator.run_file(
+                        file_id=file_id,
+                        pdf_path=pdf_path,
+                        original_filename=name or source.name,
+                        progress=on_progress,
+                    )
+                    break
+                except OrchestratorBusyError:
+                    await asyncio.sleep(self.busy_retry_seconds)
+            record.update({"status": "ok", "result": result})
+        except Exception as e:
+            logger.warning("Batch analysis failed for {}: {}", source, e)
+            record.update({"status": "error", "error": str(e)})
+        record.update(
+            {
+                "cached": cached,
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+                "elapsed_s": round(time.perf_counter() - started, 3),
+            }
+        )
+        return record
+
+    async def run(self, sources: list[pathlib.Path], names: Optional[dict[str, str]] = None) -> dict[str, Any]:
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        completed = load_completed(self.output_path)
+        todo = [s for s in sources if str(s) not in completed]
+        self.progress = {
+            "total": len(sources),
+            "skipped": len(sources) - len(todo),
+            "processed": 0,
+            "failed": 0,
+            "cache_hits": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        logger.info("Batch: {} documents, {} already done", len(sources), self.progress["skipped"])
+
+        queue: asyncio.Queue[pathlib.Path] = asyncio.Queue()
+        for s in todo:
+            queue.put_nowait(s)
+        started = time.perf_counter()
+
+        with open(self.output_path, "a") as out:
+
+            async def worker() -> None:
+                while True:
+                    try:
+                        source = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self._analyze(source, (names or {}).get(str(source)))
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    self.progress["processed"] += 1
+                    self.progress["failed"] += record["status"] != "ok"
+                    self.progress["cache_hits"] += record["cached"]
+                    self.progress["prompt_tokens"] += record["prompt_tokens"]
+                    self.progress["completion_tokens"] += record["completion_tokens"]
+
+            await asyncio.gather(*(worker() for _ in range(max(1, min(self.concurrency, len(todo))))))
+
+        if self.parquet_path is not None:
+            await asyncio.to_thread(write_parquet, self.output_path, self.parquet_path)
+
+        elapsed = time.perf_counter() - started
+        minutes = elapsed / 60 if elapsed > 0 else None
+        tokens = self.progress["prompt_tokens"] + self.progress["completion_tokens"]
+        summary = {
+            **self.progress,
+            "elapsed_s": round(elapsed, 2),
+            "docs_per_min": round(self.progress["processed"] / minutes, 2) if minutes else None,
+            "tokens_per_min": round(tokens / minutes, 2) if minutes else None,
+            "output": str(self.parquet_path or self.output_path),
+        }
+        logger.info("Batch summary: {}", summary)
+        return summary
+
+
+def run_batch_cli(
+    orchestrator: AnalyzeOrchestrator,
+    inputs: list[str],
+    output: str,
+    concurrency: int = 4,
+    output_format: str = "jsonl",
+) -> dict[str, Any]:
+    runner = BatchRunner(
+        orchestrator,
+        output_path=pathlib.Path(output),
+        concurrency=concurrency,
+        output_format=output_format,
+    )
+    return asyncio.run(runner.run(collect_pdfs(inputs)))
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    return (
+        f"{summary['processed']} processed ({summary['failed']} failed, {summary['cache_hits']} cache hits), "
+        f"{summary['skipped']} skipped of {summary['total']} in {summary['elapsed_s']}s | "
+        f"{summary['docs_per_min']} docs/min, {summary['tokens_per_min']} tokens/min -> {summary['output']}"
+    )
+
+
+def batch_output_path(batch_id: str, output_format: str, root: Optional[str] = None) -> pathlib.Path:
+    return pathlib.Path(root or "memory/batches") / f"{batch_id}.{output_format}"
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, Optional
+
+from loguru import logger
+
+# Before the index existed, extractions were written as memory/responses/{document sha256}.json
+_LEGACY_NAME = re.compile(r"^[0-9a-f]{64}\.json$")
+# Model, prompt and schema hash recorded for those files, whose real ones are unknown
+LEGACY = "legacy"
+
+
+def fingerprint(value: Any) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    def __init__(
+        self,
+        root: str = "memory/responses",
+        index_path: str = "memory/responses/index.db",
+        memory_entries: int = 256,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_age_seconds: Optional[float] = 180 * 24 * 3600,
+    ) -> None:
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._memory: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                schema_hash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_file_id ON entries(file_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries(accessed_at)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        self.stats: dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(file_id: str, model: str, prompt_hash: str, schema_hash: str) -> str:
+        return fingerprint(f"{file_id}:{model}:{prompt_hash}:{schema_hash}")
+
+    def _remember(self, key: str, value: dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_memory(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+            return value
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+        with self._lock:
+            row = self._db.execute("SELECT path FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            path = pathlib.Path(row[0])
+            try:
+                value = json.loads(path.read_text())
+            except Exception as e:
+                logger.warning("Dropping unreadable cache entry {}: {}", path, e)
+                self._drop(key, path)
+                self._db.commit()
+                self.stats["misses"] += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            self._db.commit()
+            self._remember(key, value)
+            self.stats["disk_hits"] += 1
+            return value
+
+    def put(
+        self,
+        key: str,
+        value: dict[str, Any],
+        file_id: str,
+        model: str,
+        prompt_hash: str,
+        schema_hash: str,
+    ) -> pathlib.Path:
+        path = self.root / f"{key}.json"
+        payload = json.dumps(value).encode("utf-8")
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(payload)
+            os.replace(tmp_name, path)
+        except BaseException:
+            pathlib.Path(tmp_name).unlink(missing_ok=True)
+            raise
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT path FROM entries WHERE key = ?", (key,)).fetchone()
+            if previous is not None and pathlib.Path(previous[0]) != path:
+                # A migrated legacy file replaced by a fresh extraction
+                pathlib.Path(previous[0]).unlink(missing_ok=True)
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO entries
+                    (key, file_id, model, prompt_hash, schema_hash, path, size, created_at, accessed_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, file_id, model, prompt_hash, schema_hash, str(path), len(payload), now, now),
+            )
+            self._db.commit()
+            self._remember(key, value)
+            self.stats["writes"] += 1
+        self.evict()
+        return path
+
+    def import_legacy(self) -> int:
+        # One-time: index pre-index files under the LEGACY model/prompt/schema. Nothing records which
+        # model or prompt produced them, so they are never served for a current key; they are only
+        # rescored and evicted like any other entry. Files are only stat'ed; an unreadable one is
+        # dropped on first read as usual
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM meta WHERE name = 'legacy_indexed'").fetchone():
+                return 0
+            known = {}
+            for key, file_id, model, path in self._db.execute("SELECT key, file_id, model, path FROM entries"):
+                known[path] = (key, file_id, model)
+            rows = []
+            for path in self.root.iterdir():
+                if not _LEGACY_NAME.match(path.name):
+                    continue
+                file_id = path.stem
+                if str(path) in known:
+                    key, indexed_id, model = known[str(path)]
+                    # Files named by their key are regular entries; an earlier import keyed legacy
+                    # files as current extractions, and those move under LEGACY
+                    if indexed_id != file_id or model == LEGACY:
+                        continue
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._memory.pop(key, None)
+                st = path.stat()
+                key = self.make_key(file_id, LEGACY, LEGACY, LEGACY)
+                rows.append((key, file_id, LEGACY, LEGACY, LEGACY, str(path), st.st_size, st.st_mtime, st.st_mtime))
+            self._db.executemany(
+                """
+                INSERT OR IGNORE INTO entries
+                    (key, file_id, model, prompt_hash, schema_hash, path, size, created_at, accessed_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                rows,
+            )
+            self._db.execute("INSERT INTO meta (name, value) VALUES ('legacy_indexed', ?)", (str(time.time()),))
+            self._db.commit()
+        if rows:
+            logger.info("Indexed {} legacy cached extractions", len(rows))
+            self.evict()
+        return len(rows)
+
+    def drop_superseded(self, prefix: str, current: str) -> int:
+        # Entries whose prompt hash carries `prefix` but isn't `current` were built by settings that
+        # are gone; dropping them keeps them out of rescoring too
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, path FROM entries WHERE substr(prompt_hash, 1, ?) = ? AND prompt_hash != ?",
+                (len(prefix), prefix, current),
+            ).fetchall()
+            for key, path in rows:
+                self._drop(key, pathlib.Path(path))
+            if rows:
+                self._db.commit()
+        return len(rows)
+
+    def _drop(self, key: str, path: pathlib.Path) -> None:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._memory.pop(key, None)
+        path.unlink(missing_ok=True)
+
+    def evict(self) -> int:
+        evicted = 0
+        with self._lock:
+            if self.max_age_seconds is not None:
+                cutoff = time.time() - self.max_age_seconds
+                for key, path in self._db.execute(
+                    "SELECT key, path FROM entries WHERE created_at < ?", (cutoff,)
+                ).fetchall():
+                    self._drop(key, pathlib.Path(path))
+                    evicted += 1
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                for key, path, size in self._db.execute(
+                    "SELECT key, path, size FROM entries ORDER BY accessed_at ASC"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._drop(key, pathlib.Path(path))
+                    total -= size
+                    evicted += 1
+            if evicted:
+                self._db.commit()
+                self.stats["evictions"] += evicted
+                logger.info("Evicted {} cache entries", evicted)
+        return evicted
+
+    def entries(self) -> Iterator[dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, file_id, model, prompt_hash, schema_hash, path, size, created_at, accessed_at, hits FROM entries"
+            ).fetchall()
+        cols = ("key", "file_id", "model", "prompt_hash", "schema_hash", "path", "size", "created_at", "accessed_at", "hits")
+        for row in rows:
+            yield dict(zip(cols, row))
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "entries": count,
+                "bytes": total,
+                "memory_entries": len(self._memory),
+                "hit_ratio": (hits / lookups) if lookups else None,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
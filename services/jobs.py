@@ -0,0 +1,302 @@
+import asyncio
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Optional
+
+from loguru import logger
+
+from services.orchestrator import AnalyzeOrchestrator, OrchestratorBusyError
+
+JOB_STAGES = ("upload", "parse", "extract", "metrics", "verdict")
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class JobQueueFullError(RuntimeError):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Job queue is full ({limit} jobs waiting)")
+        self.limit = limit
+
+
+class Job:
+    def __init__(
+        self,
+        file_id: str,
+        pdf_path: str,
+        original_filename: str,
+        slug: Optional[str] = None,
+        job_id: Optional[str] = None,
+    ) -> None:
+        self.id = job_id or uuid.uuid4().hex
+        self.file_id = file_id
+        self.pdf_path = pdf_path
+        self.original_filename = original_filename
+        self.slug = slug
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.result: Optional[dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.events: list[dict[str, Any]] = []
+        self._changed = asyncio.Event()
+
+    def to_dict(self, include_result: bool = True) -> dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "file_id": self.file_id,
+            "filename": self.original_filename,
+            "slug": self.slug,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+    def publish(self, event: dict[str, Any]) -> None:
+        event = {"seq": len(self.events), "ts": time.time(), **event}
+        self.events.append(event)
+        self.updated_at = event["ts"]
+        # Wake current listeners and hand later ones a fresh event to wait on
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_events(self, after: int) -> None:
+        changed = self._changed
+        if len(self.events) > after or self.status in TERMINAL_STATUSES:
+            return
+        await changed.wait()
+
+
+class JobStore:
+    # Queued and running jobs stay until they finish; finished ones are dropped after
+    # `finished_ttl_seconds` or, oldest first, once more than `max_finished` are held
+    def __init__(self, finished_ttl_seconds: float = 3600.0, max_finished: int = 1000) -> None:
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self.max_finished = max_finished
+        self._jobs: dict[str, Job] = {}
+        self._finished: OrderedDict[str, float] = OrderedDict()
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.finished_ttl_seconds
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def add(self, job: Job) -> None:
+        self.save(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        if job.status in TERMINAL_STATUSES:
+            self._finished.setdefault(job.id, time.time())
+        else:
+            self._finished.pop(job.id, None)
+        self._evict()
+
+    def unfinished(self) -> list[Job]:
+        return []
+
+
+class SQLiteJobStore(JobStore):
+    # Only active jobs are held in memory; finished ones are read back from the database
+    def __init__(self, path: str = "memory/jobs.db") -> None:
+        super().__init__(max_finished=0)
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                pdf_path TEXT NOT NULL,
+                original_filename TEXT NOT NULL,
+                slug TEXT,
+                status TEXT NOT NULL,
+                stage TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status)")
+        self._db.commit()
+
+    def _row_to_job(self, row: tuple) -> Job:
+        job = Job(file_id=row[1], pdf_path=row[2], original_filename=row[3], slug=row[4], job_id=row[0])
+        job.status, job.stage = row[5], row[6]
+        job.result = json.loads(row[7]) if row[7] else None
+        job.error = row[8]
+        job.created_at, job.updated_at = row[9], row[10]
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = super().get(job_id)
+        if job is not None:
+            return job
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def save(self, job: Job) -> None:
+        super().save(job)
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO jobs
+                    (id, file_id, pdf_path, original_filename, slug, status, stage, result, error, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job.id,
+                    job.file_id,
+                    job.pdf_path,
+                    job.original_filename,
+                    job.slug,
+                    job.status,
+                    job.stage,
+                    json.dumps(job.result) if job.result is not None else None,
+                    job.error,
+                    job.created_at,
+                    job.updated_at,
+                ),
+            )
+            self._db.commit()
+
+    def unfinished(self) -> list[Job]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at", TERMINAL_STATUSES
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobManager:
+    def __init__(
+        self,
+        orchestrator: AnalyzeOrchestrator,
+        workers: int = 2,
+        max_queued: int = 100,
+        store: Optional[JobStore] = None,
+        busy_retry_seconds: float = 2.0,
+    ) -> None:
+        self.orchestrator = orchestrator
+        self.workers = workers
+        self.max_queued = max_queued
+        self.store = store or JobStore()
+        self.busy_retry_seconds = busy_retry_seconds
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        # Jobs interrupted by a restart are picked up again from the persistent store
+        for job in self.store.unfinished():
+            if pathlib.Path(job.pdf_path).exists():
+                job.status = "queued"
+                self.store.add(job)
+                self._queue.put_nowait(job)
+                logger.info("Requeued job {} for {}", job.id, job.file_id)
+            else:
+                job.status, job.error = "failed", "Uploaded file missing after restart"
+                self.store.save(job)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if isinstance(self.store, SQLiteJobStore):
+            self.store.close()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(
+        self,
+        file_id: str,
+        pdf_path: pathlib.Path,
+        original_filename: str,
+        slug: Optional[str] = None,
+    ) -> Job:
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(self.max_queued)
+        job = Job(file_id=file_id, pdf_path=str(pdf_path), original_filename=original_filename, slug=slug)
+        self.store.add(job)
+        job.stage = "upload"
+        job.publish({"stage": "upload", "status": "done", "file_id": file_id})
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    async def events(self, job: Job) -> AsyncIterator[dict[str, Any]]:
+        seen = 0
+        while True:
+            while seen < len(job.events):
+                yield job.events[seen]
+                seen += 1
+            if job.status in TERMINAL_STATUSES:
+                return
+            await job.wait_for_events(seen)
+
+    async def _worker(self, worker_no: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                logger.exception("Job worker {} crashed on {}: {}", worker_no, job.id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: Job) -> None:
+        def on_progress(event: dict[str, Any]) -> None:
+            job.stage = event.get("stage", job.stage)
+            job.publish(event)
+
+        job.status = "running"
+        self.store.save(job)
+        while True:
+            try:
+                job.result = await self.orchestrator.run_file(
+                    file_id=job.file_id,
+                    pdf_path=pathlib.Path(job.pdf_path),
+                    original_filename=job.original_filename,
+                    slug=job.slug,
+                    progress=on_progress,
+                )
+                job.status = "succeeded"
+                break
+            except OrchestratorBusyError:
+                await asyncio.sleep(self.busy_retry_seconds)
+            except Exception as e:
+                logger.warning("Job {} failed: {}", job.id, e)
+                job.status, job.error = "failed", str(e)
+                break
+        self.store.save(job)
+        job.publish({"stage": job.stage, "status": job.status, "error": job.error})
@@ -1,102 +1,753 @@
+import asyncio
 import hashlib
+import importlib
 import json
 import pathlib
-from typing import Any, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
 
 from loguru import logger
 
-from clients.gemini_client import GeminiClient
+from clients.gemini_client import DEFAULT_BASE_URL, DEFAULT_MODEL, GeminiClient
 from schemas.extract_schema import EXTRACT_SCHEMA
-from utils.pdf import read_pdf_text
+from utils.pdf import DEFAULT_PARALLEL_THRESHOLD, iter_pdf_pages, pdf_page_count
+from utils.page_index import (
+    INDEX_VERSION,
+    build_page_index,
+    financial_table_pages,
+    load_page_index,
+    save_page_index,
+    select_page_ranges,
+)
 from utils.metrics import compute_metrics
+from utils.extract_merge import build_windows, merge_extractions, summary_priority
 from utils.decision_engine import DecisionEngine
+from utils.table_extract import TABLE_PARSER_VERSION, extract_financial_tables, extract_offer_terms
+from utils.text_normalize import NORMALIZE_VERSION, find_boilerplate, normalize_pages
 from tools.mcp_memory import MCPLibsqlTools
+from utils.memory_budget import MemoryBudget
+from utils.singleflight import SingleFlight
+from utils.telemetry import (
+    ANALYSES_IN_FLIGHT,
+    ANALYSIS_SECONDS,
+    CACHE_LOOKUPS,
+    LLM_CALLS,
+    NORMALIZE_TOKENS,
+    PAGE_STORE_LOOKUPS,
+    StageTimer,
+    record_usage,
+)
+from services.extraction_cache import ExtractionCache, fingerprint
+from services.page_store import PageReader, PageStore
+from services.peer_index import PeerIndex
+from services.report_store import REPORT_FORMAT_VERSION, ReportStore
+from services.rescore import decision_version, metrics_version
+
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+# Page text held for a stage lives roughly three times: raw pages, normalized pages, the joined prompt
+TEXT_COPIES = 3
+# During the LLM call only the prompt remains, plus the request message the client builds from it
+PROMPT_COPIES = 2
+# Prompt-hash column of table-derived cache entries, so superseded ones can be found and dropped
+TABLE_KEY_PREFIX = "tables:"
+ComponentCallback = Callable[[dict[str, Any]], None]
+
+
+def _emit(progress: Optional[ProgressCallback], stage: str, status: str, **detail: Any) -> None:
+    if progress is None:
+        return
+    try:
+        progress({"stage": stage, "status": status, **detail})
+    except Exception as e:
+        logger.warning("Progress callback failed for {}: {}", stage, e)
+
+
+def _emit_component(on_component: Optional[ComponentCallback], block: dict[str, Any]) -> None:
+    if on_component is None:
+        return
+    try:
+        on_component(block)
+    except Exception as e:
+        logger.warning("Component callback failed for {}: {}", block.get("component"), e)
+
+
+def _score_blocks(metrics: dict[str, Any], decision: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "component": "financial_quality",
+            "metrics": metrics,
+            "valuation": {},
+            "reasons": ["Deterministic calculations on extracted financials"],
+        },
+        {
+            "component": "verdict",
+            "verdict": decision["label"],
+            "confidence": decision["confidence"],
+            "why": decision["reasons"],
+            "plain_english": " ".join(decision["reasons"][:2]) if decision["reasons"] else "",
+        },
+    ]
+
+
+class OrchestratorBusyError(RuntimeError):
+    def __init__(self, pending: int, limit: int) -> None:
+        super().__init__(f"Server busy: {pending} analyses in progress (limit {limit})")
+        self.pending = pending
+        self.limit = limit
 
 
 class AnalyzeOrchestrator:
-    def __init__(self, libsql_url: str) -> None:
+    def __init__(
+        self,
+        libsql_url: str,
+        llm_concurrency: int = 4,
+        pdf_concurrency: int = 2,
+        max_pending: int = 16,
+        pdf_workers: Optional[int] = None,
+        pdf_parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD,
+        cache: Optional[ExtractionCache] = None,
+        chunk_threshold_chars: int = 400_000,
+        chunk_window_chars: int = 120_000,
+        chunk_overlap_pages: int = 1,
+        gemini_model: str = DEFAULT_MODEL,
+        gemini_base_url: str = DEFAULT_BASE_URL,
+        llm_requests_per_minute: Optional[float] = None,
+        llm_tokens_per_minute: Optional[float] = None,
+        llm_max_retries: int = 5,
+        llm_timeout_s: float = 120.0,
+        table_fast_path: bool = True,
+        table_skip_confidence: float = 0.9,
+        table_shrink_confidence: float = 0.75,
+        table_max_pages: int = 8,
+        page_store: Optional[PageStore] = None,
+        normalize_text: bool = True,
+        report_store: Optional[ReportStore] = None,
+        peer_index: Optional[PeerIndex] = None,
+        text_memory_bytes: Optional[int] = None,
+    ) -> None:
         self.libsql_url = libsql_url
         self.mcp_tools = MCPLibsqlTools(libsql_url)
-        self.gemini = GeminiClient()
+        # The client enforces LLM concurrency (adaptively, up to `llm_concurrency`) and quota
+        self.gemini = GeminiClient(
+            model=gemini_model,
+            base_url=gemini_base_url,
+            max_concurrency=llm_concurrency,
+            requests_per_minute=llm_requests_per_minute,
+            tokens_per_minute=llm_tokens_per_minute,
+            max_retries=llm_max_retries,
+            timeout_s=llm_timeout_s,
+        )
         self.decision_engine = DecisionEngine()
+        self.ensure_dirs()
+        self.cache = cache or ExtractionCache()
+        # Page texts (and parsed tables) per document, so re-extraction never reopens the PDF
+        self.page_store = page_store or PageStore()
+        self._flights = SingleFlight()
+        self.max_pending = max_pending
+        self._pending = 0
+        self._pdf_slots = asyncio.Semaphore(pdf_concurrency)
+        self.pdf_workers = pdf_workers
+        self.pdf_parallel_threshold = pdf_parallel_threshold
+        # Documents longer than this are extracted in overlapping windows and merged
+        self.chunk_threshold_chars = chunk_threshold_chars
+        self.chunk_window_chars = chunk_window_chars
+        self.chunk_overlap_pages = chunk_overlap_pages
+        # Summary tables parsed with enough confidence replace the LLM's financials:
+        # above `table_skip_confidence` the LLM is not called when the cover and overview pages name
+        # the company, price band and industry; above `table_shrink_confidence` it only sees the
+        # offer-terms and company pages
+        self.table_fast_path = table_fast_path
+        self.table_skip_confidence = table_skip_confidence
+        self.table_shrink_confidence = table_shrink_confidence
+        self.table_max_pages = table_max_pages
+        # Everything that decides what a table-derived extraction contains; part of its cache key
+        self.table_config = {
+            "parser": TABLE_PARSER_VERSION,
+            "skip_confidence": table_skip_confidence,
+            "shrink_confidence": table_shrink_confidence,
+            "max_pages": table_max_pages,
+        }
+        # Running headers/footers, page numbers and table padding are stripped before the LLM sees the text
+        self.normalize_text = normalize_text
+        # The prompt text also depends on page selection and normalization, so their versions are part of it
+        self.prompt_hash = fingerprint(
+            {
+                "system": self.gemini.default_system_prompt,
+                "index": INDEX_VERSION,
+                "normalize": NORMALIZE_VERSION if normalize_text else None,
+            }
+        )
+        self.schema_hash = fingerprint(EXTRACT_SCHEMA)
+        self.cache.import_legacy()
+        dropped = self.cache.drop_superseded(TABLE_KEY_PREFIX, self.table_hash)
+        if dropped:
+            logger.info("Dropped {} cached extractions from older table parser settings", dropped)
+        # Finished responses by document hash; anything that changes their content changes the version
+        self.report_store = report_store or ReportStore()
+        self.report_version = fingerprint(
+            {
+                "format": REPORT_FORMAT_VERSION,
+                "model": self.gemini.model,
+                "prompt": self.prompt_hash,
+                "schema": self.schema_hash,
+                "tables": self.table_config if table_fast_path else None,
+                "metrics": metrics_version(),
+                "decision": decision_version(self.decision_engine),
+            }
+        )[:16]
+        # Every analysis adds its metrics; financial_quality ranks against the filings seen so far
+        self.peer_index = peer_index or PeerIndex()
+        # Ceiling on page text decoded at once across all analyses; documents over it wait their turn
+        self.text_budget = MemoryBudget(text_memory_bytes)
 
     def ensure_dirs(self) -> None:
         pathlib.Path("uploads").mkdir(parents=True, exist_ok=True)
         pathlib.Path("memory").mkdir(parents=True, exist_ok=True)
         pathlib.Path("memory/responses").mkdir(parents=True, exist_ok=True)
+        pathlib.Path("memory/page_index").mkdir(parents=True, exist_ok=True)
+        pathlib.Path("memory/pages").mkdir(parents=True, exist_ok=True)
+        pathlib.Path("memory/reports").mkdir(parents=True, exist_ok=True)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def table_hash(self) -> str:
+        # Stands in for the prompt hash of table-derived extractions; "tables+llm" used the prompt too
+        return TABLE_KEY_PREFIX + fingerprint({"prompt": self.prompt_hash, "tables": self.table_config})
+
+    def _cache_keys(self, file_id: str) -> tuple[Optional[str], str]:
+        # (table-derived key, LLM key). A table result is only served while the parser and its
+        # thresholds are unchanged; an LLM result doesn't depend on them
+        llm_key = self.cache.make_key(file_id, self.gemini.model, self.prompt_hash, self.schema_hash)
+        if not self.table_fast_path:
+            return None, llm_key
+        return self.cache.make_key(file_id, self.gemini.model, self.table_hash, self.schema_hash), llm_key
+
+    def _cache_get_memory(self, file_id: str) -> Optional[dict[str, Any]]:
+        for key in self._cache_keys(file_id):
+            if key is not None and (value := self.cache.get_memory(key)) is not None:
+                return value
+        return None
+
+    def _cache_get(self, file_id: str) -> Optional[dict[str, Any]]:
+        for key in self._cache_keys(file_id):
+            if key is not None and (value := self.cache.get(key)) is not None:
+                return value
+        return None
+
+    async def warm_up(self) -> dict[str, float]:
+        # Heavy imports and client construction, done off the event loop once the server is
+        # accepting connections; requests arriving earlier load whatever they need themselves
+        timings: dict[str, float] = {}
+        steps = (
+            ("llm_client", getattr(self.gemini, "warm", None)),
+            ("pdf", lambda: importlib.import_module("fitz")),
+            ("peer_index", self.peer_index.load),
+        )
+        for name, step in steps:
+            if step is None:
+                continue
+            started = time.perf_counter()
+            await asyncio.to_thread(step)
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        started = time.perf_counter()
+        await self.mcp_tools.start()
+        timings["mcp"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("Warm-up finished: {}", timings)
+        return timings
+
+    def _ingest(self, file_id: str, pdf_path: pathlib.Path) -> None:
+        # Pages go straight from the parser into the page store; the document's text is never
+        # held in memory as a whole
+        count = pdf_page_count(pdf_path)
+        pages = iter_pdf_pages(pdf_path, workers=self.pdf_workers, parallel_threshold=self.pdf_parallel_threshold)
+        self.page_store.write(file_id, pages, count=count)
+        logger.info("Stored {} pages of {}", count, pdf_path)
+
+    def _load_index(self, file_id: str, reader: PageReader) -> dict[str, Any]:
+        index_path = pathlib.Path("memory/page_index") / f"{file_id}.json"
+        index = load_page_index(index_path)
+        if index is None or index.get("page_count") != len(reader):
+            index = build_page_index(reader.iter_pages())
+            try:
+                save_page_index(index_path, index)
+            except Exception as e:
+                logger.warning("Failed to write page index {}: {}", index_path, e)
+        return index
+
+    def _load_boilerplate(self, file_id: str, reader: PageReader) -> set[str]:
+        # Repeated lines are judged against the whole document, not just the selected pages
+        stored = self.page_store.load_json(file_id, "boilerplate", NORMALIZE_VERSION)
+        if stored is not None:
+            return set(stored)
+        boilerplate = find_boilerplate(reader.iter_pages())
+        try:
+            self.page_store.save_json(file_id, "boilerplate", NORMALIZE_VERSION, sorted(boilerplate))
+        except Exception as e:
+            logger.warning("Failed to store boilerplate lines for {}: {}", file_id, e)
+        return boilerplate
+
+    def _select_pages(self, file_id: str, index: dict[str, Any]) -> list[int]:
+        ranges = select_page_ranges(index)
+        if not ranges:
+            logger.info("No targeted sections found for {}, sending full text", file_id)
+            return list(range(index["page_count"]))
+        selected = [i for start, end in ranges for i in range(start, end)]
+        logger.info("Selected {} of {} pages for extraction: {}", len(selected), index["page_count"], ranges)
+        return selected
+
+    def _terms_pages(self, index: dict[str, Any]) -> list[int]:
+        ranges = select_page_ranges(index, sections=("terms", "meta")) or [(0, min(3, index["page_count"]))]
+        return [i for start, end in ranges for i in range(start, end)]
+
+    async def _open_pages(self, file_id: str, pdf_path: pathlib.Path, timer: StageTimer) -> tuple[PageReader, dict[str, Any]]:
+        with timer.stage("page_store"):
+            reader = await asyncio.to_thread(self.page_store.open, file_id)
+        PAGE_STORE_LOOKUPS.labels("miss" if reader is None else "hit").inc()
+        if reader is None:
+            with timer.stage("pdf_parse"):
+                async with self._pdf_slots:
+                    await asyncio.to_thread(self._ingest, file_id, pdf_path)
+            reader = await asyncio.to_thread(self.page_store.open, file_id)
+            if reader is None:
+                raise RuntimeError(f"Page store for {file_id} unreadable right after writing it")
+        else:
+            logger.info("Opened {} stored pages for {}", len(reader), file_id)
+        try:
+            with timer.stage("page_select"):
+                index = await asyncio.to_thread(self._load_index, file_id, reader)
+        except BaseException:
+            reader.close()
+            raise
+        return reader, index
+
+    @asynccontextmanager
+    async def _prompt_texts(
+        self,
+        file_id: str,
+        reader: PageReader,
+        index: dict[str, Any],
+        page_numbers: list[int],
+        boilerplate: set[str],
+        progress: Optional[ProgressCallback],
+        timer: StageTimer,
+    ) -> AsyncIterator[tuple[list[tuple[tuple[int, int], str]], bool]]:
+        # Only the pages a stage needs are decoded, and only once their share of the text memory
+        # ceiling is granted. Page texts are dropped as soon as the prompts are built, and the
+        # reservation shrinks to the prompts for the LLM call and its retries
+        chars = sum(index["pages"][i]["chars"] for i in page_numbers)
+        async with self.text_budget.reserve(chars * TEXT_COPIES) as reservation:
+            pages = await asyncio.to_thread(lambda: [(i, reader.page(i)) for i in page_numbers])
+            pages = await self._normalize(file_id, pages, boilerplate, progress, timer)
+            prompts, chunked = self._prompts(pages)
+            del pages
+            await reservation.shrink(sum(len(text) for _, text in prompts) * PROMPT_COPIES)
+            yield prompts, chunked
+
+    async def _parse_tables(self, file_id: str, pdf_path: pathlib.Path, index: dict[str, Any]) -> Optional[dict[str, Any]]:
+        # The stored result is a dict (possibly {"found": False}) so "nothing found" is remembered too
+        stored = await asyncio.to_thread(self.page_store.load_json, file_id, "tables", TABLE_PARSER_VERSION)
+        if stored is not None:
+            return stored.get("result")
+        candidates = financial_table_pages(index, limit=self.table_max_pages)
+        result = None
+        if candidates:
+            try:
+                async with self._pdf_slots:
+                    result = await asyncio.to_thread(extract_financial_tables, str(pdf_path), candidates)
+            except Exception as e:
+                logger.warning("Table parsing failed for {}: {}", pdf_path, e)
+                return None
+        try:
+            await asyncio.to_thread(
+                self.page_store.save_json,
+                file_id,
+                "tables",
+                TABLE_PARSER_VERSION,
+                {"found": result is not None, "result": result},
+            )
+        except Exception as e:
+            logger.warning("Failed to store parsed tables for {}: {}", file_id, e)
+        return result
+
+    async def _extract(self, text: str, usage: Optional[dict[str, int]] = None) -> dict[str, Any]:
+        call_usage: dict[str, int] = {}
+        try:
+            structured = await self.gemini.extract_structured(text, EXTRACT_SCHEMA, usage=call_usage)
+        except Exception:
+            LLM_CALLS.labels("error").inc()
+            raise
+        LLM_CALLS.labels("ok").inc()
+        record_usage(call_usage)
+        if usage is not None:
+            for k, v in call_usage.items():
+                usage[k] = usage.get(k, 0) + v
+        return structured
+
+    async def _extract_chunked(self, windows: list[tuple[tuple[int, int], str]], usage: dict[str, int]) -> dict[str, Any]:
+        async def run_window(text: str) -> dict[str, Any]:
+            window_usage: dict[str, int] = {}
+            structured = await self._extract(text, usage=window_usage)
+            for k, v in window_usage.items():
+                usage[k] = usage.get(k, 0) + v
+            return structured
+
+        results = await asyncio.gather(*(run_window(text) for _, text in windows), return_exceptions=True)
+        parts: list[tuple[int, dict[str, Any]]] = []
+        errors: list[BaseException] = []
+        for ((first, last), text), result in zip(windows, results):
+            if isinstance(result, BaseException):
+                logger.warning("Window pages {}-{} failed: {}", first, last, result)
+                errors.append(result)
+                continue
+            parts.append((summary_priority(text), result))
+        if not parts:
+            raise errors[0]
+        return merge_extractions(parts)
+
+    async def _normalize(
+        self,
+        file_id: str,
+        pages: list[tuple[int, str]],
+        boilerplate: set[str],
+        progress: Optional[ProgressCallback],
+        timer: StageTimer,
+    ) -> list[tuple[int, str]]:
+        if not self.normalize_text:
+            return pages
+        with timer.stage("normalize"):
+            normalized, stats = await asyncio.to_thread(normalize_pages, pages, boilerplate)
+        NORMALIZE_TOKENS.labels("before").inc(stats["tokens_before"])
+        NORMALIZE_TOKENS.labels("after").inc(stats["tokens_after"])
+        logger.info("Normalized text for {}: {}", file_id, stats)
+        _emit(progress, "extract", "normalized", **stats)
+        return normalized
+
+    def _prompts(self, pages: list[tuple[int, str]]) -> tuple[list[tuple[tuple[int, int], str]], bool]:
+        # ((first page, last page), text) per LLM call; more than one only for oversized documents
+        total_chars = sum(len(t) for _, t in pages)
+        if total_chars > self.chunk_threshold_chars and len(pages) > 1:
+            windows = build_windows(pages, self.chunk_window_chars, self.chunk_overlap_pages)
+            logger.info("Extracting {} pages in {} overlapping windows", len(pages), len(windows))
+            return [((w[0][0], w[-1][0]), "\n\n".join(t for _, t in w)) for w in windows], True
+        span = (pages[0][0], pages[-1][0]) if pages else (0, 0)
+        return [(span, "\n\n".join(t for _, t in pages))], False
+
+    async def _extract_prompts(
+        self, prompts: list[tuple[tuple[int, int], str]], chunked: bool, usage: dict[str, int]
+    ) -> dict[str, Any]:
+        if chunked:
+            return await self._extract_chunked(prompts, usage)
+        return await self._extract(prompts[0][1], usage=usage)
+
+    async def _extract_and_cache(
+        self,
+        file_id: str,
+        pdf_path: pathlib.Path,
+        progress: Optional[ProgressCallback] = None,
+        timer: Optional[StageTimer] = None,
+        on_financials: Optional[Callable[[list[dict[str, Any]]], None]] = None,
+    ) -> dict[str, Any]:
+        timer = timer or StageTimer()
+        _emit(progress, "parse", "started")
+        reader, index = await self._open_pages(file_id, pdf_path, timer)
+        try:
+            return await self._extract_from_pages(
+                file_id, reader, index, pdf_path, progress, timer, on_financials
+            )
+        finally:
+            reader.close()
+
+    async def _extract_from_pages(
+        self,
+        file_id: str,
+        reader: PageReader,
+        index: dict[str, Any],
+        pdf_path: pathlib.Path,
+        progress: Optional[ProgressCallback],
+        timer: StageTimer,
+        on_financials: Optional[Callable[[list[dict[str, Any]]], None]],
+    ) -> dict[str, Any]:
+        selected = self._select_pages(file_id, index)
+        _emit(progress, "parse", "done", pages=len(selected), chars=sum(index["pages"][i]["chars"] for i in selected))
+        _emit(progress, "extract", "started")
+        usage: dict[str, int] = {}
+        boilerplate: set[str] = set()
+        if self.normalize_text:
+            with timer.stage("normalize"):
+                boilerplate = await asyncio.to_thread(self._load_boilerplate, file_id, reader)
+
+        tables = None
+        if self.table_fast_path:
+            with timer.stage("table_parse"):
+                tables = await self._parse_tables(file_id, pdf_path, index)
+        confidence = tables["confidence"] if tables else 0.0
+        structured: Optional[dict[str, Any]] = None
+        cover: Optional[dict[str, Any]] = None
+        method = "llm"
+        if tables and confidence >= self.table_skip_confidence:
+            overview = select_page_ranges(index, sections=("meta",), cover_pages=0, max_pages=9) or []
+            cover = extract_offer_terms(
+                "\n".join(reader.iter_pages(0, 3)),
+                "\n".join(reader.page(i) for start, end in overview for i in range(start, end)),
+            )
+            # Without an industry the filing could only be ranked overall, so that case goes to the LLM
+            if cover["meta"]["company"] and cover["meta"]["industry"] and cover["terms"]["price_band"]:
+                structured = {"extracted": {**cover, "financials": tables["financials"]}}
+                method = "tables"
+        if structured is None and tables and confidence >= self.table_shrink_confidence:
+            # Financials are final already; only terms wait on the LLM
+            if on_financials is not None:
+                on_financials(tables["financials"])
+            terms_pages = self._terms_pages(index)
+            async with self._prompt_texts(file_id, reader, index, terms_pages, boilerplate, progress, timer) as (prompts, chunked):
+                with timer.stage("llm"):
+                    partial = await self._extract_prompts(prompts, chunked, usage)
+            extracted = partial.get("extracted") or {}
+            meta = extracted.get("meta") or {}
+            if cover is not None and not meta.get("industry"):
+                meta["industry"] = cover["meta"]["industry"]
+            structured = {
+                "extracted": {
+                    "meta": meta,
+                    "terms": extracted.get("terms") or {},
+                    "financials": tables["financials"],
+                }
+            }
+            method = "tables+llm"
+        if structured is None:
+            async with self._prompt_texts(file_id, reader, index, selected, boilerplate, progress, timer) as (prompts, chunked):
+                with timer.stage("llm"):
+                    structured = await self._extract_prompts(prompts, chunked, usage)
+        if tables:
+            logger.info(
+                "Summary tables for {}: confidence {} on page {} ({}), extraction via {}",
+                file_id,
+                confidence,
+                tables["page"],
+                tables["unit"],
+                method,
+            )
+            structured["extraction"] = {"method": method, "table_confidence": confidence, "table_page": tables["page"]}
+        logger.info("LLM usage for {}: {}", file_id, usage)
+        _emit(progress, "extract", "llm_done", usage=usage, method=method)
+        table_key, llm_key = self._cache_keys(file_id)
+        cache_key, prompt_hash = (llm_key, self.prompt_hash) if method == "llm" else (table_key, self.table_hash)
+        try:
+            with timer.stage("cache_write"):
+                cache_path = await asyncio.to_thread(
+                    self.cache.put,
+                    cache_key,
+                    structured,
+                    file_id,
+                    self.gemini.model,
+                    prompt_hash,
+                    self.schema_hash,
+                )
+            logger.info("Cached structured output at {}", cache_path)
+        except Exception as e:
+            logger.warning("Failed to write cache for {}: {}", file_id, e)
+        return structured
 
     async def run(
         self,
         file_bytes: bytes,
         original_filename: Optional[str],
         slug: Optional[str] = None,
+        include_timings: bool = False,
     ) -> dict[str, Any]:
         self.ensure_dirs()
-        # Validate input
         if not original_filename or not original_filename.lower().endswith(".pdf"):
             raise ValueError("Only PDF files are accepted")
-
-        file_id = hashlib.sha256(file_bytes).hexdigest()
+        timer = StageTimer()
+        with timer.stage("hash"):
+            file_id = await asyncio.to_thread(lambda: hashlib.sha256(file_bytes).hexdigest())
         pdf_path = pathlib.Path("uploads") / f"{file_id}.pdf"
         if not pdf_path.exists():
-            pdf_path.write_bytes(file_bytes)
+            with timer.stage("persist"):
+                await asyncio.to_thread(pdf_path.write_bytes, file_bytes)
             logger.info("Saved uploaded PDF {} ({} bytes)", pdf_path, len(file_bytes))
+        # Everything downstream reads the stored file; don't pin the upload for the whole analysis
+        del file_bytes
+        return await self.run_file(file_id, pdf_path, original_filename, slug, timer=timer, include_timings=include_timings)
 
-        computed_slug = slug or (pathlib.Path(original_filename).stem.replace(" ", "-").lower() if original_filename else file_id)
+    async def run_file(
+        self,
+        file_id: str,
+        pdf_path: pathlib.Path,
+        original_filename: Optional[str],
+        slug: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+        timer: Optional[StageTimer] = None,
+        include_timings: bool = False,
+        on_component: Optional[ComponentCallback] = None,
+    ) -> dict[str, Any]:
+        if self._pending >= self.max_pending:
+            raise OrchestratorBusyError(self._pending, self.max_pending)
+        self._pending += 1
+        ANALYSES_IN_FLIGHT.inc()
+        timer = timer or StageTimer()
+        outcome = "error"
+        try:
+            result = await self._run(file_id, pdf_path, original_filename, slug, progress, timer, on_component)
+            outcome = "ok"
+        finally:
+            self._pending -= 1
+            ANALYSES_IN_FLIGHT.dec()
+            ANALYSIS_SECONDS.labels(outcome).observe(time.perf_counter() - timer.started)
+        try:
+            await asyncio.to_thread(self.report_store.put, file_id, result, self.report_version, original_filename)
+        except Exception as e:
+            logger.warning("Failed to store report for {}: {}", file_id, e)
+        if include_timings:
+            result["timings_ms"] = timer.report()
+        return result
 
-        # Cache: check for prior structured response
-        cache_file = pathlib.Path("memory/responses") / f"{file_id}.json"
-        structured: dict[str, Any]
-        if cache_file.exists():
-            try:
-                structured = json.loads(cache_file.read_text())
-                logger.info("Cache hit for {}", file_id)
-            except Exception:
-                logger.warning("Failed to read cache for {}, recomputing", file_id)
-                text = read_pdf_text(pdf_path)
-                structured = self.gemini.extract_structured(text, EXTRACT_SCHEMA)
-                cache_file.write_text(json.dumps(structured))
-        else:
-            text = read_pdf_text(pdf_path)
-            structured = self.gemini.extract_structured(text, EXTRACT_SCHEMA)
+    async def cached_report(self, file_id: str) -> Optional[tuple[bytes, str]]:
+        # (body, etag) of the stored response. A stale one is rebuilt when the extraction is still
+        # cached, which costs no LLM call; otherwise the client has to upload the PDF
+        report = await asyncio.to_thread(self.report_store.get, file_id, self.report_version)
+        if report is not None:
+            return report
+        pdf_path = pathlib.Path("uploads") / f"{file_id}.pdf"
+        if not pdf_path.exists():
+            return None
+        if self._cache_get_memory(file_id) is None and await asyncio.to_thread(self._cache_get, file_id) is None:
+            return None
+        previous = await asyncio.to_thread(self.report_store.get, file_id)
+        slug = json.loads(previous[0]).get("slug") if previous is not None else None
+        # Reports stored before the upload filename was recorded fall back to the stored PDF's name
+        meta = await asyncio.to_thread(self.report_store.meta, file_id)
+        filename = (meta or {}).get("filename") or pdf_path.name
+        logger.info("Rebuilding stale report for {}", file_id)
+        await self.run_file(file_id, pdf_path, filename, slug)
+        return await asyncio.to_thread(self.report_store.get, file_id, self.report_version)
+
+    async def _run(
+        self,
+        file_id: str,
+        pdf_path: pathlib.Path,
+        original_filename: Optional[str],
+        slug: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+        timer: Optional[StageTimer] = None,
+        on_component: Optional[ComponentCallback] = None,
+    ) -> dict[str, Any]:
+        timer = timer or StageTimer()
+        self.ensure_dirs()
+        # Validate input
+        if not original_filename or not original_filename.lower().endswith(".pdf"):
+            raise ValueError("Only PDF files are accepted")
+
+        scored: dict[str, Any] = {}
+
+        def score(financials: list[dict[str, Any]]) -> bool:
+            # Metrics and verdict depend on financials alone, so they can be built before offer terms exist
+            fresh = scored.get("financials") != financials
+            if fresh:
+                _emit(progress, "metrics", "started")
+                with timer.stage("metrics"):
+                    metrics = compute_metrics(financials)
+                _emit(progress, "metrics", "done")
+                _emit(progress, "verdict", "started")
+                with timer.stage("decision"):
+                    decision = self.decision_engine.decide(metrics)
+                _emit(progress, "verdict", "done", label=decision["label"])
+                scored.update(financials=financials, metrics=metrics, blocks=_score_blocks(metrics, decision))
+            return fresh
+
+        def publish(fresh: bool, peers: Optional[dict[str, Any]]) -> list[dict[str, Any]]:
+            # Peer ranks are only industry-wide until the LLM has named the industry; when that
+            # changes them, financial_quality goes out again
+            quality, verdict = scored["blocks"]
+            if fresh or quality.get("peers") != peers:
+                quality = {**quality, "peers": peers}
+                scored["blocks"] = [quality, verdict]
+                _emit_component(on_component, quality)
+                if fresh:
+                    _emit_component(on_component, verdict)
+            return scored["blocks"]
+
+        def score_early(financials: list[dict[str, Any]]) -> None:
+            # Runs on the event loop: no peer ranks rather than waiting for the index to load
             try:
-                cache_file.write_text(json.dumps(structured))
-                logger.info("Cached structured output at {}", cache_file)
+                fresh = score(financials)
+                publish(fresh, self.peer_index.percentiles(scored["metrics"], exclude=file_id, wait=False))
             except Exception as e:
-                logger.warning("Failed to write cache {}: {}", cache_file, e)
+                logger.warning("Early scoring failed for {}: {}", file_id, e)
+
+        computed_slug = slug or (pathlib.Path(original_filename).stem.replace(" ", "-").lower() if original_filename else file_id)
+
+        # Cache: keyed by document, model, prompt and schema so prompt/schema changes miss;
+        # table-derived results also by the table parser settings
+        with timer.stage("cache_lookup"):
+            structured = self._cache_get_memory(file_id)
+            cache_result = "memory"
+            if structured is None:
+                structured = await asyncio.to_thread(self._cache_get, file_id)
+                cache_result = "disk"
+        if structured is not None:
+            CACHE_LOOKUPS.labels(cache_result).inc()
+            logger.info("Cache hit for {}", file_id)
+            _emit(progress, "extract", "done", cached=True)
+        else:
+            # Identical documents arriving together share one extraction
+            with timer.stage("extract"):
+                structured, shared = await self._flights.do(
+                    self._cache_keys(file_id)[1],
+                    lambda: self._extract_and_cache(file_id, pdf_path, progress, timer, score_early),
+                )
+            CACHE_LOOKUPS.labels("shared" if shared else "miss").inc()
+            if shared:
+                logger.info("Joined in-flight extraction for {}", file_id)
+            _emit(progress, "extract", "done", cached=False, shared=shared)
 
         extracted = structured.get("extracted", {})
         meta = extracted.get("meta", {})
         terms = extracted.get("terms", {})
         financials = extracted.get("financials", [])
+        extraction = structured.get("extraction") or {}
+        if extraction.get("method") == "tables":
+            source_reason = f"Financials parsed from summary tables without an LLM call (confidence {extraction['table_confidence']})"
+        elif extraction.get("method") == "tables+llm":
+            source_reason = (
+                f"Financials parsed from summary tables (confidence {extraction['table_confidence']}); "
+                "offer terms via schema-constrained extraction"
+            )
+        else:
+            source_reason = "Parsed from PDF via schema-constrained extraction"
 
-        metrics = compute_metrics(financials)
-        decision = self.decision_engine.decide(metrics)
-
-        mcp_info = await self.mcp_tools.list_tools()
-
+        # Each block is handed out as soon as it is built so streaming clients can render it early;
+        # with table-parsed financials the scoring blocks may already have gone out
         blocks = [
             {
                 "component": "terms_and_financials",
                 "company": meta.get("company"),
                 "terms": terms,
                 "financials": financials,
-                "reasons": ["Parsed from PDF via schema-constrained extraction"],
-            },
-            {
-                "component": "financial_quality",
-                "metrics": metrics,
-                "valuation": {},
-                "reasons": ["Deterministic calculations on extracted financials"],
-            },
-            {
-                "component": "verdict",
-                "verdict": decision["label"],
-                "confidence": decision["confidence"],
-                "why": decision["reasons"],
-                "plain_english": " ".join(decision["reasons"][:2]) if decision["reasons"] else "",
-            },
+                "reasons": [source_reason],
+            }
         ]
+        _emit_component(on_component, blocks[-1])
+
+        fresh = score(financials)
+        try:
+            peers = await asyncio.to_thread(self.peer_index.percentiles, scored["metrics"], meta.get("industry"), file_id)
+        except Exception as e:
+            logger.warning("Peer ranking failed for {}: {}", file_id, e)
+            peers = None
+        blocks.extend(publish(fresh, peers))
+        try:
+            await asyncio.to_thread(self.peer_index.add, file_id, meta.get("industry"), scored["metrics"])
+        except Exception as e:
+            logger.warning("Failed to add {} to the peer index: {}", file_id, e)
+
+        with timer.stage("mcp"):
+            mcp_info = await self.mcp_tools.list_tools()
 
         return {
             "slug": computed_slug,
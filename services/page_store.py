@@ -0,0 +1,171 @@
+import json
+import mmap
+import os
+import pathlib
+import struct
+import threading
+import zlib
+from typing import Any, Iterable, Iterator, Optional
+
+from loguru import logger
+
+# One file per document: header, (pages + 1) u64 offsets into the data section,
+# then each page's UTF-8 text zlib-compressed on its own so any page decodes alone
+MAGIC = b"IPOPAGES"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+
+
+class CorruptPageStoreError(ValueError):
+    pass
+
+
+class PageReader:
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise CorruptPageStoreError(f"{path}: empty page store") from e
+        try:
+            magic, version, count = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise CorruptPageStoreError(f"{path}: unrecognised header")
+            self._offsets = struct.unpack_from(f"<{count + 1}Q", self._mm, _HEADER.size)
+            self._data = _HEADER.size + 8 * (count + 1)
+            if self._data + self._offsets[-1] != len(self._mm):
+                raise CorruptPageStoreError(f"{path}: truncated page data")
+        except (struct.error, CorruptPageStoreError):
+            self.close()
+            raise
+        self.page_count = count
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def __enter__(self) -> "PageReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def page(self, i: int) -> str:
+        if not 0 <= i < self.page_count:
+            raise IndexError(i)
+        start, end = self._data + self._offsets[i], self._data + self._offsets[i + 1]
+        try:
+            return zlib.decompress(self._mm[start:end]).decode("utf-8")
+        except zlib.error as e:
+            raise CorruptPageStoreError(f"{self.path}: page {i} does not decompress") from e
+
+    def iter_pages(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        end = self.page_count if end is None else min(end, self.page_count)
+        for i in range(max(0, start), end):
+            yield self.page(i)
+
+    def pages(self, start: int = 0, end: Optional[int] = None) -> list[str]:
+        return list(self.iter_pages(start, end))
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+class PageStore:
+    def __init__(self, root: str = "memory/pages", compress_level: int = 6) -> None:
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "corrupt": 0}
+
+    def path(self, file_id: str) -> pathlib.Path:
+        return self.root / f"{file_id}.pages"
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def write(self, file_id: str, pages: Iterable[str], count: Optional[int] = None) -> pathlib.Path:
+        # With `count` known up front the pages can be a generator: each is compressed and
+        # written as it arrives, and the offset table is filled in at the end
+        if count is None:
+            pages = list(pages)
+            count = len(pages)
+        path = self.path(file_id)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, count))
+                f.write(bytes(8 * (count + 1)))
+                offsets = [0]
+                for text in pages:
+                    blob = zlib.compress(text.encode("utf-8"), self.compress_level)
+                    f.write(blob)
+                    offsets.append(offsets[-1] + len(blob))
+                if len(offsets) != count + 1:
+                    raise ValueError(f"Expected {count} pages for {file_id}, got {len(offsets) - 1}")
+                f.seek(_HEADER.size)
+                f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._count("writes")
+        return path
+
+    def open(self, file_id: str) -> Optional[PageReader]:
+        path = self.path(file_id)
+        if not path.exists():
+            self._count("misses")
+            return None
+        try:
+            reader = PageReader(path)
+        except (OSError, CorruptPageStoreError) as e:
+            logger.warning("Discarding unreadable page store {}: {}", path, e)
+            self._count("corrupt")
+            path.unlink(missing_ok=True)
+            return None
+        self._count("hits")
+        return reader
+
+    def read(self, file_id: str, start: int = 0, end: Optional[int] = None) -> Optional[list[str]]:
+        reader = self.open(file_id)
+        if reader is None:
+            return None
+        try:
+            with reader:
+                return reader.pages(start, end)
+        except CorruptPageStoreError as e:
+            logger.warning("Discarding unreadable page store {}: {}", reader.path, e)
+            self._count("corrupt")
+            self.path(file_id).unlink(missing_ok=True)
+            return None
+
+    def load_json(self, file_id: str, kind: str, version: int) -> Optional[Any]:
+        # Small derived results (e.g. parsed tables) kept next to the pages
+        try:
+            data = json.loads((self.root / f"{file_id}.{kind}.json").read_text())
+        except Exception:
+            return None
+        if data.get("version") != version:
+            return None
+        return data.get("value")
+
+    def save_json(self, file_id: str, kind: str, version: int, value: Any) -> None:
+        path = self.root / f"{file_id}.{kind}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"version": version, "value": value}))
+        os.replace(tmp, path)
+
+    def summary(self) -> dict[str, Any]:
+        files = list(self.root.glob("*.pages"))
+        return {
+            **self.stats,
+            "documents": len(files),
+            "bytes": sum(f.stat().st_size for f in files if f.exists()),
+        }
@@ -0,0 +1,184 @@
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Any, Optional
+
+from loguru import logger
+
+PEER_METRICS = ("revenue_cagr", "ebitda_margin", "debt_to_networth", "cfo_to_pat")
+# Ranks within an industry only mean something once it has a few filings
+DEFAULT_MIN_PEERS = 5
+_ALL = ""
+
+
+def industry_key(industry: Any) -> Optional[str]:
+    if not isinstance(industry, str) or not industry.strip():
+        return None
+    return " ".join(industry.lower().split())
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return None
+    return float(value)
+
+
+class PeerIndex:
+    # Sorted value arrays per (industry, metric), rebuilt from SQLite on first use and kept
+    # up to date in place: a lookup is two bisects, an update one removal and one insort
+    def __init__(
+        self,
+        path: str = "memory/peers.db",
+        metrics: tuple[str, ...] = PEER_METRICS,
+        min_peers: int = DEFAULT_MIN_PEERS,
+    ) -> None:
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.metrics = metrics
+        self.min_peers = min_peers
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS peers (
+                file_id TEXT PRIMARY KEY,
+                industry TEXT,
+                industry_key TEXT,
+                metrics TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+        self._docs: dict[str, tuple[Optional[str], dict[str, float]]] = {}
+        self._sorted: dict[tuple[str, str], list[float]] = {}
+        self._industries: dict[str, str] = {}
+        self._loaded = False
+
+    def load(self) -> None:
+        # Deferred to warm-up (or first use): tens of thousands of filings take a moment to sort
+        with self._lock:
+            self._load()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        started = time.perf_counter()
+        for file_id, industry, key, metrics_json in self._db.execute(
+            "SELECT file_id, industry, industry_key, metrics FROM peers"
+        ):
+            self._insert(file_id, key, json.loads(metrics_json))
+            if key is not None:
+                self._industries.setdefault(key, industry)
+        for values in self._sorted.values():
+            values.sort()
+        self._loaded = True
+        logger.info("Loaded peer index: {} filings in {:.3f}s", len(self._docs), time.perf_counter() - started)
+
+    def _values(self, metrics: dict[str, Any]) -> dict[str, float]:
+        return {m: v for m in self.metrics if (v := _number(metrics.get(m))) is not None}
+
+    def _insert(self, file_id: str, key: Optional[str], values: dict[str, float], keep_sorted: bool = False) -> None:
+        self._docs[file_id] = (key, values)
+        for group in (_ALL, key) if key is not None else (_ALL,):
+            for metric, value in values.items():
+                arr = self._sorted.setdefault((group, metric), [])
+                if keep_sorted:
+                    insort(arr, value)
+                else:
+                    arr.append(value)
+
+    def _remove(self, file_id: str) -> None:
+        key, values = self._docs.pop(file_id)
+        for group in (_ALL, key) if key is not None else (_ALL,):
+            for metric, value in values.items():
+                arr = self._sorted[(group, metric)]
+                del arr[bisect_left(arr, value)]
+
+    def add(self, file_id: str, industry: Any, metrics: dict[str, Any]) -> None:
+        self.add_many([(file_id, industry, metrics)])
+
+    def add_many(self, rows: list[tuple[str, Any, dict[str, Any]]]) -> int:
+        # (file_id, industry, metrics) per filing; a filing seen before replaces its old values
+        now = time.time()
+        changed = []
+        with self._lock:
+            self._load()
+            for file_id, industry, metrics in rows:
+                key = industry_key(industry)
+                values = self._values(metrics)
+                if self._docs.get(file_id) == (key, values):
+                    continue
+                if file_id in self._docs:
+                    self._remove(file_id)
+                self._insert(file_id, key, values, keep_sorted=True)
+                name = industry.strip() if key is not None else None
+                if key is not None:
+                    self._industries.setdefault(key, name)
+                changed.append((file_id, name, key, json.dumps(values), now))
+            if changed:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO peers (file_id, industry, industry_key, metrics, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    changed,
+                )
+                self._db.commit()
+        return len(changed)
+
+    def _rank(self, group: str, metric: str, value: float, own: Optional[float]) -> dict[str, Any]:
+        # Mid-rank percentile among the other filings: ties count half
+        arr = self._sorted.get((group, metric), ())
+        below = bisect_left(arr, value)
+        equal = bisect_right(arr, value, lo=below) - below
+        peers = len(arr)
+        if own is not None:
+            peers -= 1
+            if own < value:
+                below -= 1
+            elif own == value:
+                equal -= 1
+        if peers < (self.min_peers if group != _ALL else 1):
+            return {"percentile": None, "peers": peers}
+        return {"percentile": round(100 * (below + equal / 2) / peers, 1), "peers": peers}
+
+    def percentiles(
+        self, metrics: dict[str, Any], industry: Any = None, exclude: Optional[str] = None, wait: bool = True
+    ) -> Optional[dict[str, Any]]:
+        # `exclude` leaves a document's own indexed values out, so re-analyses rank against peers only.
+        # wait=False is for the event loop: None instead of blocking while the index loads or updates
+        key = industry_key(industry)
+        if not self._lock.acquire(blocking=wait):
+            return None
+        try:
+            if not self._loaded:
+                if not wait:
+                    return None
+                self._load()
+            own_key, own_values = self._docs.get(exclude, (None, {})) if exclude is not None else (None, {})
+            ranks: dict[str, Any] = {}
+            for metric, value in self._values(metrics).items():
+                own = own_values.get(metric)
+                ranks[metric] = {
+                    "value": value,
+                    "all": self._rank(_ALL, metric, value, own),
+                    "industry": self._rank(key, metric, value, own if own_key == key else None) if key else None,
+                }
+            return {"industry": self._industries.get(key, industry) if key else None, "metrics": ranks}
+        finally:
+            self._lock.release()
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            self._load()
+            counts = Counter(key for key, _ in self._docs.values() if key is not None)
+            return {
+                "filings": len(self._docs),
+                "industries": {self._industries.get(k, k): n for k, n in counts.most_common()},
+                "min_peers": self.min_peers,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
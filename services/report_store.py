@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from typing import Any, Optional
+
+from loguru import logger
+
+# Bump when the response layout changes in a way the metric/decision/extraction versions don't capture
+REPORT_FORMAT_VERSION = 2
+
+
+class ReportStore:
+    # Fully assembled /analyze responses per document, kept as the exact bytes to send:
+    # one JSON header line (version, etag, upload filename) followed by the serialized body
+    def __init__(self, root: str = "memory/reports") -> None:
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "writes": 0, "corrupt": 0}
+
+    def path(self, file_id: str) -> pathlib.Path:
+        return self.root / f"{file_id}.report"
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def put(self, file_id: str, report: dict[str, Any], version: str, filename: Optional[str] = None) -> str:
+        body = json.dumps(report, default=str, separators=(",", ":")).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        header = json.dumps({"version": version, "etag": etag, "filename": filename}).encode("utf-8")
+        path = self.path(file_id)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(header + b"\n" + body)
+        os.replace(tmp, path)
+        self._count("writes")
+        return etag
+
+    def get(self, file_id: str, version: Optional[str] = None) -> Optional[tuple[bytes, str]]:
+        # Returns (body, etag); a report built by other metric/decision/extraction code counts as a miss
+        try:
+            raw = self.path(file_id).read_bytes()
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        try:
+            header, body = raw.split(b"\n", 1)
+            meta = json.loads(header)
+            etag = meta["etag"]
+        except (ValueError, KeyError) as e:
+            logger.warning("Discarding unreadable report {}: {}", file_id, e)
+            self._count("corrupt")
+            self.path(file_id).unlink(missing_ok=True)
+            return None
+        if version is not None and meta.get("version") != version:
+            self._count("stale")
+            return None
+        self._count("hits")
+        return body, etag
+
+    def meta(self, file_id: str) -> Optional[dict[str, Any]]:
+        # Header of the stored report, whatever its version, plus the body length; reads one line only
+        try:
+            with open(self.path(file_id), "rb") as f:
+                header = f.readline()
+                length = os.fstat(f.fileno()).st_size - len(header)
+            meta = json.loads(header)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not isinstance(meta, dict) or "etag" not in meta:
+            return None
+        return {**meta, "length": length}
+
+    def summary(self) -> dict[str, Any]:
+        files = list(self.root.glob("*.report"))
+        return {
+            **self.stats,
+            "documents": len(files),
+            "bytes": sum(f.stat().st_size for f in files if f.exists()),
+        }
@@ -0,0 +1,302 @@
+import importlib.util
+import inspect
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from loguru import logger
+
+import utils.decision_engine
+import utils.metrics
+from services.extraction_cache import ExtractionCache, fingerprint
+from services.peer_index import PeerIndex
+from utils.decision_engine import DecisionEngine
+
+
+def _source(module: str) -> str:
+    # Read from disk rather than imported: the numpy-backed batch modules stay out of startup
+    return pathlib.Path(importlib.util.find_spec(module).origin).read_text()
+
+
+def metrics_version() -> str:
+    return fingerprint([inspect.getsource(utils.metrics), _source("utils.metrics_batch")])[:16]
+
+
+def decision_version(engine: DecisionEngine) -> str:
+    # Code and configuration both change verdicts
+    source = [inspect.getsource(utils.decision_engine), _source("utils.decision_batch")]
+    return fingerprint({"source": source, "config": vars(engine)})[:16]
+
+
+class DerivedStore:
+    def __init__(self, path: str = "memory/derived.db") -> None:
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS derived (
+                key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                company TEXT,
+                extraction_created_at REAL NOT NULL,
+                metrics_version TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                metrics_hash TEXT NOT NULL,
+                decision_version TEXT NOT NULL,
+                decision_metrics_hash TEXT NOT NULL,
+                decision TEXT NOT NULL,
+                label TEXT NOT NULL,
+                score REAL NOT NULL,
+                confidence REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS derived_file_id ON derived(file_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS derived_label ON derived(label)")
+        self._db.commit()
+
+    _COLUMNS = (
+        "key",
+        "file_id",
+        "company",
+        "extraction_created_at",
+        "metrics_version",
+        "metrics",
+        "metrics_hash",
+        "decision_version",
+        "decision_metrics_hash",
+        "decision",
+        "label",
+        "score",
+        "confidence",
+        "updated_at",
+    )
+
+    def rows(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            fetched = self._db.execute(f"SELECT {', '.join(self._COLUMNS)} FROM derived").fetchall()
+        return {row[0]: dict(zip(self._COLUMNS, row)) for row in fetched}
+
+    def upsert(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO derived ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                [tuple(r[c] for c in self._COLUMNS) for r in rows],
+            )
+            self._db.commit()
+
+    def delete(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM derived WHERE key = ?", [(k,) for k in keys])
+            self._db.commit()
+
+    @staticmethod
+    def _verdict(row: dict[str, Any]) -> dict[str, Any]:
+        decision = json.loads(row["decision"])
+        return {
+            "file_id": row["file_id"],
+            "company": row["company"],
+            "verdict": row["label"],
+            "score": row["score"],
+            "confidence": row["confidence"],
+            "why": decision.get("reasons", []),
+            "metrics": json.loads(row["metrics"]),
+            "metrics_version": row["metrics_version"],
+            "decision_version": row["decision_version"],
+            "updated_at": row["updated_at"],
+        }
+
+    def verdicts(self, label: Optional[str] = None, limit: int = 100, offset: int = 0) -> list[dict[str, Any]]:
+        # One row per document: the newest extraction wins when several prompts/models were cached
+        query = f"""
+            SELECT {', '.join(self._COLUMNS)} FROM derived d
+            WHERE extraction_created_at = (
+                SELECT MAX(extraction_created_at) FROM derived WHERE file_id = d.file_id
+            ) {"AND label = ?" if label else ""}
+            GROUP BY file_id ORDER BY score DESC, file_id LIMIT ? OFFSET ?
+        """
+        params = ([label] if label else []) + [limit, offset]
+        with self._lock:
+            fetched = self._db.execute(query, params).fetchall()
+        return [self._verdict(dict(zip(self._COLUMNS, row))) for row in fetched]
+
+    def verdict(self, file_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM derived WHERE file_id = ? ORDER BY extraction_created_at DESC LIMIT 1",
+                (file_id,),
+            ).fetchone()
+        return self._verdict(dict(zip(self._COLUMNS, row))) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _load_extraction(path: str) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads(pathlib.Path(path).read_text())
+    except Exception as e:
+        logger.warning("Skipping unreadable cached extraction {}: {}", path, e)
+        return None
+
+
+class Rescorer:
+    def __init__(
+        self,
+        cache: ExtractionCache,
+        store: DerivedStore,
+        engine: Optional[DecisionEngine] = None,
+        read_workers: int = 8,
+        peers: Optional[PeerIndex] = None,
+    ) -> None:
+        self.cache = cache
+        self.store = store
+        self.engine = engine or DecisionEngine()
+        self.peers = peers
+        self.read_workers = read_workers
+        self._lock = threading.Lock()
+        self.last_summary: Optional[dict[str, Any]] = None
+
+    def rescore(self, force: bool = False, max_changes: int = 50) -> dict[str, Any]:
+        # One pass at a time; a concurrent caller waits and then sees an up-to-date store
+        with self._lock:
+            return self._rescore(force, max_changes)
+
+    def _rescore(self, force: bool, max_changes: int) -> dict[str, Any]:
+        from utils.decision_batch import decide_batch
+        from utils.metrics_batch import compute_metrics_batch
+
+        started = time.perf_counter()
+        m_version = metrics_version()
+        d_version = decision_version(self.engine)
+        # Legacy memory/responses files are indexed by ExtractionCache.import_legacy, so they're entries too
+        entries = list(self.cache.entries())
+        existing = self.store.rows()
+
+        # Stage 1: metrics, only where the extraction or metrics code changed
+        stale_metrics = [
+            e
+            for e in entries
+            if force
+            or e["key"] not in existing
+            or existing[e["key"]]["metrics_version"] != m_version
+            or existing[e["key"]]["extraction_created_at"] != e["created_at"]
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, self.read_workers)) as pool:
+            loaded = list(pool.map(lambda e: _load_extraction(e["path"]), stale_metrics))
+
+        stale_keys = {e["key"] for e in stale_metrics}
+        readable = [(e, (s.get("extracted") or {})) for e, s in zip(stale_metrics, loaded) if s is not None]
+        failed = len(stale_metrics) - len(readable)
+        computed = compute_metrics_batch([extracted.get("financials") or [] for _, extracted in readable])
+        metrics_by_key: dict[str, tuple[dict[str, Any], Optional[str]]] = {}
+        # Newest recomputed extraction per document, for the peer index
+        peer_rows: dict[str, tuple[float, Optional[str], dict[str, Any]]] = {}
+        for (entry, extracted), metrics in zip(readable, computed):
+            meta = extracted.get("meta") or {}
+            metrics_by_key[entry["key"]] = (metrics, meta.get("company"))
+            if entry["created_at"] >= peer_rows.get(entry["file_id"], (float("-inf"),))[0]:
+                peer_rows[entry["file_id"]] = (entry["created_at"], meta.get("industry"), metrics)
+
+        # Stage 2: decisions, where metrics changed or the decision code/config did
+        now = time.time()
+        updates: list[dict[str, Any]] = []
+        pending: list[tuple[dict[str, Any], Optional[dict[str, Any]], dict[str, Any], Optional[str], str]] = []
+        for entry in entries:
+            key = entry["key"]
+            previous = existing.get(key)
+            if key in metrics_by_key:
+                metrics, company = metrics_by_key[key]
+            elif previous is not None and key not in stale_keys:
+                metrics, company = json.loads(previous["metrics"]), previous["company"]
+            else:
+                continue
+            m_hash = fingerprint(metrics)
+            if (
+                not force
+                and previous is not None
+                and previous["decision_version"] == d_version
+                and previous["decision_metrics_hash"] == m_hash
+            ):
+                if key in metrics_by_key:
+                    updates.append({**previous, "metrics_version": m_version, "extraction_created_at": entry["created_at"]})
+                continue
+            pending.append((entry, previous, metrics, company, m_hash))
+
+        changes: list[dict[str, Any]] = []
+        label_changes = 0
+        decided = decide_batch([metrics for _, _, metrics, _, _ in pending], self.engine, reasons=True)
+        for (entry, previous, metrics, company, m_hash), decision in zip(pending, decided):
+            if previous is not None and previous["label"] != decision["label"]:
+                label_changes += 1
+                if len(changes) < max_changes:
+                    changes.append(
+                        {"file_id": entry["file_id"], "company": company, "from": previous["label"], "to": decision["label"]}
+                    )
+            updates.append(
+                {
+                    "key": entry["key"],
+                    "file_id": entry["file_id"],
+                    "company": company,
+                    "extraction_created_at": entry["created_at"],
+                    "metrics_version": m_version,
+                    "metrics": json.dumps(metrics),
+                    "metrics_hash": m_hash,
+                    "decision_version": d_version,
+                    "decision_metrics_hash": m_hash,
+                    "decision": json.dumps(decision),
+                    "label": decision["label"],
+                    "score": decision["score"],
+                    "confidence": decision["confidence"],
+                    "updated_at": now,
+                }
+            )
+
+        live = {e["key"] for e in entries}
+        removed = [k for k in existing if k not in live]
+        self.store.upsert(updates)
+        self.store.delete(removed)
+        if self.peers is not None:
+            self.peers.add_many([(file_id, industry, metrics) for file_id, (_, industry, metrics) in peer_rows.items()])
+
+        summary = {
+            "entries": len(entries),
+            "metrics_recomputed": len(metrics_by_key),
+            "decisions_recomputed": len(decided),
+            "unchanged": len(entries) - len(decided) - failed,
+            "failed": failed,
+            "removed": len(removed),
+            "label_changes": label_changes,
+            "changes": changes,
+            "metrics_version": m_version,
+            "decision_version": d_version,
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        }
+        logger.info("Rescore: {}", {k: v for k, v in summary.items() if k != "changes"})
+        self.last_summary = summary
+        return summary
+
+
+def format_rescore_summary(summary: dict[str, Any]) -> str:
+    lines = [
+        f"{summary['entries']} cached extractions: {summary['metrics_recomputed']} metrics and "
+        f"{summary['decisions_recomputed']} verdicts recomputed, {summary['unchanged']} unchanged, "
+        f"{summary['failed']} unreadable, {summary['removed']} removed in {summary['elapsed_s']}s "
+        f"(metrics {summary['metrics_version']}, decision {summary['decision_version']})",
+    ]
+    if summary["label_changes"]:
+        lines.append(f"{summary['label_changes']} verdict change(s):")
+        lines.extend(f"  {c['company'] or c['file_id'][:12]}: {c['from']} -> {c['to']}" for c in summary["changes"])
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.run import StubGemini
+from benchmarks.synthetic_drhp import generate_drhp
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-stub")
+    import app as app_module
+    from services.orchestrator import AnalyzeOrchestrator
+
+    expected = generate_drhp(tmp_path / "drhp.pdf", pages=20)
+    orchestrator = AnalyzeOrchestrator(libsql_url="file:./memory/test.db", table_fast_path=False)
+    orchestrator.gemini = StubGemini(expected)
+    # Batches run as background tasks, so the client keeps its event loop open; startup
+    # builds its own orchestrator, which the stubbed one then replaces
+    with TestClient(app_module.app) as test_client:
+        monkeypatch.setattr(app_module.app.state, "orchestrator", orchestrator)
+        yield test_client, orchestrator, (tmp_path / "drhp.pdf").read_bytes()
+
+
+def _run(client: TestClient, pdf_bytes: bytes, **form) -> dict:
+    files = [("files", ("drhp.pdf", pdf_bytes, "application/pdf"))]
+    response = client.post("/analyze/batch", files=files, data=form)
+    assert response.status_code == 202
+    batch_id = response.json()["batch_id"]
+    deadline = time.monotonic() + 30
+    while (status := client.get(f"/analyze/batch/{batch_id}").json())["status"] == "running":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert status["status"] == "done"
+    return status["summary"]
+
+
+def test_caller_batch_id_resumes(client):
+    test_client, orchestrator, pdf_bytes = client
+    first = _run(test_client, pdf_bytes, batch_id="nightly-1")
+    assert (first["processed"], first["skipped"], first["failed"]) == (1, 0, 0)
+    assert first["output"].endswith("nightly-1.jsonl")
+    calls = orchestrator.gemini.calls
+    assert calls == 1
+
+    again = _run(test_client, pdf_bytes, batch_id="nightly-1")
+    assert (again["processed"], again["skipped"]) == (0, 1)
+    assert orchestrator.gemini.calls == calls
+
+    fresh = _run(test_client, pdf_bytes)
+    assert (fresh["processed"], fresh["skipped"]) == (1, 0)
+
+
+def test_invalid_batch_id_is_rejected(client):
+    test_client, _, pdf_bytes = client
+    files = [("files", ("drhp.pdf", pdf_bytes, "application/pdf"))]
+    response = test_client.post("/analyze/batch", files=files, data={"batch_id": "../escape"})
+    assert response.status_code == 400
@@ -0,0 +1,69 @@
+import random
+
+from benchmarks.synthetic_drhp import synthetic_financials
+from utils.decision_batch import WEIGHT_NAMES, config_grid, decide_batch, sweep
+from utils.decision_engine import DecisionEngine
+from utils.metrics import compute_metrics
+
+
+def _metrics_corpus(size: int) -> list[dict]:
+    rng = random.Random(5)
+    return [compute_metrics(synthetic_financials(rng, years=rng.randint(0, 6), first_year=2018)) for _ in range(size)]
+
+
+EDGES = [
+    {},
+    {"revenue_cagr": 0.0, "ebitda_margin": 0.05, "pat_margin": 0.0, "cfo_latest": 0, "cfo_to_pat": 0.0},
+    {"revenue_cagr": 0.10, "ebitda_margin": 0.12, "pat_margin": 0.07, "cfo_to_pat": 0.5, "cfo_positive_years_ratio": 0.33},
+    {"debt_to_networth": 0.5, "net_debt_to_ebitda": 1.0, "revenue_volatility": 0.10, "margin_trend_ebitda": 0.0},
+    {"debt_to_networth": 2.0, "net_debt_to_ebitda": 5.0, "revenue_volatility": 0.20, "cfo_latest": True},
+    {"revenue_cagr": "12%", "ebitda_margin": None, "cfo_latest": -3},
+    {"revenue_cagr": float("nan"), "debt_to_networth": float("nan"), "cfo_latest": 5.0},
+]
+
+
+def test_matches_decide_with_reasons():
+    engine = DecisionEngine()
+    metrics = _metrics_corpus(500) + EDGES
+    assert decide_batch(metrics, engine, reasons=True) == [engine.decide(m) for m in metrics]
+
+
+def test_matches_decide_for_custom_engine():
+    engine = DecisionEngine(weight_growth=0.5, weight_volatility=0.0, apply_threshold=60, neutral_threshold=40)
+    metrics = _metrics_corpus(200) + EDGES
+    expected = [{k: d[k] for k in ("label", "score", "confidence")} for d in map(engine.decide, metrics)]
+    assert decide_batch(metrics, engine) == expected
+
+
+def test_empty():
+    assert decide_batch([], reasons=True) == []
+
+
+def test_sweep_matches_decide_across_config_grid():
+    metrics = _metrics_corpus(300) + EDGES[:-1]
+    reference = DecisionEngine()
+    labels = [reference.decide(m)["label"] for m in metrics]
+    configs = config_grid(
+        {"weight_growth": [0.1, 0.3, 0.6], "weight_volatility": [0.0, 0.2]},
+        apply_thresholds=(60, 70),
+        neutral_thresholds=(45, 55),
+    )
+    assert len(configs) == 3 * 2 * 4
+
+    reports = sweep(metrics, labels, configs, workers=1, block_size=5)
+    assert len(reports) == len(configs)
+    assert sweep(metrics, labels, configs, workers=2, block_size=5) == reports
+    for report in reports:
+        engine = DecisionEngine(**report["config"])
+        decisions = [engine.decide(m) for m in metrics]
+        predicted = [d["label"] for d in decisions]
+        assert report["label_counts"] == {label: predicted.count(label) for label in ("Avoid", "Neutral", "Apply")}
+        assert report["agreement"] == sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+        assert abs(report["score_mean"] - sum(d["score"] for d in decisions) / len(decisions)) < 0.1
+
+
+def test_config_grid_normalizes_weights_and_orders_thresholds():
+    configs = config_grid({"weight_growth": [0.0, 1.0]}, apply_thresholds=(50, 70), neutral_thresholds=(55,))
+    assert {c["apply_threshold"] for c in configs} == {70}
+    for config in configs:
+        assert abs(sum(config[w] for w in WEIGHT_NAMES) - 1.0) < 1e-12
@@ -0,0 +1,53 @@
+from utils.extract_merge import build_windows, merge_extractions, normalize_fy_label, summary_priority
+
+
+def _part(priority: int, financials: list, meta: dict = None, terms: dict = None) -> tuple:
+    return priority, {"extracted": {"meta": meta or {}, "terms": terms or {}, "financials": financials}}
+
+
+def test_windows_repeat_the_boundary_page():
+    pages = [(i, "x" * 100) for i in range(1, 6)]
+    windows = build_windows(pages, window_chars=250, overlap_pages=1)
+    assert [[n for n, _ in w] for w in windows] == [[1, 2], [2, 3], [3, 4], [4, 5]]
+    # A page larger than the window still gets a window of its own
+    assert build_windows([(1, "x" * 500), (2, "y")], window_chars=100, overlap_pages=0) == [[(1, "x" * 500)], [(2, "y")]]
+
+
+def test_summary_window_wins_conflicts_over_earlier_windows():
+    text = "Restated Summary of assets\nSUMMARY OF FINANCIAL INFORMATION"
+    assert summary_priority(text) == 2
+    merged = merge_extractions(
+        [
+            _part(0, [{"fy": "FY 2024", "revenue_cr": 90.0, "pat_cr": 9.0}]),
+            _part(2, [{"fy": "fy24", "revenue_cr": 100.0, "ebitda_cr": None}]),
+        ]
+    )
+    [row] = merged["extracted"]["financials"]
+    assert row["fy"] == "FY2024"
+    # The summary value beats the earlier one; fields only the other window saw are kept
+    assert (row["revenue_cr"], row["pat_cr"], row["ebitda_cr"]) == (100.0, 9.0, None)
+
+
+def test_equal_priority_overlap_keeps_the_earlier_window():
+    merged = merge_extractions(
+        [
+            _part(1, [{"fy": "FY2023", "revenue_cr": 80.0}], meta={"company": "Acme", "sector": ""}),
+            _part(1, [{"fy": "FY23", "revenue_cr": 81.0}, {"fy": "9M FY24", "revenue_cr": 70.0}], meta={"company": "ACME Ltd", "sector": "Pharma"}),
+            _part(1, [{"fy": "FY2022", "revenue_cr": True}, "junk", {"fy": ""}]),
+        ]
+    )
+    extracted = merged["extracted"]
+    assert extracted["meta"] == {"company": "Acme", "sector": "Pharma"}
+    # Partial years sort after the full year before them; a bool is not a figure
+    assert [(r["fy"], r["revenue_cr"]) for r in extracted["financials"]] == [
+        ("FY2022", None),
+        ("FY2023", 80.0),
+        ("9M FY2024", 70.0),
+    ]
+
+
+def test_fy_labels():
+    assert normalize_fy_label("F.Y. '21") == "FY2021"
+    assert normalize_fy_label("6m fy2025") == "6M FY2025"
+    assert normalize_fy_label(" March 2024 ") == "March 2024"
+    assert normalize_fy_label(None) is None
@@ -0,0 +1,100 @@
+import itertools
+import json
+import time
+
+import pytest
+
+import services.extraction_cache as extraction_cache
+from services.extraction_cache import LEGACY, ExtractionCache
+
+DOC = "ab" * 32
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(extraction_cache.time, "time", lambda: float(next(ticks)))
+
+
+def _cache(tmp_path, **kwargs) -> ExtractionCache:
+    return ExtractionCache(str(tmp_path / "responses"), str(tmp_path / "index.db"), **kwargs)
+
+
+def _put(cache: ExtractionCache, file_id: str, value: dict, prompt: str = "p") -> str:
+    key = cache.make_key(file_id, "m", prompt, "s")
+    cache.put(key, value, file_id, "m", prompt, "s")
+    return key
+
+
+def test_key_covers_every_component():
+    base = ExtractionCache.make_key(DOC, "m", "p", "s")
+    assert base == ExtractionCache.make_key(DOC, "m", "p", "s")
+    variants = [("cd" * 32, "m", "p", "s"), (DOC, "m2", "p", "s"), (DOC, "m", "p2", "s"), (DOC, "m", "p", "s2")]
+    assert len({base, *(ExtractionCache.make_key(*v) for v in variants)}) == 5
+
+
+def test_memory_lru_keeps_most_recent(tmp_path, clock):
+    cache = _cache(tmp_path, memory_entries=2)
+    keys = [_put(cache, f"doc{i}", {"i": i}) for i in range(2)]
+    assert cache.get_memory(keys[0]) == {"i": 0}
+    keys.append(_put(cache, "doc2", {"i": 2}))
+    # doc1 was least recently used
+    assert cache.get_memory(keys[1]) is None
+    assert cache.get_memory(keys[0]) == {"i": 0}
+    assert cache.get(keys[1]) == {"i": 1}
+    assert cache.stats["disk_hits"] == 1
+
+
+def test_size_eviction_drops_least_recently_accessed(tmp_path, clock):
+    payload = {"text": "x" * 1000}
+    cache = _cache(tmp_path, memory_entries=0, max_bytes=3500)
+    keys = [_put(cache, f"doc{i}", payload) for i in range(3)]
+    assert cache.get(keys[0]) == payload
+    _put(cache, "doc3", payload)
+    assert cache.stats["evictions"] == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == payload
+    assert cache.summary()["entries"] == 3
+
+
+def test_age_eviction(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, max_age_seconds=60)
+    monkeypatch.setattr(extraction_cache.time, "time", lambda: 1000.0)
+    key = _put(cache, DOC, {"a": 1})
+    monkeypatch.setattr(extraction_cache.time, "time", lambda: 1100.0)
+    assert cache.evict() == 1
+    assert cache.get(key) is None
+
+
+def test_legacy_files_are_indexed_but_never_served(tmp_path):
+    root = tmp_path / "responses"
+    root.mkdir()
+    (root / f"{DOC}.json").write_text(json.dumps({"extracted": {"meta": {"company": "Old"}}}))
+    cache = _cache(tmp_path)
+    assert cache.import_legacy() == 1
+    assert cache.import_legacy() == 0
+    [entry] = cache.entries()
+    assert (entry["file_id"], entry["model"], entry["prompt_hash"], entry["schema_hash"]) == (DOC, LEGACY, LEGACY, LEGACY)
+    assert cache.get(cache.make_key(DOC, "m", "p", "s")) is None
+    assert cache.get(entry["key"])["extracted"]["meta"]["company"] == "Old"
+
+
+def test_legacy_files_keyed_as_current_are_moved_under_legacy(tmp_path):
+    root = tmp_path / "responses"
+    root.mkdir()
+    legacy = root / f"{DOC}.json"
+    legacy.write_text("{}")
+    cache = _cache(tmp_path)
+    # What an earlier import recorded: the legacy file under the then-current key
+    current = cache.make_key(DOC, "m", "p", "s")
+    cache._db.execute(
+        "INSERT INTO entries VALUES (?, ?, 'm', 'p', 's', ?, 2, ?, ?, 0)",
+        (current, DOC, str(legacy), time.time(), time.time()),
+    )
+    cache._db.commit()
+    fresh = _put(cache, "cd" * 32, {"fresh": True})
+
+    assert cache.import_legacy() == 1
+    assert cache.get(current) is None
+    models = {e["key"]: e["model"] for e in cache.entries()}
+    assert models == {cache.make_key(DOC, LEGACY, LEGACY, LEGACY): LEGACY, fresh: "m"}
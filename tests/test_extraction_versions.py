@@ -0,0 +1,89 @@
+import asyncio
+import pathlib
+
+import pytest
+
+import services.orchestrator as orchestrator_module
+from benchmarks.run import StubGemini
+from benchmarks.synthetic_drhp import generate_drhp
+from services.orchestrator import AnalyzeOrchestrator
+
+
+@pytest.fixture
+def drhp(tmp_path, monkeypatch) -> tuple[bytes, dict]:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-stub")
+    expected = generate_drhp(tmp_path / "drhp.pdf", pages=20)
+    return (tmp_path / "drhp.pdf").read_bytes(), expected
+
+
+def _analyze(pdf_bytes: bytes, expected: dict, **kwargs) -> tuple[AnalyzeOrchestrator, dict]:
+    orchestrator = AnalyzeOrchestrator(libsql_url="file:./memory/test.db", **kwargs)
+    orchestrator.gemini = StubGemini(expected)
+    result = asyncio.run(orchestrator.run(pdf_bytes, "drhp.pdf"))
+    return orchestrator, result
+
+
+def _entries(orchestrator: AnalyzeOrchestrator) -> list[dict]:
+    return list(orchestrator.cache.entries())
+
+
+def test_table_parser_bump_forces_reextraction(drhp, monkeypatch):
+    pdf_bytes, expected = drhp
+    first, _ = _analyze(pdf_bytes, expected)
+    [entry] = _entries(first)
+    assert entry["prompt_hash"].startswith(orchestrator_module.TABLE_KEY_PREFIX)
+    assert first.cache.stats["writes"] == 1
+
+    again, _ = _analyze(pdf_bytes, expected)
+    assert again.cache.stats["writes"] == 0
+    assert again.report_version == first.report_version
+
+    monkeypatch.setattr(orchestrator_module, "TABLE_PARSER_VERSION", orchestrator_module.TABLE_PARSER_VERSION + 1)
+    bumped, _ = _analyze(pdf_bytes, expected)
+    assert bumped.cache.stats["writes"] == 1
+    assert bumped.report_version != first.report_version
+    # The superseded table result is gone, so rescoring can't pick it up either
+    [fresh] = _entries(bumped)
+    assert fresh["prompt_hash"] == bumped.table_hash != entry["prompt_hash"]
+
+
+def test_threshold_change_misses_table_result(drhp):
+    pdf_bytes, expected = drhp
+    first, _ = _analyze(pdf_bytes, expected)
+    stricter, _ = _analyze(pdf_bytes, expected, table_skip_confidence=0.95)
+    assert stricter.cache.stats["writes"] == 1
+    assert stricter.report_version != first.report_version
+
+
+def test_llm_result_survives_table_parser_bump(drhp, monkeypatch):
+    pdf_bytes, expected = drhp
+    first, _ = _analyze(pdf_bytes, expected, table_fast_path=False)
+    [entry] = _entries(first)
+    assert entry["prompt_hash"] == first.prompt_hash
+
+    monkeypatch.setattr(orchestrator_module, "TABLE_PARSER_VERSION", orchestrator_module.TABLE_PARSER_VERSION + 1)
+    again, _ = _analyze(pdf_bytes, expected)
+    assert again.cache.stats["writes"] == 0
+    assert pathlib.Path(entry["path"]).exists()
+
+
+@pytest.mark.parametrize("name", ["NORMALIZE_VERSION", "INDEX_VERSION"])
+def test_prompt_text_version_bump_forces_reextraction(drhp, monkeypatch, name):
+    pdf_bytes, expected = drhp
+    first, _ = _analyze(pdf_bytes, expected, table_fast_path=False)
+    assert first.cache.stats["writes"] == 1
+
+    monkeypatch.setattr(orchestrator_module, name, getattr(orchestrator_module, name) + 1)
+    bumped, _ = _analyze(pdf_bytes, expected, table_fast_path=False)
+    assert bumped.cache.stats["writes"] == 1
+    assert bumped.prompt_hash != first.prompt_hash
+    assert bumped.report_version != first.report_version
+
+
+def test_raw_text_is_cached_apart_from_normalized(drhp):
+    pdf_bytes, expected = drhp
+    first, _ = _analyze(pdf_bytes, expected, table_fast_path=False)
+    raw, _ = _analyze(pdf_bytes, expected, table_fast_path=False, normalize_text=False)
+    assert raw.cache.stats["writes"] == 1
+    assert raw.prompt_hash != first.prompt_hash
@@ -0,0 +1,59 @@
+import asyncio
+
+from services.jobs import Job, JobManager, SQLiteJobStore
+
+
+class FakeOrchestrator:
+    def __init__(self) -> None:
+        self.runs: list[str] = []
+
+    async def run_file(self, file_id, pdf_path, original_filename, slug=None, progress=None) -> dict:
+        self.runs.append(file_id)
+        progress({"stage": "verdict", "status": "done"})
+        return {"file_id": file_id, "verdict": "ok"}
+
+
+def test_finished_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(path)
+    job = Job(file_id="f1", pdf_path=str(tmp_path / "a.pdf"), original_filename="A.pdf", slug="a")
+    job.status, job.stage, job.result = "succeeded", "verdict", {"verdict": "ok"}
+    store.save(job)
+    store.close()
+
+    reopened = SQLiteJobStore(path)
+    restored = reopened.get(job.id)
+    assert restored.to_dict() == job.to_dict()
+    assert reopened.unfinished() == []
+    reopened.close()
+
+
+def test_interrupted_jobs_are_requeued_after_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF")
+    store = SQLiteJobStore(path)
+    running = Job(file_id="f1", pdf_path=str(pdf), original_filename="A.pdf")
+    running.status = "running"
+    orphaned = Job(file_id="f2", pdf_path=str(tmp_path / "gone.pdf"), original_filename="B.pdf")
+    store.save(running)
+    store.save(orphaned)
+    store.close()
+
+    async def scenario() -> None:
+        orchestrator = FakeOrchestrator()
+        manager = JobManager(orchestrator, workers=1, store=SQLiteJobStore(path))
+        await manager.start()
+        await manager._queue.join()
+        assert orchestrator.runs == ["f1"]
+        assert manager.get(running.id).status == "succeeded"
+        missing = manager.get(orphaned.id)
+        assert (missing.status, missing.error) == ("failed", "Uploaded file missing after restart")
+        await manager.stop()
+
+    asyncio.run(scenario())
+
+    reopened = SQLiteJobStore(path)
+    assert reopened.get(running.id).result == {"file_id": "f1", "verdict": "ok"}
+    assert reopened.unfinished() == []
+    reopened.close()
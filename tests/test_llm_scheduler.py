@@ -0,0 +1,182 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import clients.gemini_client as gemini_client
+import utils.llm_scheduler as llm_scheduler
+from clients.gemini_client import REASK_PROMPT, GeminiClient, LLMResponseError
+from utils.llm_scheduler import AdaptiveConcurrency, TokenBucket
+
+_real_sleep = asyncio.sleep
+VALID = json.dumps({"extracted": {"meta": {}, "terms": {}, "financials": []}})
+
+
+class FakeClock:
+    # Stands in for time.monotonic/perf_counter and asyncio.sleep: sleeping advances the clock
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += max(0.0, seconds)
+        await _real_sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(llm_scheduler, "time", clock)
+    monkeypatch.setattr(gemini_client, "time", clock)
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    return clock
+
+
+class FakeCompletions:
+    # Replies in order: a str is the message content, an exception is raised
+    def __init__(self, clock: FakeClock, replies: list, latency_s: float = 1.0) -> None:
+        self.clock = clock
+        self.replies = list(replies)
+        self.latency_s = latency_s
+        self.calls: list[list[dict[str, str]]] = []
+
+    async def create(self, messages: list[dict[str, str]], **kwargs) -> SimpleNamespace:
+        self.calls.append(messages)
+        self.clock.now += self.latency_s
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        message = SimpleNamespace(content=reply)
+        usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=100)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _client(clock: FakeClock, replies: list, **kwargs) -> tuple[GeminiClient, FakeCompletions]:
+    client = GeminiClient(api_key="test", **kwargs)
+    completions = FakeCompletions(clock, replies)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def _rate_limited(retry_after: str) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://llm.test/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_rate_limit_backs_off_then_succeeds(clock, monkeypatch):
+    monkeypatch.setattr(gemini_client.random, "uniform", lambda low, high: high)
+    client, completions = _client(clock, [_rate_limited("3"), VALID], max_concurrency=4, backoff_base_s=1.0)
+
+    result = asyncio.run(client.extract_structured("doc", {}))
+
+    assert result == json.loads(VALID)
+    assert len(completions.calls) == 2
+    # Retry-After (3s) beats the 1s backoff, and the retry waits it out
+    assert sum(clock.sleeps) >= 3.0
+    assert client.scheduler.requests._blocked_until <= clock.now
+    assert int(client.scheduler.concurrency.limit) == 2
+
+
+def test_rate_limit_gives_up_after_max_retries(clock):
+    client, completions = _client(clock, [_rate_limited("1")] * 3, max_retries=2)
+    with pytest.raises(gemini_client.LLMUnavailableError) as raised:
+        asyncio.run(client.extract_structured("doc", {}))
+    assert len(completions.calls) == 3
+    assert raised.value.retry_after == 1.0
+
+
+def test_malformed_json_is_reasked_once(clock):
+    client, completions = _client(clock, ["{not json", VALID])
+
+    assert asyncio.run(client.extract_structured("doc", {})) == json.loads(VALID)
+    assert len(completions.calls) == 2
+    reask = completions.calls[1]
+    assert [m["role"] for m in reask] == ["system", "user", "assistant", "user"]
+    assert reask[2]["content"] == "{not json"
+    assert reask[3]["content"].startswith(REASK_PROMPT.split("(")[0])
+
+
+def test_malformed_json_twice_raises(clock):
+    client, completions = _client(clock, ["[]", "{}"])
+    with pytest.raises(LLMResponseError):
+        asyncio.run(client.extract_structured("doc", {}))
+    assert len(completions.calls) == 2
+
+
+def test_concurrency_limit_shrinks_and_recovers(clock):
+    async def scenario() -> None:
+        concurrency = AdaptiveConcurrency(4)
+        concurrency.on_success(1.0, 1000)
+        concurrency.on_overload(0.5)
+        # A second failure in the same latency window doesn't shrink it again
+        concurrency.on_overload(0.5)
+        assert int(concurrency.limit) == 2
+
+        release = asyncio.Event()
+        peak = 0
+
+        async def request() -> None:
+            nonlocal peak
+            async with concurrency.slot():
+                peak = max(peak, concurrency.in_flight)
+                await release.wait()
+
+        tasks = [asyncio.create_task(request()) for _ in range(4)]
+        for _ in range(5):
+            await _real_sleep(0)
+        assert concurrency.in_flight == 2
+
+        # Steady latency: additive increase back to the ceiling, and waiting requests get in
+        for _ in range(10):
+            concurrency.on_success(1.0, 1000)
+        for _ in range(5):
+            await _real_sleep(0)
+        assert int(concurrency.limit) == 4
+        assert concurrency.in_flight == 4
+        release.set()
+        await asyncio.gather(*tasks)
+        assert peak == 4
+
+    asyncio.run(scenario())
+
+
+def test_latency_blowout_counts_as_overload(clock):
+    concurrency = AdaptiveConcurrency(8)
+    for _ in range(3):
+        concurrency.on_success(1.0, 1000)
+    clock.now += 10
+    for _ in range(5):
+        concurrency.on_success(10.0, 1000)
+    assert int(concurrency.limit) < 8
+
+
+def test_token_bucket_waits_for_refill(clock):
+    async def scenario() -> None:
+        bucket = TokenBucket(per_minute=60)
+        assert await bucket.acquire(60) == 0.0
+        assert await bucket.acquire(30) == pytest.approx(30.0)
+        # The provider reported 20 fewer tokens than were taken
+        bucket.adjust(-20)
+        assert await bucket.acquire(20) == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_blocked_bucket_waits_even_without_a_limit(clock):
+    async def scenario() -> None:
+        bucket = TokenBucket(None)
+        bucket.block(5)
+        assert await bucket.acquire() == pytest.approx(5.0)
+        assert await bucket.acquire() == 0.0
+
+    asyncio.run(scenario())
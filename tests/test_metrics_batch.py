@@ -0,0 +1,69 @@
+import math
+import random
+
+import pytest
+
+from benchmarks.synthetic_drhp import synthetic_financials
+from utils.metrics import compute_metrics
+from utils.metrics_batch import compute_metrics_batch
+
+
+def _same(a, b) -> bool:
+    # Exact equality, including the result type, with NaN equal to NaN
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+
+def _assert_parity(companies) -> None:
+    batch = compute_metrics_batch(companies)
+    assert len(batch) == len(companies)
+    for financials, got in zip(companies, batch):
+        expected = compute_metrics(financials)
+        assert got.keys() == expected.keys()
+        for key in expected:
+            assert _same(got[key], expected[key]), (key, got[key], expected[key])
+
+
+def _row(fy, **values):
+    row = {"fy": fy, "revenue_cr": 100.0, "pat_cr": 10.0, "ebitda_cr": 20.0, "networth_cr": 50.0, "debt_cr": 25.0, "cfo_cr": 8.0}
+    row.update(values)
+    return row
+
+
+CASES = {
+    "empty": [],
+    "single_year": [_row("FY2023")],
+    "nulls": [_row("FY2021", revenue_cr=None), _row("FY2022", cfo_cr=None), _row("FY2023", pat_cr=None, debt_cr=None)],
+    "missing_keys": [{"fy": "FY2021"}, {"fy": "FY2022", "revenue_cr": 120.0}, {"fy": "FY2023", "revenue_cr": 150.0}],
+    "non_numeric_strings": [_row("FY2021", revenue_cr="1,200"), _row("FY2022", cfo_cr="n/a"), _row("FY2023", debt_cr="12.5")],
+    "bool": [_row("FY2021", cfo_cr=True), _row("FY2022", cfo_cr=False), _row("FY2023", cfo_cr=True, networth_cr=True)],
+    "int": [_row("FY2021", revenue_cr=100, cfo_cr=5), _row("FY2022", revenue_cr=130, cfo_cr=-2), _row("FY2023", revenue_cr=160, cfo_cr=7)],
+    "int_and_float": [_row("FY2021", cfo_cr=5), _row("FY2022", cfo_cr=2.5), _row("FY2023", cfo_cr=7)],
+    "nan_revenue": [_row("FY2021", revenue_cr=float("nan")), _row("FY2022"), _row("FY2023", revenue_cr=140.0)],
+    "nan_latest": [_row("FY2021"), _row("FY2022"), _row("FY2023", revenue_cr=float("nan"), cfo_cr=float("nan"))],
+    "unordered_fy": [_row("FY2023", revenue_cr=160.0), _row("FY2021", revenue_cr=100.0), _row("FY2022", revenue_cr=130.0)],
+    "undated_rows_last": [_row(None, revenue_cr=90.0), _row("FY2022", revenue_cr=130.0), _row("2020-21", revenue_cr=100.0)],
+    "no_fy": [_row(None, revenue_cr=100.0), _row("latest", revenue_cr=130.0)],
+    "more_than_window": [_row(f"FY{2014 + i}", revenue_cr=100.0 + 10 * i) for i in range(9)],
+    "zero_and_negative": [_row("FY2021", revenue_cr=0.0, pat_cr=-5.0), _row("FY2022", networth_cr=0.0), _row("FY2023", revenue_cr=-10.0)],
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_matches_compute_metrics(name):
+    _assert_parity([CASES[name]])
+
+
+def test_mixed_batch_matches_compute_metrics():
+    _assert_parity([CASES[name] for name in sorted(CASES)] * 3)
+
+
+def test_synthetic_corpus_matches_compute_metrics():
+    rng = random.Random(11)
+    corpus = [synthetic_financials(rng, years=rng.randint(0, 8), first_year=2016) for _ in range(300)]
+    for financials in corpus:
+        rng.shuffle(financials)
+    _assert_parity(corpus)
@@ -0,0 +1,58 @@
+from services.peer_index import PeerIndex
+
+MARGINS = {"p1": 10.0, "p2": 20.0, "p3": 20.0, "p4": 30.0, "p5": 40.0}
+
+
+def _index(tmp_path, **kwargs) -> PeerIndex:
+    index = PeerIndex(str(tmp_path / "peers.db"), **kwargs)
+    rows = [(file_id, " Pharma ", {"ebitda_margin": v}) for file_id, v in MARGINS.items()]
+    rows.append(("s1", "Steel", {"ebitda_margin": 5.0, "revenue_cagr": float("nan")}))
+    index.add_many(rows)
+    return index
+
+
+def test_mid_rank_percentiles_on_a_fixed_set(tmp_path):
+    index = _index(tmp_path, min_peers=3)
+    ranks = index.percentiles({"ebitda_margin": 20.0, "revenue_cagr": None}, industry="pharma")
+    assert ranks["industry"] == "Pharma"
+    margin = ranks["metrics"]["ebitda_margin"]
+    # Pharma: one below, two ties -> (1 + 2/2) / 5
+    assert margin["industry"] == {"percentile": 40.0, "peers": 5}
+    # All filings add the steel one below -> (2 + 1) / 6
+    assert margin["all"] == {"percentile": 50.0, "peers": 6}
+    assert list(ranks["metrics"]) == ["ebitda_margin"]
+
+    top = index.percentiles({"ebitda_margin": 50.0}, industry="Pharma")["metrics"]["ebitda_margin"]
+    assert top["industry"]["percentile"] == 100.0
+
+
+def test_excluded_filing_ranks_against_its_peers_only(tmp_path):
+    index = _index(tmp_path, min_peers=3)
+    margin = index.percentiles({"ebitda_margin": 20.0}, industry="Pharma", exclude="p2")["metrics"]["ebitda_margin"]
+    # p2 itself left out: one below, one tie among four peers
+    assert margin["industry"] == {"percentile": 37.5, "peers": 4}
+    assert margin["all"] == {"percentile": 50.0, "peers": 5}
+
+
+def test_small_industries_get_no_percentile(tmp_path):
+    index = _index(tmp_path, min_peers=3)
+    margin = index.percentiles({"ebitda_margin": 5.0}, industry="Steel")["metrics"]["ebitda_margin"]
+    assert margin["industry"] == {"percentile": None, "peers": 1}
+    # The steel filing ties with itself unless excluded
+    assert margin["all"] == {"percentile": 8.3, "peers": 6}
+    alone = index.percentiles({"ebitda_margin": 5.0}, industry="Steel", exclude="s1")["metrics"]["ebitda_margin"]
+    assert alone["all"] == {"percentile": 0.0, "peers": 5}
+
+
+def test_replaced_values_and_reload_from_disk(tmp_path):
+    index = _index(tmp_path, min_peers=3)
+    assert index.add_many([("p5", "Pharma", {"ebitda_margin": 0.0})]) == 1
+    assert index.add_many([("p5", "Pharma", {"ebitda_margin": 0.0})]) == 0
+    before = index.percentiles({"ebitda_margin": 20.0}, industry="Pharma")
+    assert before["metrics"]["ebitda_margin"]["industry"]["percentile"] == 60.0
+    index.close()
+
+    reopened = PeerIndex(str(tmp_path / "peers.db"), min_peers=3)
+    assert reopened.percentiles({"ebitda_margin": 20.0}, industry="Pharma") == before
+    assert reopened.summary()["industries"] == {"Pharma": 5, "Steel": 1}
+    reopened.close()
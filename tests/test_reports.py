@@ -0,0 +1,85 @@
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.run import StubGemini
+from benchmarks.synthetic_drhp import generate_drhp
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-stub")
+    import app as app_module
+    from services.orchestrator import AnalyzeOrchestrator
+
+    expected = generate_drhp(tmp_path / "drhp.pdf", pages=20)
+    orchestrator = AnalyzeOrchestrator(libsql_url="file:./memory/test.db", table_fast_path=False)
+    orchestrator.gemini = StubGemini(expected)
+    monkeypatch.setattr(app_module.app.state, "orchestrator", orchestrator, raising=False)
+    return TestClient(app_module.app), orchestrator, (tmp_path / "drhp.pdf").read_bytes()
+
+
+def _analyze(client: TestClient, pdf_bytes: bytes) -> None:
+    response = client.post("/analyze", files={"file": ("My DRHP.pdf", pdf_bytes, "application/pdf")})
+    assert response.status_code == 200
+
+
+def _sha(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def test_missing_report_is_404_for_get_and_head(client):
+    test_client, _, pdf_bytes = client
+    sha = _sha(pdf_bytes)
+    assert test_client.head(f"/reports/{sha}").status_code == 404
+    assert test_client.get(f"/reports/{sha}").status_code == 404
+    assert test_client.get("/reports/not-a-hash").status_code == 400
+
+
+def test_etag_and_conditional_requests(client):
+    test_client, orchestrator, pdf_bytes = client
+    sha = _sha(pdf_bytes)
+    _analyze(test_client, pdf_bytes)
+
+    response = test_client.get(f"/reports/{sha}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and response.json()["slug"] == "my-drhp"
+
+    head = test_client.head(f"/reports/{sha}")
+    assert head.status_code == 200
+    assert head.headers["etag"] == etag
+    assert int(head.headers["content-length"]) == len(response.content)
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        conditional = test_client.get(f"/reports/{sha}", headers={"If-None-Match": if_none_match})
+        assert conditional.status_code == 304
+        assert conditional.headers["etag"] == etag
+        assert conditional.content == b""
+    assert test_client.get(f"/reports/{sha}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_report_version_change_rebuilds_on_get_only(client):
+    test_client, orchestrator, pdf_bytes = client
+    sha = _sha(pdf_bytes)
+    _analyze(test_client, pdf_bytes)
+    etag = test_client.get(f"/reports/{sha}").headers["etag"]
+    writes = orchestrator.report_store.stats["writes"]
+    calls = orchestrator.gemini.calls
+
+    orchestrator.report_version = "changed"
+    # HEAD and revalidation answer from the stored header without rebuilding
+    assert test_client.head(f"/reports/{sha}").status_code == 200
+    assert test_client.get(f"/reports/{sha}", headers={"If-None-Match": etag}).status_code == 304
+    assert orchestrator.report_store.stats["writes"] == writes
+
+    response = test_client.get(f"/reports/{sha}")
+    assert response.status_code == 200
+    assert orchestrator.report_store.stats["writes"] == writes + 1
+    # Rebuilt from the cached extraction, under the original upload filename
+    assert orchestrator.gemini.calls == calls
+    meta = orchestrator.report_store.meta(sha)
+    assert (meta["version"], meta["filename"]) == ("changed", "My DRHP.pdf")
+    assert response.json()["slug"] == "my-drhp"
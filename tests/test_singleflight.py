@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario() -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        results = await asyncio.gather(*(flights.do("doc", work) for _ in range(5)))
+        assert calls == 1
+        assert [r for r, _ in results] == ["done"] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert flights.inflight == 0
+
+    asyncio.run(scenario())
+
+
+def test_shared_failure_reaches_every_waiter_and_releases_the_key():
+    async def scenario() -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def failing() -> None:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("extraction failed")
+
+        results = await asyncio.gather(*(flights.do("doc", failing) for _ in range(3)), return_exceptions=True)
+        assert calls == 1
+        assert all(isinstance(r, ValueError) and str(r) == "extraction failed" for r in results)
+        assert flights.inflight == 0
+
+        async def ok() -> str:
+            return "retried"
+
+        assert await flights.do("doc", ok) == ("retried", False)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    async def scenario() -> None:
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def work() -> str:
+            started.set()
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.create_task(flights.do("doc", work))
+        await started.wait()
+        second = asyncio.create_task(flights.do("doc", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == ("done", True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+import pytest
+
+from utils.table_extract import detect_unit, parse_amount, parse_table, score_table
+
+
+@pytest.mark.parametrize(
+    "cell, expected",
+    [
+        ("1,23,45,678.50", 12345678.5),
+        ("12,34,567", 1234567.0),
+        ("(1,234.56)", -1234.56),
+        ("(4,50,000)", -450000.0),
+        ("-12.5", -12.5),
+        ("– 3,000", -3000.0),
+        ("₹ 5,00,000", 500000.0),
+        ("Rs.1,250", 1250.0),
+        (42, 42.0),
+        ("nil", None),
+        ("—", None),
+        ("FY2024", None),
+        ("12%", None),
+        (None, None),
+    ],
+)
+def test_parse_amount(cell, expected):
+    assert parse_amount(cell) == expected
+
+
+def test_detect_unit():
+    assert detect_unit("(₹ in lakhs, unless otherwise stated)") == "lakh"
+    assert detect_unit("Amounts in Rs. Crores") == "crore"
+    assert detect_unit("(in ₹ mn)") == "million"
+    assert detect_unit("Restated Summary Statement") is None
+
+
+ROWS = [
+    ["Particulars", "Fiscal 2024", "Fiscal 2023", "Fiscal 2022"],
+    ["Revenue from operations", "1,25,000.00", "1,00,000.00", "80,000.00"],
+    ["EBITDA", "25,000.00", "18,000.00", "(2,000.00)"],
+    ["Restated profit for the year", "12,500.00", "9,000.00", "(5,000.00)"],
+    ["Net worth", "60,000.00", "47,500.00", "38,500.00"],
+]
+
+
+def test_lakh_table_is_converted_to_crore():
+    parsed = parse_table(ROWS, context="Restated Summary Statement (₹ in lakhs)")
+    assert parsed["unit"] == "lakh"
+    confidence, financials = score_table(parsed, summary_heading=True)
+    assert [r["fy"] for r in financials] == ["FY2022", "FY2023", "FY2024"]
+    latest = financials[-1]
+    assert (latest["revenue_cr"], latest["ebitda_cr"], latest["pat_cr"]) == (1250.0, 250.0, 125.0)
+    assert (financials[0]["ebitda_cr"], financials[0]["pat_cr"]) == (-20.0, -50.0)
+    assert confidence > 0.5
+
+
+def test_unitless_table_confidence_is_capped():
+    parsed = parse_table(ROWS)
+    assert parsed["unit"] is None
+    confidence, financials = score_table(parsed, summary_heading=True)
+    # Assumed crore: a lakh table would be read 100x too large, so never trusted over the LLM
+    assert financials[-1]["revenue_cr"] == 125000.0
+    assert confidence == 0.5
+
+
+def test_missing_core_rows_cap_confidence():
+    parsed = parse_table([ROWS[0], ROWS[2], ROWS[4]], context="(₹ in crore)")
+    confidence, _ = score_table(parsed, summary_heading=True)
+    assert confidence <= 0.4
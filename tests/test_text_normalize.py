@@ -0,0 +1,42 @@
+from benchmarks.normalize_check import check_document, load_fixtures
+from utils.text_normalize import compact_numbers, find_boilerplate, normalize_pages
+
+
+def test_compacts_thousands_grouping_only():
+    assert compact_numbers("12,34,567.00 and 219,705.00 and 1,00,000") == "1234567 and 219705 and 100000"
+    assert compact_numbers("see pages 12,13 and 1,2,3") == "see pages 12,13 and 1,2,3"
+    assert compact_numbers("revenue of 1,234, up") == "revenue of 1234, up"
+
+
+def _pages() -> list[tuple[int, str]]:
+    return [
+        (n, f"Acme Limited Draft Red Herring Prospectus\n(₹ in crore)\nParticulars FY2022 FY2023 FY2024\nRevenue {n}0 {n}1 {n}2")
+        for n in range(1, 6)
+    ]
+
+
+def test_repeated_unit_and_year_lines_are_kept():
+    pages = _pages()
+    assert find_boilerplate(t for _, t in pages) == {"acme limited draft red herring prospectus"}
+    normalized, stats = normalize_pages(pages)
+    assert stats["boilerplate_lines"] == 4
+    for _, text in normalized:
+        assert "(₹ in crore)" in text
+        assert "Particulars FY2022 FY2023 FY2024" in text
+
+
+def test_explicit_boilerplate_never_drops_figures():
+    pages = [(n, "Rs. in lakhs\nTotal 2024") for n in range(3)]
+    normalized, stats = normalize_pages(pages, boilerplate={"rs. in lakhs", "total 2024"})
+    assert stats["boilerplate_lines"] == 0
+    assert all(text == "Rs. in lakhs\nTotal 2024" for _, text in normalized)
+
+
+def test_fixture_figures_survive():
+    for name, pages, spec in load_fixtures():
+        assert check_document(pages, fixture=spec)["failures"] == [], name
+
+
+def test_reference_lists_are_not_ungrouped():
+    assert compact_numbers("see pages 12,13 and 147,148; notes 101,102") == "see pages 12,13 and 147,148; notes 101,102"
+    assert compact_numbers("Revenue 147,148.00 on page 4") == "Revenue 147148 on page 4"
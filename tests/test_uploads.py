@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from utils.uploads import UploadLimitMiddleware, UploadTooLargeError, save_upload
+
+LIMIT = 1000
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.state.reads = 0
+
+    @app.post("/upload")
+    async def upload(request: Request) -> dict:
+        app.state.reads += 1
+        return {"size": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request) -> dict:
+        return {"size": len(await request.body())}
+
+    app.add_middleware(UploadLimitMiddleware, limits={"/upload": LIMIT})
+    return TestClient(app), app
+
+
+def test_body_under_limit_passes(client):
+    test_client, _ = client
+    response = test_client.post("/upload", content=b"x" * LIMIT)
+    assert response.status_code == 200
+    assert response.json() == {"size": LIMIT}
+
+
+def test_declared_length_over_limit_is_413_unread(client):
+    test_client, app = client
+    response = test_client.post("/upload", content=b"x" * (LIMIT + 1))
+    assert response.status_code == 413
+    assert str(LIMIT) in response.json()["detail"]
+    assert app.state.reads == 0
+
+
+def test_chunked_body_over_limit_is_413(client):
+    test_client, _ = client
+
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 400
+
+    response = test_client.post("/upload", content=chunks())
+    assert response.status_code == 413
+
+
+def test_other_routes_are_not_limited(client):
+    test_client, _ = client
+    assert test_client.post("/other", content=b"x" * (LIMIT * 3)).json() == {"size": LIMIT * 3}
+
+
+class _Upload:
+    def __init__(self, data: bytes) -> None:
+        self._data = io.BytesIO(data)
+
+    async def read(self, size: int) -> bytes:
+        return self._data.read(size)
+
+
+def test_save_upload_hashes_and_stores(tmp_path):
+    data = b"%PDF-1.7 test"
+    file_id, path, size = asyncio.run(save_upload(_Upload(data), tmp_path, max_bytes=100, chunk_size=4))
+    assert file_id == hashlib.sha256(data).hexdigest()
+    assert path.read_bytes() == data and size == len(data)
+
+
+def test_save_upload_over_limit_leaves_nothing_behind(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(_Upload(b"x" * 101), tmp_path, max_bytes=100, chunk_size=10))
+    assert list(tmp_path.iterdir()) == []
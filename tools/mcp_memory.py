@@ -1,29 +1,116 @@
-from typing import Any
-import os
+from typing import TYPE_CHECKING, Any, Optional
+import asyncio
+import importlib
+import time
 from loguru import logger
-from agents.mcp import MCPServerStdio
+
+if TYPE_CHECKING:
+    from agents.mcp import MCPServerStdio
 
 
 class MCPLibsqlTools:
-    def __init__(self, libsql_url: str) -> None:
+    def __init__(
+        self,
+        libsql_url: str,
+        tools_ttl_seconds: float = 300.0,
+        call_timeout_seconds: float = 5.0,
+        connect_timeout_seconds: float = 30.0,
+        reconnect_backoff_seconds: float = 15.0,
+    ) -> None:
         self.libsql_url = libsql_url
+        self.tools_ttl_seconds = tools_ttl_seconds
+        self.call_timeout_seconds = call_timeout_seconds
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self.reconnect_backoff_seconds = reconnect_backoff_seconds
+        self._server: Optional["MCPServerStdio"] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._drop = asyncio.Event()
+        self._closing = False
+        self._tools: Optional[list[str]] = None
+        self._tools_at = 0.0
+        self._refresh_lock = asyncio.Lock()
 
-    async def list_tools(self) -> dict[str, Any]:
-        params = {
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
+
+    def _params(self) -> dict[str, Any]:
+        return {
             "command": "npx",
             "args": ["-y", "mcp-memory-libsql"],
             "env": {"LIBSQL_URL": self.libsql_url},
         }
-        try:
-            async with MCPServerStdio(params=params, client_session_timeout_seconds=30) as server:
-                tools_desc = await server.list_tools()
-                tool_names = []
-                if isinstance(tools_desc, dict) and "tools" in tools_desc:
-                    tool_names = [t.get("name") for t in tools_desc.get("tools", [])]
-                elif isinstance(tools_desc, list):
-                    tool_names = [getattr(t, "name", None) for t in tools_desc]
-                logger.info("MCP memory tools: {}", tool_names)
-                return {"connected": True, "tools": tool_names}
-        except Exception as e:
-            logger.warning("MCP memory server unavailable: {}", e)
-            return {"connected": False, "tools": []} 
\ No newline at end of file
+
+    async def start(self) -> None:
+        if self._session_task is None or self._session_task.done():
+            self._closing = False
+            self._session_task = asyncio.create_task(self._session_loop())
+
+    async def close(self) -> None:
+        self._closing = True
+        self._drop.set()
+        if self._session_task is not None:
+            try:
+                await asyncio.wait_for(self._session_task, timeout=self.connect_timeout_seconds)
+            except Exception as e:
+                logger.warning("MCP memory session did not shut down cleanly: {}", e)
+            self._session_task = None
+
+    async def _session_loop(self) -> None:
+        # The stdio session is opened and torn down inside this one task, as the
+        # underlying anyio context managers require. The agents SDK is slow to import,
+        # so it is loaded off the event loop on first connect
+        MCPServerStdio = (await asyncio.to_thread(importlib.import_module, "agents.mcp")).MCPServerStdio
+        while not self._closing:
+            server = MCPServerStdio(params=self._params(), client_session_timeout_seconds=self.connect_timeout_seconds)
+            try:
+                await asyncio.wait_for(server.connect(), timeout=self.connect_timeout_seconds)
+                self._server = server
+                logger.info("MCP memory session connected")
+                await self._refresh_tools()
+                await self._drop.wait()
+            except Exception as e:
+                logger.warning("MCP memory server unavailable: {}", e)
+            finally:
+                self._server = None
+                self._drop.clear()
+                try:
+                    await server.cleanup()
+                except Exception as e:
+                    logger.debug("MCP memory cleanup failed: {}", e)
+            if not self._closing:
+                await asyncio.sleep(self.reconnect_backoff_seconds)
+
+    async def _refresh_tools(self) -> Optional[list[str]]:
+        server = self._server
+        if server is None:
+            return None
+        async with self._refresh_lock:
+            if self._tools is not None and time.monotonic() - self._tools_at < self.tools_ttl_seconds:
+                return self._tools
+            try:
+                tools_desc = await asyncio.wait_for(server.list_tools(), timeout=self.call_timeout_seconds)
+            except Exception as e:
+                logger.warning("MCP memory health check failed, reconnecting: {}", e)
+                self._drop.set()
+                return None
+            tool_names = []
+            if isinstance(tools_desc, dict) and "tools" in tools_desc:
+                tool_names = [t.get("name") for t in tools_desc.get("tools", [])]
+            elif isinstance(tools_desc, list):
+                tool_names = [getattr(t, "name", None) for t in tools_desc]
+            logger.info("MCP memory tools: {}", tool_names)
+            self._tools = tool_names
+            self._tools_at = time.monotonic()
+            return tool_names
+
+    async def health_check(self) -> bool:
+        self._tools_at = 0.0
+        return await self._refresh_tools() is not None
+
+    async def list_tools(self) -> dict[str, Any]:
+        # Never waits on a (re)connect: requests see the last known state instead
+        tools = await self._refresh_tools()
+        if tools is None:
+            return {"connected": False, "tools": []}
+        return {"connected": True, "tools": tools}
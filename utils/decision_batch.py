@@ -0,0 +1,309 @@
+from typing import Any, Optional, Sequence
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.decision_engine import DecisionEngine
+
+METRIC_KEYS = (
+    "revenue_cagr",
+    "ebitda_cagr",
+    "ebitda_margin",
+    "pat_margin",
+    "margin_trend_ebitda",
+    "cfo_latest",
+    "cfo_to_pat",
+    "cfo_positive_years_ratio",
+    "debt_to_networth",
+    "net_debt_to_ebitda",
+    "revenue_volatility",
+)
+COMPONENTS = ("growth", "profitability", "cashflow", "leverage", "volatility")
+WEIGHT_NAMES = tuple(f"weight_{c}" for c in COMPONENTS)
+LABELS = ("Avoid", "Neutral", "Apply")
+
+
+def _above(t: float) -> float:
+    # Turns a strict "x > t" test into "x >= t'" so every rung can share one searchsorted
+    return float(np.nextafter(t, np.inf))
+
+
+# Each ladder mirrors a threshold chain in DecisionEngine: ascending breakpoints,
+# one point value per bucket (len(breakpoints) + 1) and the points when the metric is missing
+LADDERS: dict[str, tuple[list[float], list[float], float]] = {
+    "revenue_cagr": ([_above(0.0), 0.10, 0.20], [15, 40, 70, 100], 25),
+    "ebitda_cagr": ([_above(0.10)], [0, 10], 0),
+    "ebitda_margin": ([_above(0.05), 0.12, 0.20], [10, 25, 40, 55], 20),
+    "pat_margin": ([_above(0.0), 0.07, 0.12], [5, 15, 25, 35], 15),
+    "margin_trend_ebitda": ([_above(0.0)], [0, 10], 0),
+    "cfo_latest": ([_above(0.0)], [15, 45], 25),
+    "cfo_to_pat": ([_above(0.0), 0.5, 0.9], [5, 15, 25, 35], 0),
+    "cfo_positive_years_ratio": ([0.33, 0.66], [5, 10, 20], 0),
+    "debt_to_networth": ([_above(0.5), _above(1.0), _above(2.0)], [50, 35, 20, 10], 25),
+    "net_debt_to_ebitda": ([_above(1.0), _above(3.0), _above(5.0)], [50, 35, 20, 10], 25),
+    "revenue_volatility": ([_above(0.10), _above(0.20)], [100, 70, 35], 50),
+}
+
+COMPONENT_METRICS: dict[str, tuple[str, ...]] = {
+    "growth": ("revenue_cagr", "ebitda_cagr"),
+    "profitability": ("ebitda_margin", "pat_margin", "margin_trend_ebitda"),
+    "cashflow": ("cfo_latest", "cfo_to_pat", "cfo_positive_years_ratio"),
+    "leverage": ("debt_to_networth", "net_debt_to_ebitda"),
+    "volatility": ("revenue_volatility",),
+}
+
+# DecisionEngine.decide's reason per ladder bucket (None where it adds none) and when the metric is missing
+REASONS: dict[str, tuple[list[Optional[str]], Optional[str]]] = {
+    "revenue_cagr": (
+        ["Declining revenue", "Low revenue CAGR", "Moderate revenue CAGR", "Strong revenue CAGR"],
+        "Revenue CAGR unavailable",
+    ),
+    "ebitda_cagr": ([None, "EBITDA CAGR supportive"], None),
+    "ebitda_margin": (
+        ["Weak EBITDA margin", "Thin EBITDA margin", "Moderate EBITDA margin", "Strong EBITDA margin"],
+        "EBITDA margin unavailable",
+    ),
+    "pat_margin": (
+        ["Negative PAT", "Thin PAT margin", "Moderate PAT margin", "Healthy PAT margin"],
+        "PAT margin unavailable",
+    ),
+    "margin_trend_ebitda": ([None, "Improving EBITDA margin trend"], None),
+    "cfo_latest": (["Latest CFO negative", "Latest CFO positive"], "CFO data unavailable"),
+    "cfo_to_pat": (
+        ["Poor cash conversion", "Weak cash conversion", "Moderate cash conversion", "Strong cash conversion"],
+        None,
+    ),
+    "cfo_positive_years_ratio": (["Mostly negative CFO", "Occasionally positive CFO", "Consistently positive CFO"], None),
+    "debt_to_networth": (
+        ["Low leverage vs net worth", "Moderate leverage vs net worth", "High leverage vs net worth", "Very high leverage"],
+        "Leverage (DNW) unavailable",
+    ),
+    "net_debt_to_ebitda": (
+        ["Low net debt to EBITDA", "Moderate net debt to EBITDA", "High net debt to EBITDA", "Very high net debt to EBITDA"],
+        "Net debt to EBITDA unavailable",
+    ),
+    "revenue_volatility": (
+        ["Low revenue volatility", "Moderate revenue volatility", "High revenue volatility"],
+        "Volatility unavailable",
+    ),
+}
+# The order DecisionEngine.decide appends reasons in
+REASON_ORDER = tuple(k for c in COMPONENTS for k in COMPONENT_METRICS[c])
+
+
+def _matrix(metrics_list: Sequence[dict[str, Any]]) -> tuple[np.ndarray, list[int]]:
+    # Also returns the rows holding an actual NaN value, which decide() doesn't treat as missing
+    cells = [v if isinstance(v, (int, float)) else None for m in metrics_list for v in map(m.get, METRIC_KEYS)]
+    out = np.array(cells, dtype=np.float64).reshape(len(metrics_list), len(METRIC_KEYS))
+    present = np.fromiter((v is not None for v in cells), dtype=bool, count=len(cells))
+    nan_rows = np.flatnonzero((np.isnan(out) & present.reshape(out.shape)).any(axis=1)).tolist()
+    return out, nan_rows
+
+
+def metrics_matrix(metrics_list: Sequence[dict[str, Any]]) -> np.ndarray:
+    # NaN marks a missing (non-numeric) metric
+    return _matrix(metrics_list)[0]
+
+
+def matrix_from_arrays(arrays: dict[str, tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    # Accepts the output of utils.metrics_batch.compute_metrics_arrays directly
+    cols = [np.where(arrays[k][1], arrays[k][0], np.nan) for k in METRIC_KEYS]
+    return np.stack(cols, axis=1)
+
+
+def _ladder_buckets(values: np.ndarray, key: str) -> np.ndarray:
+    # -1 where the metric is missing
+    breakpoints = LADDERS[key][0]
+    idx = np.searchsorted(np.asarray(breakpoints), np.nan_to_num(values, nan=0.0), side="right")
+    return np.where(np.isnan(values), -1, idx)
+
+
+def _ladder_points(values: np.ndarray, key: str) -> np.ndarray:
+    _, points, missing = LADDERS[key]
+    idx = _ladder_buckets(values, key)
+    return np.where(idx < 0, float(missing), np.asarray(points, dtype=np.float64)[np.maximum(idx, 0)])
+
+
+def reasons_batch(matrix: np.ndarray) -> list[list[str]]:
+    # Reasons depend only on each metric's bucket, so they're built once per distinct bucket combination
+    if not matrix.shape[0]:
+        return []
+    cols = {k: matrix[:, j] for j, k in enumerate(METRIC_KEYS)}
+    buckets = np.stack([_ladder_buckets(cols[k], k) for k in REASON_ORDER], axis=1)
+    # One integer per row: bucket + 1 (0 = missing) as digits of a base-`radix` number
+    radix = max(len(LADDERS[k][1]) for k in REASON_ORDER) + 1
+    codes = (buckets + 1) @ (radix ** np.arange(len(REASON_ORDER), dtype=np.int64))
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    texts = []
+    for combo in buckets[first].tolist():
+        reasons = []
+        for key, b in zip(REASON_ORDER, combo):
+            by_bucket, missing = REASONS[key]
+            reason = missing if b < 0 else by_bucket[b]
+            if reason is not None:
+                reasons.append(reason)
+        texts.append(reasons)
+    return [list(texts[i]) for i in inverse.reshape(-1).tolist()]
+
+
+def component_scores(matrix: np.ndarray) -> np.ndarray:
+    cols = {k: matrix[:, j] for j, k in enumerate(METRIC_KEYS)}
+    out = np.zeros((matrix.shape[0], len(COMPONENTS)), dtype=np.float64)
+    for c, name in enumerate(COMPONENTS):
+        total = np.zeros(matrix.shape[0], dtype=np.float64)
+        for key in COMPONENT_METRICS[name]:
+            total = total + _ladder_points(cols[key], key)
+        out[:, c] = np.minimum(total, 100)
+    return out
+
+
+def engine_weights(engine: DecisionEngine) -> np.ndarray:
+    return np.array([getattr(engine, w) for w in WEIGHT_NAMES], dtype=np.float64)
+
+
+def weighted_scores(components: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    # components: (n, 5); weights: (5,) or (k, 5). Summed in DecisionEngine.decide's order.
+    w = np.atleast_2d(weights)
+    total = components[:, 0:1] * w[:, 0]
+    for c in range(1, len(COMPONENTS)):
+        total = total + components[:, c : c + 1] * w[:, c]
+    return total if weights.ndim == 2 else total[:, 0]
+
+
+def label_codes(scores: np.ndarray, apply_threshold: float, neutral_threshold: float) -> np.ndarray:
+    return np.where(scores >= apply_threshold, 2, np.where(scores >= neutral_threshold, 1, 0)).astype(np.int8)
+
+
+def score_batch(matrix: np.ndarray, engine: Optional[DecisionEngine] = None) -> dict[str, np.ndarray]:
+    engine = engine or DecisionEngine()
+    components = component_scores(matrix)
+    scores = weighted_scores(components, engine_weights(engine))
+    band = float(engine.apply_threshold - engine.neutral_threshold) or 1.0
+    dist = np.minimum(np.abs(scores - engine.apply_threshold), np.abs(scores - engine.neutral_threshold)) / band
+    return {
+        "components": components,
+        "score": scores,
+        "label": label_codes(scores, engine.apply_threshold, engine.neutral_threshold),
+        "confidence": np.maximum(0.4, np.minimum(0.95, 1.0 - dist)),
+    }
+
+
+def decide_batch(
+    metrics_list: Sequence[dict[str, Any]], engine: Optional[DecisionEngine] = None, reasons: bool = False
+) -> list[dict[str, Any]]:
+    # Scores and labels; with reasons=True each dict matches DecisionEngine.decide exactly
+    engine = engine or DecisionEngine()
+    matrix, nan_rows = _matrix(metrics_list)
+    scored = score_batch(matrix, engine)
+    decisions = [
+        {"label": LABELS[code], "score": round(score, 2), "confidence": round(conf, 2)}
+        for code, score, conf in zip(
+            scored["label"].tolist(), scored["score"].tolist(), scored["confidence"].tolist()
+        )
+    ]
+    if reasons:
+        for decision, texts in zip(decisions, reasons_batch(matrix)):
+            decision["reasons"] = texts
+    # A NaN metric fails every comparison in decide() rather than counting as missing; rare, so scalar
+    for i in nan_rows:
+        decision = engine.decide(metrics_list[i])
+        decisions[i] = decision if reasons else {k: decision[k] for k in ("label", "score", "confidence")}
+    return decisions
+
+
+def config_grid(
+    weight_grid: dict[str, Sequence[float]],
+    apply_thresholds: Sequence[float] = (70,),
+    neutral_thresholds: Sequence[float] = (55,),
+    normalize: bool = True,
+) -> list[dict[str, Any]]:
+    defaults = DecisionEngine()
+    axes = [weight_grid.get(w, [getattr(defaults, w)]) for w in WEIGHT_NAMES]
+    configs = []
+    for weights in itertools.product(*axes):
+        total = sum(weights)
+        if total <= 0:
+            continue
+        if normalize:
+            weights = tuple(w / total for w in weights)
+        for apply_t, neutral_t in itertools.product(apply_thresholds, neutral_thresholds):
+            if neutral_t >= apply_t:
+                continue
+            configs.append(
+                {
+                    **dict(zip(WEIGHT_NAMES, weights)),
+                    "apply_threshold": apply_t,
+                    "neutral_threshold": neutral_t,
+                }
+            )
+    return configs
+
+
+def encode_labels(labels: Sequence[str]) -> np.ndarray:
+    lookup = {name: i for i, name in enumerate(LABELS)}
+    return np.array([lookup[label] for label in labels], dtype=np.int8)
+
+
+_worker_components: Optional[np.ndarray] = None
+_worker_labels: Optional[np.ndarray] = None
+
+
+def _init_worker(components: np.ndarray, labels: np.ndarray) -> None:
+    global _worker_components, _worker_labels
+    _worker_components = components
+    _worker_labels = labels
+
+
+def _evaluate_block(configs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    components, labels = _worker_components, _worker_labels
+    weights = np.array([[c[w] for w in WEIGHT_NAMES] for c in configs], dtype=np.float64)
+    scores = weighted_scores(components, weights)
+    reports = []
+    for k, config in enumerate(configs):
+        s = scores[:, k]
+        predicted = label_codes(s, config["apply_threshold"], config["neutral_threshold"])
+        counts = np.bincount(predicted, minlength=len(LABELS))
+        pct = np.percentile(s, [10, 25, 50, 75, 90]).tolist() if len(s) else [None] * 5
+        reports.append(
+            {
+                "config": config,
+                "agreement": float((predicted == labels).mean()) if len(labels) else None,
+                "label_counts": {LABELS[i]: int(counts[i]) for i in range(len(LABELS))},
+                "score_mean": float(s.mean()) if len(s) else None,
+                "score_std": float(s.std()) if len(s) else None,
+                "score_percentiles": dict(zip(("p10", "p25", "p50", "p75", "p90"), pct)),
+            }
+        )
+    return reports
+
+
+def sweep(
+    metrics: Any,
+    labels: Sequence[str],
+    configs: list[dict[str, Any]],
+    workers: Optional[int] = None,
+    block_size: int = 256,
+) -> list[dict[str, Any]]:
+    # `metrics`: list of metrics dicts or a matrix from metrics_matrix/matrix_from_arrays
+    matrix = metrics if isinstance(metrics, np.ndarray) else metrics_matrix(metrics)
+    components = component_scores(matrix)
+    encoded = encode_labels(labels)
+    if len(encoded) != components.shape[0]:
+        raise ValueError("labels must have one entry per metrics row")
+    blocks = [configs[i : i + block_size] for i in range(0, len(configs), block_size)]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    if workers <= 1 or len(blocks) <= 1:
+        _init_worker(components, encoded)
+        results = [r for block in blocks for r in _evaluate_block(block)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(blocks)),
+            initializer=_init_worker,
+            initargs=(components, encoded),
+        ) as pool:
+            results = [r for block in pool.map(_evaluate_block, blocks) for r in block]
+    results.sort(key=lambda r: (r["agreement"] is None, -(r["agreement"] or 0.0)))
+    return results
@@ -9,12 +9,16 @@ class DecisionEngine:
         weight_cashflow: float = 0.20,
         weight_leverage: float = 0.15,
         weight_volatility: float = 0.10,
+        apply_threshold: float = 70,
+        neutral_threshold: float = 55,
     ) -> None:
         self.weight_growth = weight_growth
         self.weight_profitability = weight_profitability
         self.weight_cashflow = weight_cashflow
         self.weight_leverage = weight_leverage
         self.weight_volatility = weight_volatility
+        self.apply_threshold = apply_threshold
+        self.neutral_threshold = neutral_threshold
 
     def _score_growth(self, m: dict[str, Any], reasons: list[str]) -> float:
         score = 0.0
@@ -159,13 +163,14 @@ class DecisionEngine:
         )
 
         label = "Avoid"
-        if score >= 70:
+        if score >= self.apply_threshold:
             label = "Apply"
-        elif score >= 55:
+        elif score >= self.neutral_threshold:
             label = "Neutral"
 
         # Confidence: tighter banding around thresholds reduces confidence
-        dist = min(abs(score - 70), abs(score - 55)) / 15.0
+        band = float(self.apply_threshold - self.neutral_threshold) or 1.0
+        dist = min(abs(score - self.apply_threshold), abs(score - self.neutral_threshold)) / band
         confidence = max(0.4, min(0.95, 1.0 - dist))
 
         return {
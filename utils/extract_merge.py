@@ -0,0 +1,111 @@
+from typing import Any, Optional
+import re
+
+from utils.metrics import _parse_fy_year
+
+SUMMARY_MARKERS = (
+    "summary of financial information",
+    "restated summary",
+    "summary statement",
+    "summary of restated",
+)
+
+FINANCIAL_FIELDS = ("revenue_cr", "ebitda_cr", "pat_cr", "networth_cr", "debt_cr", "cfo_cr")
+
+_PARTIAL_FY = re.compile(r"^\s*(\d{1,2})\s*M\s*FY\s*'?(\d{2,4})\s*$", re.IGNORECASE)
+_FULL_FY = re.compile(r"^\s*(?:FY|F\.Y\.|FISCAL)\s*'?(\d{2,4})\s*$", re.IGNORECASE)
+
+
+def build_windows(
+    pages: list[tuple[int, str]],
+    window_chars: int,
+    overlap_pages: int = 1,
+) -> list[list[tuple[int, str]]]:
+    windows: list[list[tuple[int, str]]] = []
+    i = 0
+    while i < len(pages):
+        window: list[tuple[int, str]] = []
+        size = 0
+        j = i
+        while j < len(pages) and (not window or size + len(pages[j][1]) <= window_chars):
+            window.append(pages[j])
+            size += len(pages[j][1])
+            j += 1
+        windows.append(window)
+        if j >= len(pages):
+            break
+        # Step forward but repeat the last `overlap_pages` pages so tables split across a boundary are seen whole
+        i = max(i + 1, j - overlap_pages)
+    return windows
+
+
+def summary_priority(text: str) -> int:
+    lowered = text.lower()
+    return sum(lowered.count(m) for m in SUMMARY_MARKERS)
+
+
+def _full_year(raw: str) -> int:
+    year = int(raw)
+    return year + 2000 if year < 100 else year
+
+
+def normalize_fy_label(fy: Any) -> Optional[str]:
+    if not isinstance(fy, str) or not fy.strip():
+        return None
+    m = _PARTIAL_FY.match(fy)
+    if m:
+        return f"{int(m.group(1))}M FY{_full_year(m.group(2))}"
+    m = _FULL_FY.match(fy)
+    if m:
+        return f"FY{_full_year(m.group(1))}"
+    return fy.strip()
+
+
+def _fy_sort_key(label: str) -> tuple[int, int]:
+    year = _parse_fy_year(label)
+    # A partial current-year row sorts after the full years that precede it
+    partial = 1 if _PARTIAL_FY.match(label) else 0
+    return (9999 if year is None else year, partial)
+
+
+def _is_value(v: Any) -> bool:
+    return v is not None and v != "" and v != []
+
+
+def merge_extractions(parts: list[tuple[int, dict[str, Any]]]) -> dict[str, Any]:
+    # parts are (priority, structured) pairs in document order
+    meta: dict[str, Any] = {}
+    terms: dict[str, Any] = {}
+    # fy -> field -> (priority, -window_no, value); the highest tuple wins
+    rows: dict[str, dict[str, tuple[int, int, Any]]] = {}
+
+    for window_no, (priority, structured) in enumerate(parts):
+        extracted = (structured or {}).get("extracted") or {}
+        # Meta and terms: first window (in document order) with a value wins
+        for target, block in ((meta, extracted.get("meta")), (terms, extracted.get("terms"))):
+            for k, v in (block or {}).items():
+                if k not in target and _is_value(v):
+                    target[k] = v
+        for row in extracted.get("financials") or []:
+            if not isinstance(row, dict):
+                continue
+            fy = normalize_fy_label(row.get("fy"))
+            if fy is None:
+                continue
+            fields = rows.setdefault(fy, {})
+            for k in FINANCIAL_FIELDS:
+                v = row.get(k)
+                if not isinstance(v, (int, float)) or isinstance(v, bool):
+                    continue
+                candidate = (priority, -window_no, v)
+                if k not in fields or candidate[:2] > fields[k][:2]:
+                    fields[k] = candidate
+
+    financials = []
+    for fy in sorted(rows, key=_fy_sort_key):
+        row: dict[str, Any] = {"fy": fy}
+        for k in FINANCIAL_FIELDS:
+            row[k] = rows[fy][k][2] if k in rows[fy] else None
+        financials.append(row)
+
+    return {"extracted": {"meta": meta, "terms": terms, "financials": financials}}
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from utils.telemetry import LLM_CONCURRENCY_LIMIT
+
+
+class TokenBucket:
+    def __init__(self, per_minute: Optional[float], burst: Optional[float] = None) -> None:
+        # None or 0 disables the limit; the bucket starts full so a cold start isn't throttled
+        self.per_minute = per_minute or 0.0
+        self.capacity = float(burst or per_minute or 0.0)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        # Returns seconds spent waiting; requests larger than the bucket drain it completely
+        if not self.enabled and self._blocked_until <= time.monotonic():
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                delay = self._blocked_until - now
+                if self.enabled:
+                    self._refill(now)
+                    delay = max(delay, (amount - self._level) * 60 / self.per_minute)
+                if delay <= 0:
+                    self._level -= amount
+                    return waited
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def adjust(self, amount: float) -> None:
+        # Reconcile an estimate with the provider's usage; positive takes more, negative refunds
+        if self.enabled:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level - amount)
+
+    def block(self, seconds: float) -> None:
+        # The provider said to back off: nothing leaves the bucket before then, limit or not
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ) -> None:
+        # Additive increase while latency stays near its best, multiplicative decrease on
+        # throttling, errors or latency blowing past `latency_tolerance` times the baseline
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def _set_limit(self, limit: float) -> None:
+        previous = int(self.limit)
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+        LLM_CONCURRENCY_LIMIT.set(int(self.limit))
+        if int(self.limit) > previous:
+            asyncio.ensure_future(self._wake())
+
+    async def _wake(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    def on_success(self, seconds: float, tokens: int = 0) -> None:
+        # Latency is normalised per 1k prompt tokens so long windows don't look like congestion
+        sample = seconds / max(1.0, tokens / 1000)
+        self.latency = sample if self.latency is None else (1 - self.smoothing) * self.latency + self.smoothing * sample
+        # The baseline follows improvements at once and drifts up slowly, so a model getting slower for good is relearned
+        self.baseline = self.latency if self.baseline is None else min(self.latency, self.baseline * 1.01)
+        if self.latency > self.baseline * self.latency_tolerance:
+            self.on_overload(factor=0.9)
+        else:
+            self._set_limit(self.limit + 1 / max(1.0, self.limit))
+
+    def on_overload(self, factor: float = 0.5) -> None:
+        # One decrease per latency window, otherwise a burst of failures collapses the limit to the floor
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency or 1.0):
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit * factor)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        min_concurrency: int = 1,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency)
+
+    @asynccontextmanager
+    async def admit(self, tokens: int) -> AsyncIterator[float]:
+        # Quota is taken once a slot is held, so it is only spent on requests about to be sent
+        async with self.concurrency.slot():
+            waited = await self.requests.acquire(1)
+            waited += await self.tokens.acquire(tokens)
+            yield waited
+
+    def back_off(self, seconds: float) -> None:
+        self.requests.block(seconds)
+        self.tokens.block(seconds)
+        self.concurrency.on_overload()
+
+    def summary(self) -> dict[str, Any]:
+        c = self.concurrency
+        return {
+            "concurrency_limit": int(c.limit),
+            "in_flight": c.in_flight,
+            "latency_per_1k_tokens_s": round(c.latency, 3) if c.latency is not None else None,
+            "baseline_per_1k_tokens_s": round(c.baseline, 3) if c.baseline is not None else None,
+            "requests_per_minute": self.requests.per_minute or None,
+            "tokens_per_minute": self.tokens.per_minute or None,
+        }
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from utils.telemetry import TEXT_MEMORY_BYTES, TEXT_MEMORY_WAIT_SECONDS
+
+
+class Reservation:
+    def __init__(self, budget: "MemoryBudget", nbytes: int) -> None:
+        self.budget = budget
+        self.nbytes = nbytes
+
+    async def shrink(self, nbytes: int) -> None:
+        # Hands back what the holder no longer needs while it keeps running
+        nbytes = max(0, min(nbytes, self.nbytes))
+        if nbytes < self.nbytes:
+            await self.budget._release(self.nbytes - nbytes)
+            self.nbytes = nbytes
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes: Optional[int]) -> None:
+        # None or 0 disables the ceiling; reservations are still counted
+        self.max_bytes = max_bytes or 0
+        self.reserved = 0
+        self.peak = 0
+        self.waits = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int) -> AsyncIterator[Reservation]:
+        # A reservation larger than the ceiling waits until it can run alone instead of failing
+        if self.max_bytes:
+            nbytes = min(nbytes, self.max_bytes)
+        started = time.perf_counter()
+        async with self._cond:
+            if self.max_bytes and self.reserved + nbytes > self.max_bytes:
+                self.waits += 1
+                await self._cond.wait_for(lambda: self.reserved + nbytes <= self.max_bytes)
+                TEXT_MEMORY_WAIT_SECONDS.inc(time.perf_counter() - started)
+            self.reserved += nbytes
+            self.peak = max(self.peak, self.reserved)
+            TEXT_MEMORY_BYTES.set(self.reserved)
+        reservation = Reservation(self, nbytes)
+        try:
+            yield reservation
+        finally:
+            await self._release(reservation.nbytes)
+
+    async def _release(self, nbytes: int) -> None:
+        async with self._cond:
+            self.reserved -= nbytes
+            TEXT_MEMORY_BYTES.set(self.reserved)
+            self._cond.notify_all()
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "max_bytes": self.max_bytes or None,
+            "reserved_bytes": self.reserved,
+            "peak_bytes": self.peak,
+            "waits": self.waits,
+        }
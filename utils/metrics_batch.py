@@ -0,0 +1,275 @@
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+
+from utils.metrics import _parse_fy_year, compute_metrics
+
+FIELDS = ("revenue_cr", "pat_cr", "ebitda_cr", "networth_cr", "debt_cr", "cfo_cr")
+WINDOW = 6
+
+# Python's float pow (libm) and NumPy's SIMD pow can differ in the last ulp, so the
+# few pow calls per company go through Python's operator to stay bit-identical
+# with compute_metrics
+_py_pow = np.frompyfunc(pow, 2, 1)
+
+
+# Input type per cell: compute_metrics passes numbers through untouched, so an int or bool
+# latest CFO (or an all-int CFO sum) has to come back as that type rather than a float
+KIND_MISSING, KIND_FLOAT, KIND_INT, KIND_BOOL = 0, 1, 2, 3
+_KINDS = {float: KIND_FLOAT, int: KIND_INT, bool: KIND_BOOL}
+
+
+def _kind(x: Any) -> int:
+    kind = _KINDS.get(type(x))
+    if kind is not None:
+        return kind
+    if isinstance(x, bool):
+        return KIND_BOOL
+    if isinstance(x, int):
+        return KIND_INT
+    return KIND_FLOAT if isinstance(x, float) else KIND_MISSING
+
+
+def _restore(value: float, kind: int) -> Any:
+    if kind == KIND_BOOL:
+        return bool(value)
+    if kind == KIND_INT:
+        return int(value)
+    return value
+
+
+class FinancialsBatch:
+    def __init__(
+        self,
+        values: np.ndarray,
+        mask: np.ndarray,
+        window: np.ndarray,
+        fy_first: list[Optional[str]],
+        fy_last: list[Optional[str]],
+        kinds: Optional[np.ndarray] = None,
+    ) -> None:
+        # values/mask/kinds: (companies, fields, WINDOW), right-aligned so column WINDOW-1 is the latest year
+        self.values = values
+        self.mask = mask
+        self.window = window
+        self.fy_first = fy_first
+        self.fy_last = fy_last
+        self.kinds = kinds if kinds is not None else np.where(mask, KIND_FLOAT, KIND_MISSING).astype(np.int8)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def field(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        i = FIELDS.index(name)
+        return self.values[:, i, :], self.mask[:, i, :]
+
+    @classmethod
+    def from_financials(cls, companies: Sequence[list[dict[str, Any]]]) -> "FinancialsBatch":
+        # One flat pass over every row of every company; FY ordering, the WINDOW cut and the
+        # scatter into the (companies, fields, WINDOW) grid are array operations
+        n = len(companies)
+        groups = [list(financials or []) for financials in companies]
+        lengths = np.fromiter(map(len, groups), dtype=np.int64, count=n)
+        rows = [r for group in groups for r in group]
+        total = len(rows)
+        company = np.repeat(np.arange(n), lengths)
+        starts = np.cumsum(lengths) - lengths
+        position = np.arange(total) - starts[company]
+
+        # Same ordering rule as compute_metrics: by FY year, undated rows last, when any row has one
+        labels = [r.get("fy") for r in rows]
+        parsed = {label: _parse_fy_year(label) or 0 for label in {x for x in labels if isinstance(x, str)}}
+        years = np.fromiter(
+            (parsed[x] if isinstance(x, str) else 0 for x in labels), dtype=np.int64, count=total
+        )
+        dated = np.bincount(company, weights=(years > 0).astype(np.float64), minlength=n) > 0
+        sort_key = np.where(dated[company], np.where(years > 0, years, 9999), 0)
+        order = np.lexsort((position, sort_key, company))
+
+        # Rows stay grouped by company, so `position` is also the rank after sorting
+        column = position - lengths[company] + WINDOW
+        keep = column >= 0
+        kept = order[keep].tolist()
+        kept_company = company[keep]
+        kept_column = column[keep]
+        kept_rows = [rows[i] for i in kept]
+
+        cells = [r.get(name) for r in kept_rows for name in FIELDS]
+        kinds_flat = np.fromiter(
+            (_KINDS.get(type(v)) or _kind(v) for v in cells), dtype=np.int8, count=len(cells)
+        )
+        numbers = kinds_flat != KIND_MISSING
+        values_flat = np.zeros(len(cells), dtype=np.float64)
+        if numbers.any():
+            values_flat[numbers] = [v for v, ok in zip(cells, numbers.tolist()) if ok]
+
+        shape = (n, len(FIELDS), WINDOW)
+        values = np.zeros(shape, dtype=np.float64)
+        kinds = np.zeros(shape, dtype=np.int8)
+        values[kept_company, :, kept_column] = values_flat.reshape(-1, len(FIELDS))
+        kinds[kept_company, :, kept_column] = kinds_flat.reshape(-1, len(FIELDS))
+
+        window = np.minimum(lengths, WINDOW)
+        ends = np.cumsum(window)
+        kept_labels = [labels[i] for i in kept]
+        fy_first = [kept_labels[e - w] if w else None for e, w in zip(ends.tolist(), window.tolist())]
+        fy_last = [kept_labels[e - 1] if w else None for e, w in zip(ends.tolist(), window.tolist())]
+        return cls(values, kinds != KIND_MISSING, window, fy_first, fy_last, kinds)
+
+
+def _seq_sum(x: np.ndarray, m: np.ndarray) -> np.ndarray:
+    # Left-to-right accumulation, matching Python's sum() bit for bit
+    acc = np.zeros(x.shape[0], dtype=np.float64)
+    for j in range(x.shape[1]):
+        acc = acc + np.where(m[:, j], x[:, j], 0.0)
+    return acc
+
+
+def _first_last(x: np.ndarray, m: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    any_valid = m.any(axis=1)
+    rows = np.arange(x.shape[0])
+    first_idx = np.argmax(m, axis=1)
+    last_idx = m.shape[1] - 1 - np.argmax(m[:, ::-1], axis=1)
+    return x[rows, first_idx], x[rows, last_idx], any_valid
+
+
+def _cagr(x: np.ndarray, m: np.ndarray, window: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    first, last, _ = _first_last(x, m)
+    # compute_metrics rejects only values <= 0, so a NaN endpoint yields NaN rather than None
+    valid = (m.sum(axis=1) >= 2) & ~(first <= 0) & ~(last <= 0)
+    out = np.zeros(x.shape[0], dtype=np.float64)
+    if valid.any():
+        ratio = last[valid] / first[valid]
+        exponent = 1 / (window[valid] - 1).astype(np.float64)
+        out[valid] = _py_pow(ratio, exponent).astype(np.float64) - 1
+    return out, valid
+
+
+def _ratio_series(
+    num: np.ndarray, num_m: np.ndarray, den: np.ndarray, den_m: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    valid = num_m & den_m & (den != 0)
+    out = np.divide(num, den, out=np.zeros_like(num), where=valid)
+    return out, valid
+
+
+def _last_valid(x: np.ndarray, m: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    _, last, any_valid = _first_last(x, m)
+    return last, any_valid
+
+
+def _latest_ratio(
+    num: np.ndarray, num_m: np.ndarray, den: np.ndarray, den_m: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    valid = num_m[:, -1] & den_m[:, -1] & (den[:, -1] != 0)
+    out = np.divide(num[:, -1], den[:, -1], out=np.zeros(num.shape[0]), where=valid)
+    return out, valid
+
+
+def compute_metrics_arrays(batch: FinancialsBatch) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    revenue, revenue_m = batch.field("revenue_cr")
+    pat, pat_m = batch.field("pat_cr")
+    ebitda, ebitda_m = batch.field("ebitda_cr")
+    networth, networth_m = batch.field("networth_cr")
+    debt, debt_m = batch.field("debt_cr")
+    cfo, cfo_m = batch.field("cfo_cr")
+    n = len(batch)
+
+    out: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+    out["revenue_cagr"] = _cagr(revenue, revenue_m, batch.window)
+    out["pat_cagr"] = _cagr(pat, pat_m, batch.window)
+    out["ebitda_cagr"] = _cagr(ebitda, ebitda_m, batch.window)
+
+    pat_margins, pat_margins_m = _ratio_series(pat, pat_m, revenue, revenue_m)
+    ebitda_margins, ebitda_margins_m = _ratio_series(ebitda, ebitda_m, revenue, revenue_m)
+    out["pat_margin"] = _last_valid(pat_margins, pat_margins_m)
+    out["ebitda_margin"] = _last_valid(ebitda_margins, ebitda_margins_m)
+    first_m, last_m, any_m = _first_last(ebitda_margins, ebitda_margins_m)
+    out["margin_trend_ebitda"] = (np.where(any_m, last_m - first_m, 0.0), any_m)
+
+    # YoY growth between adjacent columns: both present and prior revenue positive
+    prev, prev_m = revenue[:, :-1], revenue_m[:, :-1]
+    yoy_m = prev_m & revenue_m[:, 1:] & (prev > 0)
+    yoy = np.divide(revenue[:, 1:], prev, out=np.zeros_like(prev), where=yoy_m) - 1
+    yoy = np.where(yoy_m, yoy, 0.0)
+    out["yoy_revenue_growth"] = (yoy, yoy_m)
+
+    k = yoy_m.sum(axis=1)
+    vol_valid = k >= 2
+    safe_k = np.maximum(k, 1).astype(np.float64)
+    mean = _seq_sum(yoy, yoy_m) / safe_k
+    dev = yoy - mean[:, None]
+    sq = np.zeros_like(dev)
+    if yoy_m.any():
+        sq[yoy_m] = _py_pow(dev[yoy_m], 2).astype(np.float64)
+    var = _seq_sum(sq, yoy_m) / np.maximum(k - 1, 1).astype(np.float64)
+    out["revenue_volatility"] = (np.where(vol_valid, np.sqrt(np.where(vol_valid, var, 0.0)), 0.0), vol_valid)
+
+    out["debt_to_networth"] = _latest_ratio(debt, debt_m, networth, networth_m)
+    out["net_debt_to_ebitda"] = _latest_ratio(debt, debt_m, ebitda, ebitda_m)
+    out["cfo_to_pat"] = _latest_ratio(cfo, cfo_m, pat, pat_m)
+    out["cfo_latest"] = (cfo[:, -1].copy(), cfo_m[:, -1].copy())
+
+    cfo_count = cfo_m.sum(axis=1)
+    cfo_any = cfo_count > 0
+    positives = (cfo_m & (cfo > 0)).sum(axis=1)
+    out["cfo_positive_years_ratio"] = (
+        np.where(cfo_any, positives / np.maximum(cfo_count, 1), 0.0),
+        cfo_any,
+    )
+    out["cfo_cumulative"] = (_seq_sum(cfo, cfo_m), cfo_any)
+    out["window_years"] = (batch.window.astype(np.float64), np.ones(n, dtype=bool))
+    return out
+
+
+_SCALAR_KEYS = (
+    "revenue_cagr",
+    "pat_cagr",
+    "ebitda_cagr",
+    "pat_margin",
+    "ebitda_margin",
+    "margin_trend_ebitda",
+    "revenue_volatility",
+    "debt_to_networth",
+    "net_debt_to_ebitda",
+    "cfo_latest",
+    "cfo_to_pat",
+    "cfo_positive_years_ratio",
+    "cfo_cumulative",
+)
+
+
+def compute_metrics_batch(
+    companies: Union[FinancialsBatch, Sequence[list[dict[str, Any]]]],
+) -> list[dict[str, Any]]:
+    batch = companies if isinstance(companies, FinancialsBatch) else FinancialsBatch.from_financials(companies)
+    arrays = compute_metrics_arrays(batch)
+    columns = {k: (arrays[k][0].tolist(), arrays[k][1].tolist()) for k in _SCALAR_KEYS}
+    cfo_kinds = batch.kinds[:, FIELDS.index("cfo_cr"), :]
+    latest_kind = cfo_kinds[:, -1].tolist()
+    # sum() over ints and bools stays an int
+    integral_sum = ((cfo_kinds == KIND_FLOAT).sum(axis=1) == 0).tolist()
+    yoy, yoy_m = arrays["yoy_revenue_growth"]
+    yoy_rows = yoy.tolist()
+    yoy_mask = yoy_m.tolist()
+
+    results: list[dict[str, Any]] = []
+    for c in range(len(batch)):
+        w = int(batch.window[c])
+        if w == 0:
+            results.append(compute_metrics([]))
+            continue
+        metrics: dict[str, Any] = {
+            "window_years": w,
+            "fy_range": [batch.fy_first[c], batch.fy_last[c]],
+        }
+        for k in _SCALAR_KEYS:
+            vals, valid = columns[k]
+            metrics[k] = vals[c] if valid[c] else None
+        if metrics["cfo_latest"] is not None:
+            metrics["cfo_latest"] = _restore(metrics["cfo_latest"], latest_kind[c])
+        if metrics["cfo_cumulative"] is not None and integral_sum[c]:
+            metrics["cfo_cumulative"] = int(metrics["cfo_cumulative"])
+        metrics["yoy_revenue_growth"] = [g for g, ok in zip(yoy_rows[c], yoy_mask[c]) if ok]
+        results.append(metrics)
+    return results
@@ -0,0 +1,158 @@
+from typing import Any, Iterable, Optional
+import json
+import pathlib
+import re
+
+# Phrases that mark the sections the extraction prompt reads from
+SECTION_KEYWORDS: dict[str, list[str]] = {
+    "financials": [
+        "summary of financial information",
+        "restated",
+        "summary statement of assets and liabilities",
+        "statement of profit and loss",
+        "revenue from operations",
+        "ebitda",
+        "profit after tax",
+        "profit for the year",
+        "net worth",
+        "borrowings",
+        "net cash from operating activities",
+        "net cash generated from operating activities",
+    ],
+    "terms": [
+        "price band",
+        "bid lot",
+        "minimum bid lot",
+        "lot size",
+        "bid/offer opens",
+        "bid/offer closes",
+        "offer opens on",
+        "offer closes on",
+        "issue opens",
+        "issue closes",
+        "offer structure",
+    ],
+    "meta": [
+        "our company was incorporated",
+        "corporate identity number",
+        "industry overview",
+        "our business",
+        "business overview",
+    ],
+}
+
+INDEX_VERSION = 1
+
+_NUMERIC_LINE = re.compile(r"^[\s(₹$-]*\(?-?[\d,]+(\.\d+)?\)?%?\s*$")
+_HEADING_MAX_LEN = 90
+
+
+def _is_heading(line: str) -> bool:
+    if not line or len(line) > _HEADING_MAX_LEN:
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) < 4:
+        return False
+    upper_ratio = sum(1 for c in letters if c.isupper()) / len(letters)
+    return upper_ratio >= 0.8
+
+
+def index_page(page_no: int, text: str) -> dict[str, Any]:
+    lines = [ln.strip() for ln in text.splitlines()]
+    lines = [ln for ln in lines if ln]
+    headings = [ln for ln in lines if _is_heading(ln)]
+    numeric = sum(1 for ln in lines if _NUMERIC_LINE.match(ln))
+    lowered = text.lower()
+    headings_lowered = " \n".join(headings).lower()
+    hits: dict[str, int] = {}
+    heading_hits: dict[str, int] = {}
+    for section, keywords in SECTION_KEYWORDS.items():
+        hits[section] = sum(lowered.count(k) for k in keywords)
+        heading_hits[section] = sum(1 for k in keywords if k in headings_lowered)
+    return {
+        "page": page_no,
+        "chars": len(text),
+        "headings": headings[:10],
+        "hits": hits,
+        "heading_hits": heading_hits,
+        "table_density": (numeric / len(lines)) if lines else 0.0,
+    }
+
+
+def build_page_index(pages: Iterable[str]) -> dict[str, Any]:
+    entries = [index_page(i, t) for i, t in enumerate(pages)]
+    return {
+        "version": INDEX_VERSION,
+        "page_count": len(entries),
+        "pages": entries,
+    }
+
+
+def load_page_index(path: pathlib.Path) -> Optional[dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text())
+    except Exception:
+        return None
+    if data.get("version") != INDEX_VERSION:
+        return None
+    return data
+
+
+def save_page_index(path: pathlib.Path, index: dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(index))
+    tmp.replace(path)
+
+
+def _page_score(entry: dict[str, Any], section: str) -> float:
+    score = entry["hits"].get(section, 0) + 5 * entry["heading_hits"].get(section, 0)
+    # Summary tables are dense with numbers; boost only pages that already mention the section
+    if section == "financials" and score > 0:
+        score += 10 * entry["table_density"]
+    return float(score)
+
+
+def select_page_ranges(
+    index: dict[str, Any],
+    sections: tuple[str, ...] = ("financials", "terms", "meta"),
+    cover_pages: int = 3,
+    pad: int = 1,
+    min_score: float = 3.0,
+    max_pages: int = 60,
+) -> Optional[list[tuple[int, int]]]:
+    entries = index.get("pages", [])
+    page_count = len(entries)
+    if page_count == 0:
+        return None
+
+    scored: list[tuple[float, int]] = []
+    for entry in entries:
+        best = max(_page_score(entry, s) for s in sections)
+        if best >= min_score:
+            scored.append((best, entry["page"]))
+    if not scored:
+        return None
+
+    # Keep the strongest pages within budget, then widen each by `pad` for context
+    scored.sort(key=lambda t: (-t[0], t[1]))
+    budget = max(1, max_pages // (1 + 2 * pad))
+    chosen: set[int] = set(range(min(cover_pages, page_count)))
+    for _, page_no in scored[:budget]:
+        for p in range(page_no - pad, page_no + pad + 1):
+            if 0 <= p < page_count:
+                chosen.add(p)
+
+    ranges: list[tuple[int, int]] = []
+    for p in sorted(chosen):
+        if ranges and ranges[-1][1] == p:
+            ranges[-1] = (ranges[-1][0], p + 1)
+        else:
+            ranges.append((p, p + 1))
+    return ranges
+
+
+def financial_table_pages(index: dict[str, Any], limit: int = 8, min_score: float = 3.0) -> list[int]:
+    scored = [(_page_score(e, "financials"), e["page"]) for e in index.get("pages", [])]
+    scored = [t for t in scored if t[0] >= min_score]
+    scored.sort(key=lambda t: (-t[0], t[1]))
+    return [page_no for _, page_no in scored[:limit]]
@@ -1,15 +1,117 @@
-import pathlib
+import mmap
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from loguru import logger
-import fitz
-from typing import Optional
+from typing import Any, Iterator, Optional, Union
 
+# A path to the content-addressed upload, or the document already in memory / memory-mapped
+PdfSource = Union[str, os.PathLike, bytes, memoryview, mmap.mmap]
 
-def read_pdf_text(pdf_path: pathlib.Path, max_pages: Optional[int] = None) -> str:
-    doc = fitz.open(pdf_path)
-    texts = []
-    for i, page in enumerate(doc):
-        if max_pages is not None and i >= max_pages:
-            break
-        texts.append(page.get_text("text"))
+DEFAULT_PARALLEL_THRESHOLD = 64
+SHARDS_PER_WORKER = 2
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def open_pdf(source: PdfSource) -> Any:
+    # PyMuPDF is imported on first use to keep server start-up fast
+    import fitz
+
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    # Buffers are read in place; a memoryview over an mmap avoids copying the file into memory
+    return fitz.open(stream=memoryview(source) if isinstance(source, mmap.mmap) else source, filetype="pdf")
+
+
+def pdf_page_count(source: PdfSource) -> int:
+    with open_pdf(source) as doc:
+        return doc.page_count
+
+
+def _read_page_range(pdf_path: str, start: int, end: int) -> list[str]:
+    # Runs inside pool workers: each process opens its own document handle
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        return [doc[i].get_text("text") for i in range(start, end)]
+
+
+def _shard(start: int, end: int, shards: int) -> list[tuple[int, int]]:
+    total = end - start
+    size = max(1, -(-total // shards))
+    return [(s, min(s + size, end)) for s in range(start, end, size)]
+
+
+def iter_pdf_pages(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    page_range: Optional[tuple[int, int]] = None,
+    workers: Optional[int] = None,
+    parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD,
+) -> Iterator[str]:
+    # Pages come out in order, one at a time; at most a few shards are ever held in memory
+    with open_pdf(source) as doc:
+        count = doc.page_count
+        start, end = page_range if page_range is not None else (0, count)
+        start = max(0, start)
+        end = min(end, count)
+        if max_pages is not None:
+            end = min(end, start + max_pages)
+        workers = workers if workers is not None else (os.cpu_count() or 1)
+        # Worker processes reopen the file by path, so buffers are always read here
+        if workers <= 1 or (end - start) < parallel_threshold or not isinstance(source, (str, os.PathLike)):
+            for i in range(start, end):
+                yield doc[i].get_text("text")
+            return
+
+    shards = _shard(start, end, workers * SHARDS_PER_WORKER)
+    pool = _get_pool(workers)
+    pending: deque = deque()
+    for s, e in shards:
+        pending.append(pool.submit(_read_page_range, str(source), s, e))
+        # Keep every worker busy plus one shard ready, instead of the whole document
+        if len(pending) > workers:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+    logger.info("Read pages {}-{} across {} shards", start, end, len(shards))
+
+
+def read_pdf_pages(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    page_range: Optional[tuple[int, int]] = None,
+    workers: Optional[int] = None,
+    parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD,
+) -> list[str]:
+    texts = list(iter_pdf_pages(source, max_pages, page_range, workers, parallel_threshold))
     logger.info("Read {} pages of PDF", len(texts))
-    return "\n\n".join(texts) 
\ No newline at end of file
+    return texts
+
+
+def read_pdf_text(source: PdfSource, max_pages: Optional[int] = None) -> str:
+    return "\n\n".join(iter_pdf_pages(source, max_pages=max_pages))
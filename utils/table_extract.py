@@ -0,0 +1,380 @@
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+import re
+
+from utils.extract_merge import FINANCIAL_FIELDS, SUMMARY_MARKERS, _fy_sort_key, normalize_fy_label
+
+if TYPE_CHECKING:
+    import fitz
+
+# Bump when parsing rules change so stored table results are re-derived
+TABLE_PARSER_VERSION = 3
+
+# Row labels as they appear in Restated Summary Statements; the first matching row wins
+ROW_PATTERNS: dict[str, list[re.Pattern]] = {
+    "revenue_cr": [
+        re.compile(r"^(total\s+)?revenue\s+from\s+operations\b"),
+        re.compile(r"^revenue\s+from\s+contracts?\s+with\s+customers\b"),
+    ],
+    "ebitda_cr": [
+        re.compile(r"^(restated\s+)?ebitda\b(?!\s*margin)"),
+        re.compile(r"^earnings\s+before\s+interest,?\s+tax(es)?,?\s+depreciation"),
+    ],
+    "pat_cr": [
+        re.compile(r"^restated\s+(net\s+)?profit\s*(/\s*\(loss\)\s*)?(after\s+tax\s+)?for\s+the\s+(year|period)"),
+        re.compile(r"^(net\s+)?profit\s*(/\s*\(loss\)\s*)?after\s+tax\b"),
+        re.compile(r"^(net\s+)?profit\s*(/\s*\(loss\)\s*)?for\s+the\s+(year|period)"),
+        re.compile(r"^pat\b"),
+    ],
+    "networth_cr": [
+        re.compile(r"^(total\s+)?net\s*worth\b"),
+        re.compile(r"^total\s+equity\b"),
+    ],
+    "debt_cr": [
+        re.compile(r"^total\s+(borrowings|debt)\b"),
+        re.compile(r"^borrowings\b"),
+    ],
+    "cfo_cr": [
+        re.compile(
+            r"^net\s+cash\s+(flows?\s+)?(generated\s+)?(from|used\s+in|from\s*/\s*\(used\s+in\))\s*(/\s*\(used\s+in\)\s*)?operating\s+activities"
+        ),
+    ],
+}
+
+# Multipliers from the table's stated unit to INR crore
+UNIT_TO_CRORE = {
+    "crore": 1.0,
+    "lakh": 0.01,
+    "million": 0.1,
+    "billion": 100.0,
+    "thousand": 0.0001,
+}
+
+_UNIT = re.compile(
+    r"(?:in|amounts?\s+in|figures\s+in)\s*(?:rs\.?|₹|inr|rupees)?\s*"
+    r"(crores?|cr\.?|lakhs?|lacs?|millions?|mn|billions?|bn|thousands?)\b",
+    re.IGNORECASE,
+)
+_UNIT_ALIASES = {"cr": "crore", "lac": "lakh", "mn": "million", "bn": "billion"}
+
+_NUMBER = re.compile(r"^\(?[-–]?(?:rs\.?|₹)?\s*\d[\d,]*(?:\.\d+)?\)?$", re.IGNORECASE)
+_CURRENCY = re.compile(r"rs\.?|₹", re.IGNORECASE)
+_BLANK = {"-", "–", "—", "nil", "na", "n.a.", "n/a"}
+
+_MONTHS = {
+    m[:3]: i + 1
+    for i, m in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december"]
+    )
+}
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_PERIOD = re.compile(
+    r"(?P<partial>\d{1,2}\s*M\s*FY\s*'?\d{2,4})"
+    r"|(?P<fy>(?:FY|F\.Y\.|fiscal)\s*'?\d{2}(?:\d{2})?(?:\s*[-/]\s*\d{2,4})?)"
+    r"|(?P<date>(?:\d{1,2}(?:st|nd|rd|th)?[\s\-/.,]*" + _MONTH + r"|" + _MONTH + r"\s*\d{1,2}(?:st|nd|rd|th)?)[\s\-/.,]*\d{2,4})",
+    re.IGNORECASE,
+)
+_DATE_PARTS = re.compile(r"(\d{1,2})?(?:st|nd|rd|th)?[\s\-/.,]*" + _MONTH + r"[\s\-/.,]*(?:(\d{1,2})(?:st|nd|rd|th)?,?\s*)?(\d{4}|\d{2})$", re.IGNORECASE)
+_LABEL = re.compile(r"^(\d{1,2}M )?FY\d{4}$")
+_FY_RANGE = re.compile(r"(?:FY|F\.Y\.|fiscal)\s*'?(\d{2,4})\s*[-/]\s*(\d{2,4})", re.IGNORECASE)
+
+
+def parse_amount(cell: Any) -> Optional[float]:
+    if cell is None:
+        return None
+    text = str(cell).strip().replace(" ", "")
+    if not text or text.lower() in _BLANK:
+        return None
+    if not _NUMBER.match(text):
+        return None
+    negative = (text.startswith("(") and text.endswith(")")) or text.lstrip("(").startswith(("-", "–"))
+    # Drop the currency prefix first: the dot in "Rs." is not a decimal point
+    digits = re.sub(r"[^\d.]", "", _CURRENCY.sub("", text))
+    try:
+        value = float(digits)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def _year(raw: str) -> int:
+    year = int(raw)
+    return year + 2000 if year < 100 else year
+
+
+def _period_from_date(text: str) -> Optional[str]:
+    m = _DATE_PARTS.search(text.strip())
+    if not m:
+        return None
+    month = _MONTHS.get(m.group(2).lower()[:3])
+    if month is None:
+        return None
+    year = _year(m.group(4))
+    # Indian fiscal years run April-March; a period ending before March is year-to-date
+    fy = year if month <= 3 else year + 1
+    months = month + 9 if month <= 3 else month - 3
+    return f"FY{fy}" if months == 12 else f"{months}M FY{fy}"
+
+
+def _fy_label(text: str) -> Optional[str]:
+    rng = _FY_RANGE.match(text)
+    if rng:
+        # "FY 2023-24" names the year that ends in 2024
+        start, end = rng.group(1), rng.group(2)
+        return f"FY{end}" if len(end) == 4 else f"FY{_year(start) // 100 * 100 + int(end)}"
+    return normalize_fy_label(re.sub(r"(?i)fiscal", "FY", text))
+
+
+def parse_periods(text: str) -> list[str]:
+    periods = []
+    for m in _PERIOD.finditer(text):
+        if m.group("partial"):
+            label = normalize_fy_label(m.group("partial"))
+        elif m.group("fy"):
+            label = _fy_label(m.group("fy"))
+        else:
+            label = _period_from_date(m.group("date"))
+        if label and _LABEL.match(label):
+            periods.append(label)
+    return periods
+
+
+def detect_unit(text: str) -> Optional[str]:
+    m = _UNIT.search(text)
+    if not m:
+        return None
+    word = m.group(1).lower().rstrip(".")
+    word = word[:-1] if word.endswith("s") else word
+    unit = _UNIT_ALIASES.get(word, word)
+    return unit if unit in UNIT_TO_CRORE else None
+
+
+def _label_field(label: str) -> Optional[str]:
+    normalized = re.sub(r"\s+", " ", label.lower().replace("’", "'")).strip(" :.-")
+    for field, patterns in ROW_PATTERNS.items():
+        if any(p.search(normalized) for p in patterns):
+            return field
+    return None
+
+
+def _split_row(cells: list[Any]) -> tuple[str, list[Optional[float]]]:
+    # Leading text cells form the label; the trailing run of amounts are the values
+    cells = [str(c).strip() if c is not None else "" for c in cells]
+    values: list[Optional[float]] = []
+    i = len(cells)
+    while i > 0:
+        cell = cells[i - 1]
+        if cell == "":
+            i -= 1
+            continue
+        if cell.lower() in _BLANK:
+            values.append(None)
+        else:
+            amount = parse_amount(cell)
+            if amount is None:
+                break
+            values.append(amount)
+        i -= 1
+    label = " ".join(c for c in cells[:i] if c)
+    return label, values[::-1]
+
+
+def word_rows(page: "fitz.Page") -> list[list[str]]:
+    # Groups words sharing a baseline; amounts stay separate cells, label words are joined later
+    words = sorted(page.get_text("words"), key=lambda w: (round((w[1] + w[3]) / 2), w[0]))
+    rows: list[list[tuple[float, float, str]]] = []
+    for x0, y0, x1, y1, text, *_ in words:
+        mid = (y0 + y1) / 2
+        if rows and abs(rows[-1][0][1] - mid) <= max(2.0, (y1 - y0) * 0.4):
+            rows[-1].append((x0, mid, text))
+        else:
+            rows.append([(x0, mid, text)])
+    out = []
+    for row in rows:
+        row.sort(key=lambda t: t[0])
+        cells: list[str] = []
+        for _, _, text in row:
+            # Merge label words; keep each amount as its own cell
+            if cells and parse_amount(text) is None and parse_amount(cells[-1]) is None:
+                cells[-1] = f"{cells[-1]} {text}"
+            else:
+                cells.append(text)
+        out.append(cells)
+    return out
+
+
+def detected_table_rows(page: "fitz.Page") -> list[list[list[str]]]:
+    tables = []
+    for strategy in ("lines", "text"):
+        try:
+            found = page.find_tables(strategy=strategy)
+        except Exception:
+            continue
+        for table in found.tables:
+            rows = [[c or "" for c in row] for row in table.extract()]
+            if rows:
+                tables.append(rows)
+        if tables:
+            break
+    return tables
+
+
+def parse_table(rows: list[list[Any]], context: str = "") -> Optional[dict[str, Any]]:
+    periods: list[str] = []
+    values: dict[str, list[Optional[float]]] = {}
+    for cells in rows:
+        line = " ".join(str(c) for c in cells if c)
+        if not periods:
+            found = parse_periods(line)
+            if len(found) >= 2:
+                periods = found
+            continue
+        label, amounts = _split_row(cells)
+        field = _label_field(label) if label else None
+        if field is None or field in values or len(amounts) < len(periods):
+            continue
+        # Extra leading amounts are note references or a comparative column
+        values[field] = amounts[-len(periods):]
+    if not periods or not values:
+        return None
+    unit = detect_unit(context + "\n" + "\n".join(" ".join(str(c) for c in r if c) for r in rows[:6]))
+    return {"periods": periods, "values": values, "unit": unit}
+
+
+def _sanity_ratio(financials: list[dict[str, Any]]) -> float:
+    checks = passed = 0
+    for row in financials:
+        revenue = row.get("revenue_cr")
+        if revenue is None or revenue <= 0:
+            continue
+        for key in ("ebitda_cr", "pat_cr"):
+            if row.get(key) is not None:
+                checks += 1
+                passed += abs(row[key]) <= revenue * 1.05
+        if row.get("pat_cr") is not None and row.get("ebitda_cr") is not None:
+            checks += 1
+            passed += row["pat_cr"] <= row["ebitda_cr"] * 1.05 or row["pat_cr"] < 0
+    return passed / checks if checks else 0.5
+
+
+def score_table(parsed: dict[str, Any], summary_heading: bool) -> tuple[float, list[dict[str, Any]]]:
+    factor = UNIT_TO_CRORE.get(parsed["unit"] or "", 1.0)
+    periods = parsed["periods"]
+    rows: dict[str, dict[str, Any]] = {}
+    for col, label in enumerate(periods):
+        row = rows.setdefault(label, {"fy": label, **{k: None for k in FINANCIAL_FIELDS}})
+        for field, amounts in parsed["values"].items():
+            if amounts[col] is not None and row[field] is None:
+                row[field] = round(amounts[col] * factor, 2)
+    financials = sorted(rows.values(), key=lambda r: _fy_sort_key(r["fy"]))[-7:]
+
+    cells = len(financials) * len(FINANCIAL_FIELDS)
+    filled = sum(1 for r in financials for k in FINANCIAL_FIELDS if r[k] is not None)
+    coverage = filled / cells if cells else 0.0
+    confidence = (
+        0.55 * coverage
+        + 0.2 * (parsed["unit"] is not None)
+        + 0.1 * summary_heading
+        + 0.15 * _sanity_ratio(financials)
+    )
+    if "revenue_cr" not in parsed["values"] or "pat_cr" not in parsed["values"]:
+        confidence = min(confidence, 0.4)
+    # Without a stated unit the figures are assumed to be crore, a 100x error for a lakh table
+    if parsed["unit"] is None:
+        confidence = min(confidence, 0.5)
+    if len(financials) < 2:
+        confidence = min(confidence, 0.3)
+    return round(confidence, 3), financials
+
+
+def extract_financial_tables(pdf_path: str, page_numbers: Iterable[int]) -> Optional[dict[str, Any]]:
+    import fitz
+
+    best: Optional[dict[str, Any]] = None
+    with fitz.open(pdf_path) as doc:
+        for page_no in page_numbers:
+            if not 0 <= page_no < doc.page_count:
+                continue
+            page = doc[page_no]
+            text = page.get_text()
+            summary_heading = any(m in text.lower() for m in SUMMARY_MARKERS)
+            for rows in [*detected_table_rows(page), word_rows(page)]:
+                parsed = parse_table(rows, context=text)
+                if parsed is None:
+                    continue
+                confidence, financials = score_table(parsed, summary_heading)
+                if best is None or confidence > best["confidence"]:
+                    best = {
+                        "financials": financials,
+                        "confidence": confidence,
+                        "page": page_no,
+                        "unit": parsed["unit"],
+                    }
+    return best
+
+
+_PRICE_BAND = re.compile(
+    r"price\s+band\s*[:\-]?\s*(?:of\s*)?(?:rs\.?|₹|inr)?\s*([\d,]+(?:\.\d+)?)\s*(?:to|-|–)\s*(?:rs\.?|₹|inr)?\s*([\d,]+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+_LOT = re.compile(r"(?:minimum\s+)?(?:bid\s+lot|lot\s+size)\s*[:\-]?\s*(?:of\s*)?([\d,]+)\s*equity\s+shares", re.IGNORECASE)
+_OPEN = re.compile(r"(?:bid\s*/\s*offer|offer|issue)\s+opens\s+on\s*[:\-]?\s*([^\n]{6,24})", re.IGNORECASE)
+_CLOSE = re.compile(r"(?:bid\s*/\s*offer|offer|issue)\s+closes\s+on\s*[:\-]?\s*([^\n]{6,24})", re.IGNORECASE)
+_NUMERIC_DATE = re.compile(r"(\d{1,2})[\-/.](\d{1,2})[\-/.](\d{4})")
+_COMPANY = re.compile(r"^([A-Z0-9][A-Z0-9&.,'() \-]*?\b(?:LIMITED|LTD\.?))(?=\s|$)")
+_INDUSTRY = [
+    re.compile(r"overview\s+of\s+(?:the\s+)?(?:(?:indian|global|domestic)\s+(?:and\s+)?)*([a-z][a-z&,/\- ]{2,48}?)\s+(?:industry|sector)\b", re.IGNORECASE),
+    re.compile(r"\b(?:operates?|operating)\s+in\s+the\s+([a-z][a-z&,/\- ]{2,48}?)\s+(?:industry|sector)\b", re.IGNORECASE),
+]
+_GENERIC_INDUSTRY = {"same", "relevant", "overall", "said", "above", "such", "various", "other", "our", "its"}
+
+
+def _iso_date(text: str) -> Optional[str]:
+    m = _NUMERIC_DATE.search(text)
+    if m:
+        day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    else:
+        m = _DATE_PARTS.search(text.strip().rstrip(".,"))
+        if not m or not (m.group(1) or m.group(3)):
+            return None
+        day, month, year = int(m.group(1) or m.group(3)), _MONTHS.get(m.group(2).lower()[:3], 0), _year(m.group(4))
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def extract_industry(text: str) -> Optional[str]:
+    # "Overview of the Indian Specialty Chemicals Industry", "operates in the logistics sector"
+    for pattern in _INDUSTRY:
+        for m in pattern.finditer(text):
+            words = m.group(1).split()
+            if not words or any(w.lower() in _GENERIC_INDUSTRY for w in words):
+                continue
+            name = " ".join(words).strip(" ,-/&")
+            if name.isupper() or name.islower():
+                # Keep short acronyms such as IT as written
+                name = " ".join(w if len(w) <= 2 and w.isupper() else w.title() for w in name.split())
+            return name
+    return None
+
+
+def extract_offer_terms(cover_text: str, industry_text: str = "") -> dict[str, Any]:
+    # `industry_text`: pages beyond the cover (Industry Overview, Our Business) to look for the industry in
+    meta: dict[str, Any] = {"company": None, "industry": extract_industry(cover_text + "\n" + industry_text)}
+    terms: dict[str, Any] = {"price_band": None, "lot_size": None, "open_date": None, "close_date": None}
+    for line in cover_text.splitlines():
+        m = _COMPANY.match(line.strip())
+        if m:
+            meta["company"] = m.group(1).title() if m.group(1).isupper() else m.group(1)
+            break
+    m = _PRICE_BAND.search(cover_text)
+    if m:
+        band = [parse_amount(m.group(1)), parse_amount(m.group(2))]
+        terms["price_band"] = [int(v) if v is not None and v.is_integer() else v for v in band]
+    m = _LOT.search(cover_text)
+    if m:
+        terms["lot_size"] = int(m.group(1).replace(",", ""))
+    for key, pattern in (("open_date", _OPEN), ("close_date", _CLOSE)):
+        m = pattern.search(cover_text)
+        if m:
+            terms[key] = _iso_date(m.group(1))
+    return {"meta": meta, "terms": terms}
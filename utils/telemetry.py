@@ -0,0 +1,67 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "ipo_stage_duration_seconds",
+    "Time spent in each analysis stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+ANALYSIS_SECONDS = Histogram(
+    "ipo_analysis_duration_seconds",
+    "End-to-end analysis time",
+    ["outcome"],
+    buckets=STAGE_BUCKETS,
+)
+LLM_TOKENS = Counter("ipo_llm_tokens_total", "Tokens reported by the LLM API", ["kind"])
+LLM_CALLS = Counter("ipo_llm_calls_total", "LLM extraction calls", ["outcome"])
+LLM_RETRIES = Counter("ipo_llm_retries_total", "LLM requests retried or re-asked", ["reason"])
+LLM_QUOTA_WAIT_SECONDS = Counter("ipo_llm_quota_wait_seconds_total", "Time spent waiting for client-side LLM quota")
+LLM_CONCURRENCY_LIMIT = Gauge("ipo_llm_concurrency_limit", "Current adaptive limit on concurrent LLM requests")
+CACHE_LOOKUPS = Counter("ipo_extraction_cache_lookups_total", "Extraction cache lookups", ["result"])
+PAGE_STORE_LOOKUPS = Counter("ipo_page_store_lookups_total", "Stored page-text lookups", ["result"])
+NORMALIZE_TOKENS = Counter(
+    "ipo_normalize_tokens_total", "Estimated prompt tokens before and after text normalization", ["stage"]
+)
+ANALYSES_IN_FLIGHT = Gauge("ipo_analyses_in_flight", "Analyses currently admitted")
+TEXT_MEMORY_BYTES = Gauge("ipo_text_memory_reserved_bytes", "Page text memory reserved by running analyses")
+TEXT_MEMORY_WAIT_SECONDS = Counter("ipo_text_memory_wait_seconds_total", "Time analyses waited for the page text memory ceiling")
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def render_metrics() -> bytes:
+    return generate_latest()
+
+
+def record_usage(usage: dict[str, int]) -> None:
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(kind.replace("_tokens", "")).inc(usage[kind])
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            STAGE_SECONDS.labels(name).observe(elapsed)
+
+    def report(self) -> dict[str, float]:
+        return {
+            **{k: round(v * 1000, 2) for k, v in self.timings.items()},
+            "total": round((time.perf_counter() - self.started) * 1000, 2),
+        }
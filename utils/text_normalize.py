@@ -0,0 +1,140 @@
+from collections import Counter
+from typing import Any, Iterable, Optional
+import math
+import re
+
+NORMALIZE_VERSION = 3
+
+_SPACES = re.compile(r"[ \t\u00a0\u2002\u2003\u2009]+")
+# Lines made only of rule characters (table borders, separators)
+_RULE = re.compile(r"^[\s\-_=|.·•*~—–+]+$")
+# Dot leaders and long rules inside a line
+_LEADER = re.compile(r"(?:\.\s?){4,}|_{4,}|-{4,}|={4,}")
+# Western or Indian thousands grouping, e.g. 219,705.00 or 12,34,567.00; lists like "12,13" don't match
+_GROUPED = re.compile(r"(?<![\d.,])(?:\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})+,\d{3})(?:\.\d+)?(?!\d|,\d)")
+# "pages 147,148" or "notes 12, 14 and 101,102" are lists even where they look like grouping
+_REFERENCE = re.compile(
+    r"\b(?:pages?|pp\.|notes?|annexures?|schedules?|sections?|clauses?)\s+(?:[\d\s,\-–]+(?:and|&|to)\s+)?$",
+    re.IGNORECASE,
+)
+_ZERO_DECIMALS = re.compile(r"(?<=\d)\.0+(?![\d])")
+_NUMERIC_LINE = re.compile(r"^(?:\(?[-–]?(?:rs\.?|₹)?\s?[\d.]+\)?%?\s?)+$", re.IGNORECASE)
+_PAGE_NO = re.compile(r"^(?:page\s*)?(\d{1,4})(?:\s*of\s*\d{1,4})?$", re.IGNORECASE)
+# Lines the extractor may need even when they repeat: figures, year headers, unit statements
+_KEEP = re.compile(r"\d|₹|\brs\b|\binr\b|\bcrores?\b|\blakhs?\b|\bmillions?\b|\bbillions?\b", re.IGNORECASE)
+_TOKEN = re.compile(r"[A-Za-z]{1,8}|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    # Close to BPE counts for English prose and numbers; used for reporting only
+    return len(_TOKEN.findall(text))
+
+
+def _line_key(line: str) -> str:
+    return _SPACES.sub(" ", line).strip().lower()
+
+
+def find_boilerplate(pages: Iterable[str], min_fraction: float = 0.3, min_pages: int = 3) -> set[str]:
+    counts: Counter = Counter()
+    total = 0
+    for text in pages:
+        counts.update({_line_key(ln) for ln in text.splitlines() if ln.strip() and not _KEEP.search(ln)})
+        total += 1
+    threshold = max(min_pages, math.ceil(min_fraction * total))
+    return {key for key, n in counts.items() if n >= threshold and sum(c.isalpha() for c in key) >= 4}
+
+
+def _page_number_lines(pages: list[tuple[int, str]]) -> dict[int, set[int]]:
+    # A first/last line holding a bare number is a page number when its offset from the
+    # page index repeats on other pages (printed numbering usually starts after front matter)
+    candidates: list[tuple[int, int, int]] = []
+    for page_no, text in pages:
+        lines = text.splitlines()
+        filled = [n for n, ln in enumerate(lines) if ln.strip()]
+        for n in {filled[0], filled[-1]} if filled else ():
+            m = _PAGE_NO.match(lines[n].strip())
+            if m:
+                candidates.append((page_no, n, int(m.group(1)) - page_no))
+    offsets = Counter(offset for _, _, offset in candidates)
+    drop: dict[int, set[int]] = {}
+    for page_no, n, offset in candidates:
+        if offsets[offset] >= 2:
+            drop.setdefault(page_no, set()).add(n)
+    return drop
+
+
+def compact_numbers(line: str) -> str:
+    def ungroup(m: re.Match) -> str:
+        if _REFERENCE.search(line, 0, m.start()):
+            return m.group(0)
+        return m.group(0).replace(",", "")
+
+    line = _GROUPED.sub(ungroup, line)
+    return _ZERO_DECIMALS.sub("", line)
+
+
+def normalize_pages(
+    pages: list[tuple[int, str]],
+    boilerplate: Optional[Iterable[str]] = None,
+    min_block_chars: int = 60,
+) -> tuple[list[tuple[int, str]], dict[str, Any]]:
+    boilerplate = set(boilerplate) if boilerplate is not None else find_boilerplate([t for _, t in pages])
+    page_numbers = _page_number_lines(pages)
+    seen_lines: set[str] = set()
+    seen_blocks: set[str] = set()
+    stats = {"boilerplate_lines": 0, "page_numbers": 0, "rule_lines": 0, "duplicate_blocks": 0}
+    out: list[tuple[int, str]] = []
+
+    for page_no, text in pages:
+        lines: list[str] = []
+        skip = page_numbers.get(page_no, set())
+        for n, raw in enumerate(text.splitlines()):
+            line = _SPACES.sub(" ", raw).strip()
+            if not line:
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            if n in skip:
+                stats["page_numbers"] += 1
+                continue
+            if _RULE.match(line):
+                stats["rule_lines"] += 1
+                continue
+            key = _line_key(line)
+            if key in boilerplate and not _KEEP.search(line):
+                # Keep the first occurrence; a running header may be the only place a name appears
+                if key in seen_lines:
+                    stats["boilerplate_lines"] += 1
+                    continue
+                seen_lines.add(key)
+            line = compact_numbers(_SPACES.sub(" ", _LEADER.sub(" ", line)).strip())
+            # Tables extracted cell-per-line: fold numeric cells back onto their row label
+            if lines and lines[-1] and _NUMERIC_LINE.match(line):
+                lines[-1] = f"{lines[-1]} {line}"
+            else:
+                lines.append(line)
+
+        blocks = []
+        for block in "\n".join(lines).split("\n\n"):
+            block = block.strip()
+            if not block:
+                continue
+            if len(block) >= min_block_chars:
+                if block in seen_blocks:
+                    stats["duplicate_blocks"] += 1
+                    continue
+                seen_blocks.add(block)
+            blocks.append(block)
+        out.append((page_no, "\n\n".join(blocks)))
+
+    before = sum(estimate_tokens(t) for _, t in pages)
+    after = sum(estimate_tokens(t) for _, t in out)
+    stats.update(
+        {
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_removed": before - after,
+            "reduction": round((before - after) / before, 4) if before else 0.0,
+        }
+    )
+    return out, stats
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import Any, Optional
+
+from loguru import logger
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Upload exceeds the {limit} byte limit")
+        self.limit = limit
+
+
+async def _reject(send: Any, limit: int) -> None:
+    body = json.dumps({"detail": str(UploadTooLargeError(limit))}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class UploadLimitMiddleware:
+    # Caps request bodies on upload routes before Starlette's multipart parser spools them to disk:
+    # a declared Content-Length over the limit is refused unread, and a body that turns out larger
+    # (chunked, or an understated length) is cut off as soon as the received bytes pass it
+    def __init__(self, app: Any, limits: dict[str, int]) -> None:
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        limit = self.limits.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        declared = dict(scope.get("headers") or []).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            await _reject(send, limit)
+            return
+
+        received = 0
+        exceeded = started = False
+
+        async def limited_receive() -> dict[str, Any]:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLargeError(limit)
+            return message
+
+        async def guarded_send(message: dict[str, Any]) -> None:
+            nonlocal started
+            # Once the body is cut off, the app's error response for the broken form is replaced below
+            if exceeded:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            await _reject(send, limit)
+
+
+def _write_chunk(out: Any, digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def save_upload(
+    upload: Any,
+    upload_dir: pathlib.Path,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_BYTES,
+) -> tuple[str, pathlib.Path, int]:
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    tmp_path = pathlib.Path(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                await asyncio.to_thread(_write_chunk, out, digest, chunk)
+        file_id = digest.hexdigest()
+        pdf_path = upload_dir / f"{file_id}.pdf"
+        if pdf_path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, pdf_path)
+            logger.info("Saved uploaded PDF {} ({} bytes)", pdf_path, size)
+        return file_id, pdf_path, size
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def store_local_pdf(
+    source: pathlib.Path,
+    upload_dir: pathlib.Path,
+    chunk_size: int = DEFAULT_CHUNK_BYTES,
+) -> tuple[str, pathlib.Path, int]:
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with open(source, "rb") as src:
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    file_id = digest.hexdigest()
+    pdf_path = upload_dir / f"{file_id}.pdf"
+    if not pdf_path.exists():
+        fd, tmp_name = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out, open(source, "rb") as src:
+                shutil.copyfileobj(src, out, chunk_size)
+            os.replace(tmp_name, pdf_path)
+        except BaseException:
+            pathlib.Path(tmp_name).unlink(missing_ok=True)
+            raise
+    return file_id, pdf_path, size